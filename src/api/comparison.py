@@ -0,0 +1,84 @@
+"""
+Vectorized price statistics for realm comparison.
+"""
+
+import pandas as pd
+
+GROUP_KEYS = ["connected_realm_id", "item_id"]
+TRIM_RATIO = 0.1  # Fraction trimmed from each end for the trimmed mean
+MIN_TRIM_SAMPLES = 10  # Trimmed mean only applies above this many auctions
+SUPPLY_BAND = 0.2  # Auctions within ±20% of the robust price count as supply
+MIN_SUPPLY_RATIO = 0.2  # Fall back to total quantity below this share
+LOWEST_COUNT = 5  # Number of cheapest auctions averaged
+
+
+def compute_item_price_stats(auctions: pd.DataFrame) -> pd.DataFrame:
+    """Compute per-(realm, item) price statistics from raw auction rows.
+
+    Args:
+        auctions: One row per auction with ``connected_realm_id``, ``item_id``,
+            ``buyout_price`` and ``quantity`` columns.
+
+    Returns:
+        DataFrame indexed by (connected_realm_id, item_id) with the columns
+        lowest_price, highest_price, quantity, average_lowest_five,
+        median_price, trimmed_mean, robust_price, effective_quantity and
+        price_sum.
+    """
+    columns = [
+        "lowest_price",
+        "highest_price",
+        "quantity",
+        "average_lowest_five",
+        "median_price",
+        "trimmed_mean",
+        "robust_price",
+        "effective_quantity",
+        "price_sum",
+    ]
+    if auctions.empty:
+        index = pd.MultiIndex.from_tuples([], names=GROUP_KEYS)
+        return pd.DataFrame(columns=columns, index=index, dtype=float)
+
+    df = auctions[GROUP_KEYS + ["quantity"]].copy()
+    df["unit_price"] = auctions["buyout_price"] / auctions["quantity"]
+    df = df.sort_values(GROUP_KEYS + ["unit_price"], kind="mergesort")
+
+    grouped = df.groupby(GROUP_KEYS, sort=False)
+    rank = grouped.cumcount()
+    size = grouped["unit_price"].transform("size")
+
+    stats = grouped.agg(
+        lowest_price=("unit_price", "min"),
+        highest_price=("unit_price", "max"),
+        median_price=("unit_price", "median"),
+        quantity=("quantity", "sum"),
+        price_sum=("unit_price", "sum"),
+        count=("unit_price", "size"),
+    )
+
+    # Trimmed mean over the middle of each sorted group, median for small groups
+    trim = (size * TRIM_RATIO).astype(int)
+    middle = (rank >= trim) & (rank < size - trim)
+    trimmed = df[middle].groupby(GROUP_KEYS, sort=False)["unit_price"].mean()
+    stats["trimmed_mean"] = trimmed.reindex(stats.index).where(
+        stats["count"] > MIN_TRIM_SAMPLES, stats["median_price"]
+    )
+    stats["robust_price"] = stats[["median_price", "trimmed_mean"]].min(axis=1)
+
+    # Effective supply: quantity listed close to the robust price
+    robust = df.join(stats["robust_price"], on=GROUP_KEYS)["robust_price"]
+    in_band = (df["unit_price"] - robust).abs() <= robust * SUPPLY_BAND
+    effective = df["quantity"].where(in_band, 0).groupby(
+        [df[key] for key in GROUP_KEYS], sort=False
+    ).sum()
+    effective = effective.reindex(stats.index)
+    stats["effective_quantity"] = effective.where(
+        effective >= stats["quantity"] * MIN_SUPPLY_RATIO, stats["quantity"]
+    )
+
+    stats["average_lowest_five"] = (
+        df[rank < LOWEST_COUNT].groupby(GROUP_KEYS, sort=False)["unit_price"].mean()
+    )
+
+    return stats[columns]
@@ -2,11 +2,14 @@
 FastAPI main application module implementing the REST API endpoints.
 """
 
-import math
 import re
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 from typing import List, Optional
 
+import numpy as np
+import pandas as pd
+from anyio import to_thread
 from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
@@ -15,10 +18,46 @@ from pydantic import BaseModel, field_validator
 from sqlalchemy import and_, func
 from sqlalchemy.orm import Session
 
-from src.database.models import Auction, ConnectedRealm, Group, Item
-from src.database.operations import get_db
+from src.api.comparison import compute_item_price_stats
+from src.database.commodity_ladder import get_commodity_buy_cost
+from src.database.init_db import API_DB_MAX_OVERFLOW, API_DB_POOL_SIZE
+from src.database.models import (
+    Auction,
+    AuctionPriceDaily,
+    AuctionPriceHourly,
+    CommodityPriceHistory,
+    ConnectedRealm,
+    Group,
+    Item,
+)
+from src.database.operations import (
+    close_session_factory,
+    current_auctions_clause,
+    get_db,
+    init_session_factory,
+    price_rollup_hour,
+)
+
+
+# Route handlers are plain ``def`` functions so FastAPI runs their blocking
+# SQLAlchemy queries in a worker thread instead of on the event loop. The
+# thread pool is capped at the connection pool size so threads never queue
+# for a database connection.
+API_THREADPOOL_SIZE = API_DB_POOL_SIZE + API_DB_MAX_OVERFLOW
+
 
-app = FastAPI(title="Game Item API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the database engine and session factory once per worker."""
+    to_thread.current_default_thread_limiter().total_tokens = API_THREADPOOL_SIZE
+    init_session_factory()
+    try:
+        yield
+    finally:
+        close_session_factory()
+
+
+app = FastAPI(title="Game Item API", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -142,6 +181,27 @@ class ItemPriceDetails(BaseModel):
     rating: float = 0.0
 
 
+class CommodityCost(BaseModel):
+    item_id: int
+    quantity: int
+    total_cost: int
+    average_price: float
+    available_quantity: int
+
+
+class CommodityPricePoint(BaseModel):
+    snapshot_time: datetime
+    min_price: int
+    p10_price: int
+    p25_price: int
+    median_price: int
+    total_quantity: int
+    cost_10: Optional[int] = None
+    cost_100: Optional[int] = None
+    cost_1000: Optional[int] = None
+    model_config = {"from_attributes": True}
+
+
 class RealmComparison(BaseModel):
     realm_id: int
     total_value: float
@@ -151,7 +211,7 @@ class RealmComparison(BaseModel):
 
 
 @app.get("/api/v1/items/{item_id}", response_model=ItemDetail)
-async def get_item_by_id(item_id: int, db: Session = Depends(get_db)):
+def get_item_by_id(item_id: int, db: Session = Depends(get_db)):
     """Get detailed information for a specific item."""
     item = db.query(Item).filter(Item.item_id == item_id).first()
     if not item:
@@ -167,7 +227,7 @@ async def get_item_by_id(item_id: int, db: Session = Depends(get_db)):
 
 
 @app.get("/api/v1/items", response_model=ItemListResponse)
-async def list_items(
+def list_items(
     page: int = Query(1, ge=1),
     page_size: int = Query(15, ge=1, le=100),
     item_class_name: Optional[str] = None,
@@ -200,7 +260,7 @@ async def list_items(
 
 
 @app.get("/api/v1/item-classes", response_model=List[ItemClass])
-async def list_item_classes(db: Session = Depends(get_db)):
+def list_item_classes(db: Session = Depends(get_db)):
     """List all unique item classes."""
     classes = db.query(Item.item_class_id, Item.item_class_name).distinct().all()
 
@@ -213,7 +273,7 @@ async def list_item_classes(db: Session = Depends(get_db)):
 @app.get(
     "/api/v1/item-classes/{class_id}/subclasses", response_model=List[ItemSubclass]
 )
-async def list_subclasses_for_class(class_id: int, db: Session = Depends(get_db)):
+def list_subclasses_for_class(class_id: int, db: Session = Depends(get_db)):
     """List all subclasses for a specific item class."""
     # First check if the class exists
     class_exists = db.query(Item).filter(Item.item_class_id == class_id).first()
@@ -236,14 +296,14 @@ async def list_subclasses_for_class(class_id: int, db: Session = Depends(get_db)
 
 
 @app.get("/api/v1/groups", response_model=List[GroupBase])
-async def list_groups(db: Session = Depends(get_db)):
+def list_groups(db: Session = Depends(get_db)):
     """List all user-defined item groups."""
     groups = db.query(Group).all()
     return groups
 
 
 @app.get("/api/v1/groups/{group_id}", response_model=GroupDetail)
-async def get_group_by_id(group_id: int, db: Session = Depends(get_db)):
+def get_group_by_id(group_id: int, db: Session = Depends(get_db)):
     """Get detailed information for a specific group."""
     group = db.query(Group).filter(Group.group_id == group_id).first()
     if not group:
@@ -252,7 +312,7 @@ async def get_group_by_id(group_id: int, db: Session = Depends(get_db)):
 
 
 @app.get("/api/v1/groups/{group_id}/items", response_model=List[ItemBase])
-async def list_items_in_group(group_id: int, db: Session = Depends(get_db)):
+def list_items_in_group(group_id: int, db: Session = Depends(get_db)):
     """List all items in a specific group."""
     group = db.query(Group).filter(Group.group_id == group_id).first()
     if not group:
@@ -262,7 +322,7 @@ async def list_items_in_group(group_id: int, db: Session = Depends(get_db)):
 
 
 @app.get("/api/v1/realms", response_model=List[RealmData])
-async def get_realms(
+def get_realms(
     realm_category: Optional[str] = None, db: Session = Depends(get_db)
 ):
     """
@@ -311,6 +371,61 @@ async def get_realms(
     return result
 
 
+@app.get("/api/v1/commodities/{item_id}/cost", response_model=CommodityCost)
+def get_commodity_cost(
+    item_id: int, quantity: int = Query(..., ge=1), db: Session = Depends(get_db)
+):
+    """
+    Get the cost of buying the cheapest N units of a commodity.
+
+    Parameters:
+    - item_id: Commodity item ID
+    - quantity: Number of units to buy
+    """
+    total_cost, available = get_commodity_buy_cost(db, item_id, quantity)
+    if not available:
+        raise HTTPException(status_code=404, detail="No commodity listings for item")
+    if total_cost is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Only {available} units of item {item_id} are listed",
+        )
+    return CommodityCost(
+        item_id=item_id,
+        quantity=quantity,
+        total_cost=total_cost,
+        average_price=total_cost / quantity,
+        available_quantity=available,
+    )
+
+
+@app.get(
+    "/api/v1/commodities/{item_id}/history", response_model=List[CommodityPricePoint]
+)
+def get_commodity_history(
+    item_id: int,
+    time_range: str = Query("7d", pattern=r"^[1-9]\d*d$"),
+    db: Session = Depends(get_db),
+):
+    """
+    Get per-snapshot price summaries of a commodity, oldest first.
+
+    Parameters:
+    - item_id: Commodity item ID
+    - time_range: Time range in format "Nd" where N is number of days (e.g., "7d")
+    """
+    since = datetime.utcnow() - timedelta(days=int(time_range[:-1]))
+    return (
+        db.query(CommodityPriceHistory)
+        .filter(
+            CommodityPriceHistory.item_id == item_id,
+            CommodityPriceHistory.snapshot_time >= since,
+        )
+        .order_by(CommodityPriceHistory.snapshot_time)
+        .all()
+    )
+
+
 # Exception handler for validation errors
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -327,7 +442,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 
 
 @app.get("/api/v1/prices/{realm_id}", response_model=PriceMetrics)
-async def get_realm_prices(
+def get_realm_prices(
     realm_id: int, params: PriceRequestParams = Depends(), db: Session = Depends(get_db)
 ):
     """
@@ -398,49 +513,53 @@ async def get_realm_prices(
     days = int(params.time_range[:-1])
     start_date = datetime.utcnow() - timedelta(days=days)
 
-    # Query base for auctions within time range and realm
-    base_query = db.query(Auction).filter(
-        and_(
-            Auction.connected_realm_id
-            == realm.connected_realm_id,  # Use connected_realm_id instead of id
-            Auction.item_id.in_(existing_item_ids),
-            Auction.last_modified >= start_date,
-            Auction.buyout_price > 0,  # Exclude invalid prices
-            Auction.active,  # Only get active auctions
+    # Prices come from the rollups maintained at ingest: the most recent day
+    # from hourly rows, the whole range from daily rows
+    recent_hour = price_rollup_hour(datetime.utcnow() - timedelta(days=1))
+    first_day = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    current_rows = (
+        db.query(
+            AuctionPriceHourly.item_id,
+            (
+                func.sum(AuctionPriceHourly.mean_price * AuctionPriceHourly.auction_count)
+                / func.sum(AuctionPriceHourly.auction_count)
+            ).label("current_price"),
         )
+        .filter(
+            AuctionPriceHourly.connected_realm_id == realm.connected_realm_id,
+            AuctionPriceHourly.item_id.in_(existing_item_ids),
+            AuctionPriceHourly.bucket_start >= recent_hour,
+        )
+        .group_by(AuctionPriceHourly.item_id)
+        .all()
     )
+    daily_samples = AuctionPriceDaily.auction_count * AuctionPriceDaily.hours
+    history_rows = (
+        db.query(
+            AuctionPriceDaily.item_id,
+            func.min(AuctionPriceDaily.min_price).label("historical_low"),
+            func.max(AuctionPriceDaily.max_price).label("historical_high"),
+            (
+                func.sum(AuctionPriceDaily.mean_price * daily_samples)
+                / func.sum(daily_samples)
+            ).label("historical_avg"),
+        )
+        .filter(
+            AuctionPriceDaily.connected_realm_id == realm.connected_realm_id,
+            AuctionPriceDaily.item_id.in_(existing_item_ids),
+            AuctionPriceDaily.bucket_start >= first_day,
+        )
+        .group_by(AuctionPriceDaily.item_id)
+        .all()
+    )
+    current_prices = {row.item_id: row.current_price for row in current_rows}
 
-    # Calculate current prices (average of most recent day)
-    recent_date = datetime.utcnow() - timedelta(days=1)
-    current_prices = {}
-    historical_stats = {}
-
-    for item_id in existing_item_ids:
-        # Get recent auctions for price per unit calculation
-        recent_auctions = base_query.filter(
-            and_(Auction.item_id == item_id, Auction.last_modified >= recent_date)
-        ).all()
-
-        if recent_auctions:
-            # Calculate price per unit for each auction
-            prices_per_unit = [
-                auction.buyout_price / auction.quantity for auction in recent_auctions
-            ]
-            current_price = sum(prices_per_unit) / len(prices_per_unit)
-            current_prices[item_id] = current_price
-
-            # Calculate historical stats
-            historical_auctions = base_query.filter(Auction.item_id == item_id).all()
-            historical_prices = [
-                auction.buyout_price / auction.quantity
-                for auction in historical_auctions
-            ]
-
-            if historical_prices:
-                historical_stats[item_id] = {
-                    "low": min(historical_prices),
-                    "high": max(historical_prices),
-                }
+    # Only items with auctions in the most recent day count towards the metrics
+    price_rows = [row for row in history_rows if row.item_id in current_prices]
+    historical_stats = {
+        row.item_id: {"low": row.historical_low, "high": row.historical_high}
+        for row in price_rows
+    }
 
     if not current_prices:
         raise HTTPException(
@@ -455,22 +574,9 @@ async def get_realm_prices(
     average_price = sum(current_prices.values()) / len(current_prices)
 
     # Calculate price trend (comparing current to historical average)
-    # Calculate historical average price per item
-    historical_avg = 0
-    if current_prices:
-        item_averages = []
-        for item_id in current_prices.keys():
-            item_auctions = base_query.filter(Auction.item_id == item_id).all()
-            if item_auctions:
-                total_price = sum(
-                    auction.buyout_price / auction.quantity for auction in item_auctions
-                )
-                avg_price = total_price / len(item_auctions)
-                item_averages.append(avg_price)
-
-        if item_averages:
-            historical_avg = sum(item_averages) / len(item_averages)
-
+    historical_avg = (
+        sum(row.historical_avg for row in price_rows) / len(price_rows) if price_rows else 0
+    )
     price_trend = (average_price / historical_avg) - 1 if historical_avg > 0 else 0
 
     # Prepare item details
@@ -494,9 +600,8 @@ class ComparisonRequest(BaseModel):
 
 
 @app.post("/api/v1/comparison", response_model=List[RealmComparison])
-async def compare_realms(request: ComparisonRequest, db: Session = Depends(get_db)):
+def compare_realms(request: ComparisonRequest, db: Session = Depends(get_db)):
     """Compare realms based on item prices and calculate realm ratings."""
-    recent_date = datetime.utcnow() - timedelta(days=1)
     EPSILON = 1  # Small constant to avoid division by zero
 
     # Validate realms exist
@@ -512,118 +617,83 @@ async def compare_realms(request: ComparisonRequest, db: Session = Depends(get_d
     if not items:
         raise HTTPException(status_code=404, detail="No valid items found")
 
-    comparisons = []
-    for realm in realms:
-        # Base query for this realm's auctions
-        base_query = db.query(Auction).filter(
+    # Load the current auctions of all realms in one query; unchanged
+    # auctions keep the last_modified of the snapshot they were first seen in
+    realm_ids = [realm.connected_realm_id for realm in realms]
+    auction_rows = (
+        db.query(
+            Auction.connected_realm_id,
+            Auction.item_id,
+            Auction.buyout_price,
+            Auction.quantity,
+        )
+        .filter(
             and_(
-                Auction.connected_realm_id == realm.connected_realm_id,
+                Auction.connected_realm_id.in_(realm_ids),
                 Auction.item_id.in_(request.items),
-                Auction.last_modified >= recent_date,
                 Auction.buyout_price > 0,
-                # Auction.active  # Only get active auctions
+                current_auctions_clause(),
             )
         )
+        .all()
+    )
+    auctions = pd.DataFrame(
+        auction_rows,
+        columns=["connected_realm_id", "item_id", "buyout_price", "quantity"],
+    )
+    stats = compute_item_price_stats(auctions)
 
+    # Calculate market quality factor using population and logs data
+    # Use geometric mean approach for balanced consideration of both factors
+    # Add 1 to logs to avoid zero in case logs data is missing
+    market_quality = pd.Series(
+        {
+            realm.connected_realm_id: (realm.population or 0)
+            * (realm.logs + 1 if realm.logs else 1)
+            for realm in realms
+        },
+        dtype=float,
+    )
+
+    # Calculate item rating using robust price, effective supply, and market quality
+    realm_quality = market_quality.reindex(
+        stats.index.get_level_values("connected_realm_id")
+    ).to_numpy()
+    stats["rating"] = (
+        (stats["robust_price"] / (stats["effective_quantity"] + EPSILON))
+        * np.sqrt(realm_quality)
+        / 10000000
+    )
+    item_stats = stats.to_dict("index")
+
+    comparisons = []
+    for realm in realms:
         total_value = 0
         total_quantity = 0
         item_details = []
         realm_rating = 0
 
         for item_id in request.items:
-            item = item_map[item_id]
-            item_auctions = base_query.filter(Auction.item_id == item_id).all()
-
-            if item_auctions:
-                # Calculate weighted prices based on quantity
-                # Calculate prices per unit for all auctions
-                prices_per_unit = []
-                quantities = []
-                for auction in item_auctions:
-                    price_per_unit = auction.buyout_price / auction.quantity
-                    prices_per_unit.append(price_per_unit)
-                    quantities.append(auction.quantity)
-
-                # Sort prices for median calculation
-                sorted_prices = sorted(prices_per_unit)
-                n = len(sorted_prices)
-
-                # Calculate median price (robust central tendency)
-                if n % 2 == 0:
-                    median_price = (
-                        sorted_prices[n // 2 - 1] + sorted_prices[n // 2]
-                    ) / 2
-                else:
-                    median_price = sorted_prices[n // 2]
-
-                # Calculate trimmed mean (excluding top and bottom 10%)
-                trim_size = int(n * 0.1)  # 10% trim
-                if n > 10:  # Only apply trimming if we have enough data points
-                    trimmed_prices = sorted_prices[trim_size:-trim_size]
-                    trimmed_mean = sum(trimmed_prices) / len(trimmed_prices)
-                else:
-                    trimmed_mean = median_price  # Fall back to median for small samples
-
-                # Use the more conservative of median and trimmed mean
-                robust_price = min(median_price, trimmed_mean)
-
-                # Calculate effective supply (auctions within ±20% of robust price)
-                price_threshold = robust_price * 0.2  # 20% threshold
-                effective_quantity = sum(
-                    quantity
-                    for price, quantity in zip(prices_per_unit, quantities)
-                    if abs(price - robust_price) <= price_threshold
-                )
-
-                # Fall back to total quantity if effective quantity is too small
-                total_quantity = sum(quantities)
-                if (
-                    effective_quantity < total_quantity * 0.2
-                ):  # If less than 20% of total
-                    effective_quantity = total_quantity
-
-                # Calculate market quality factor using population and logs data
-                # Use geometric mean approach for balanced consideration of both factors
-                # Add 1 to logs to avoid zero in case logs data is missing
-                market_quality = (realm.population or 0) * (
-                    realm.logs + 1 if realm.logs else 1
-                )
-
-                # Calculate item rating using robust price, effective supply, and market quality
-                item_rating = (
-                    (robust_price / (effective_quantity + EPSILON))
-                    * math.sqrt(market_quality)
-                    / 10000000
-                )
-
-                # Calculate stats for item details
-                lowest_price = min(prices_per_unit) if prices_per_unit else 0
-                highest_price = max(prices_per_unit) if prices_per_unit else 0
-                # Calculate average of lowest 5 prices (or all if less than 5)
-                sorted_prices = sorted(prices_per_unit)
-                lowest_five_avg = (
-                    sum(sorted_prices[:5]) / min(5, len(sorted_prices))
-                    if sorted_prices
-                    else 0
-                )
-
-                item_details.append(
-                    ItemPriceDetails(
-                        item_id=item_id,
-                        item_name=item.item_name,
-                        lowest_price=lowest_price,
-                        highest_price=highest_price,
-                        quantity=total_quantity,
-                        average_lowest_five=lowest_five_avg,
-                        rating=item_rating,
-                    )
+            item = item_map.get(item_id)
+            item_stat = item_stats.get((realm.connected_realm_id, item_id))
+            if item is None or item_stat is None:
+                continue
+
+            item_details.append(
+                ItemPriceDetails(
+                    item_id=item_id,
+                    item_name=item.item_name,
+                    lowest_price=item_stat["lowest_price"],
+                    highest_price=item_stat["highest_price"],
+                    quantity=int(item_stat["quantity"]),
+                    average_lowest_five=item_stat["average_lowest_five"],
+                    rating=item_stat["rating"],
                 )
+            )
 
-                total_value += sum(
-                    p * q for p, q in zip(prices_per_unit, [1] * len(prices_per_unit))
-                )
-                total_quantity += effective_quantity
-                realm_rating += item_rating
+            total_value += item_stat["price_sum"]
+            total_quantity += item_stat["effective_quantity"]
+            realm_rating += item_stat["rating"]
 
         value_per_item = total_value / total_quantity if total_quantity > 0 else 0
         avg_realm_rating = realm_rating / len(request.items) if request.items else 0
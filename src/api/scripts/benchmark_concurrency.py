@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""Benchmark API latency while heavy comparison requests run concurrently.
+
+Seeds a throwaway SQLite database with synthetic realms, items and auctions,
+then drives the ASGI app in-process: a few ``/api/v1/comparison`` requests
+are kept in flight while many cheap ``/api/v1/item-classes`` requests are
+timed. Blocking handlers on the event loop show up as a long p99 tail on the
+cheap endpoint.
+
+Usage:
+    uv run python -m src.api.scripts.benchmark_concurrency --realms 10 --items 50
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+import httpx
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Return the pct-th percentile of values using nearest-rank."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def seed_database(url: str, realms: int, items: int, auctions_per_item: int):
+    """Populate a fresh database with synthetic auction data."""
+    from sqlalchemy import create_engine, insert
+
+    from src.database.models import Auction, AuctionSnapshot, Base, ConnectedRealm, Item
+
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    now = datetime.utcnow()
+    rng = random.Random(42)
+
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Item),
+            [
+                {
+                    "item_id": item_id,
+                    "item_name": f"Item {item_id}",
+                    "item_class_id": item_id % 5,
+                    "item_class_name": f"Class {item_id % 5}",
+                    "item_subclass_id": item_id % 3,
+                    "item_subclass_name": f"Subclass {item_id % 3}",
+                }
+                for item_id in range(1, items + 1)
+            ],
+        )
+        conn.execute(
+            insert(ConnectedRealm),
+            [
+                {
+                    "id": realm_id,
+                    "connected_realm_id": realm_id,
+                    "name": f"realm-{realm_id}",
+                    "population": rng.randint(1000, 100000),
+                    "logs": rng.randint(0, 5000),
+                    "last_updated": now,
+                    # Each realm's auctions make up its current snapshot
+                    "current_snapshot_id": realm_id,
+                }
+                for realm_id in range(1, realms + 1)
+            ],
+        )
+        conn.execute(
+            insert(AuctionSnapshot),
+            [
+                {
+                    "id": realm_id,
+                    "connected_realm_id": realm_id,
+                    "started_at": now,
+                    "committed_at": now,
+                    "auction_count": items * auctions_per_item,
+                }
+                for realm_id in range(1, realms + 1)
+            ],
+        )
+        auction_id = 0
+        rows = []
+        for realm_id in range(1, realms + 1):
+            for item_id in range(1, items + 1):
+                for _ in range(auctions_per_item):
+                    auction_id += 1
+                    quantity = rng.randint(1, 20)
+                    rows.append(
+                        {
+                            "auction_id": auction_id,
+                            "connected_realm_id": realm_id,
+                            "item_id": item_id,
+                            "buyout_price": rng.randint(100, 100000) * quantity,
+                            "quantity": quantity,
+                            "time_left": "LONG",
+                            "last_modified": now,
+                            "active": True,
+                            "snapshot_id": realm_id,
+                        }
+                    )
+        conn.execute(insert(Auction), rows)
+    engine.dispose()
+
+
+async def run_benchmark(
+    realms: int, items: int, heavy_requests: int, light_requests: int
+) -> List[float]:
+    """Time cheap requests while heavy comparison requests are in flight."""
+    from src.api.main import app, lifespan
+
+    comparison_body = {
+        "realms": list(range(1, realms + 1)),
+        "items": list(range(1, items + 1)),
+    }
+    latencies = []
+
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as client:
+
+            # Timings of an empty comparison would not measure anything
+            response = await client.post("/api/v1/comparison", json=comparison_body)
+            response.raise_for_status()
+            if not any(realm["items"] for realm in response.json()):
+                raise RuntimeError("Comparison returned no items for the seeded auctions")
+
+            done = asyncio.Event()
+
+            async def heavy():
+                # Keep comparison requests in flight for the whole run
+                while not done.is_set():
+                    response = await client.post("/api/v1/comparison", json=comparison_body)
+                    response.raise_for_status()
+
+            async def light():
+                start = time.perf_counter()
+                response = await client.get("/api/v1/item-classes")
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+            async def light_stream():
+                for _ in range(light_requests):
+                    await light()
+                    await asyncio.sleep(0.005)
+
+            heavy_tasks = [asyncio.create_task(heavy()) for _ in range(heavy_requests)]
+            await light_stream()
+            done.set()
+            await asyncio.gather(*heavy_tasks)
+
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--realms", type=int, default=10)
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--auctions-per-item", type=int, default=100)
+    parser.add_argument("--heavy", type=int, default=2, help="Concurrent comparison requests")
+    parser.add_argument("--light", type=int, default=50, help="Timed item-class requests")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = Path(tmp_dir) / "benchmark.db"
+        url = f"sqlite:///{db_path}"
+        seed_database(url, args.realms, args.items, args.auctions_per_item)
+
+        # Configure the API before it is imported
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{db_path}"
+        latencies = asyncio.run(
+            run_benchmark(args.realms, args.items, args.heavy, args.light)
+        )
+
+    latencies_ms = [latency * 1000 for latency in latencies]
+    print(f"Light requests: {len(latencies_ms)} (with {args.heavy} concurrent comparisons)")
+    print(f"p50: {statistics.median(latencies_ms):.1f} ms")
+    print(f"p99: {percentile(latencies_ms, 99):.1f} ms")
+    print(f"max: {max(latencies_ms):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
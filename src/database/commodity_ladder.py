@@ -0,0 +1,137 @@
+"""
+Commodity price ladders answering "cost to buy N units" queries.
+
+Each commodity row stores the cumulative quantity and cost of buying every
+listing of its item up to and including its price level. The ladder is
+built once per snapshot at ingest, so a query is a binary search for the
+first level whose cumulative quantity covers N, plus the partial cost of
+that level.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .models import Commodity
+
+
+@dataclass
+class CommodityLadder:
+    """Price levels of one item in ascending price order"""
+
+    unit_price: np.ndarray
+    cumulative_quantity: np.ndarray
+    cumulative_cost: np.ndarray
+
+    @property
+    def available(self) -> int:
+        """Total quantity listed"""
+        return int(self.cumulative_quantity[-1]) if len(self.cumulative_quantity) else 0
+
+    def cost(self, quantity: int) -> Optional[int]:
+        """Cost of buying the cheapest quantity units, None if not enough are listed"""
+        if quantity <= 0:
+            return 0
+        level = int(np.searchsorted(self.cumulative_quantity, quantity))
+        if level == len(self.cumulative_quantity):
+            return None
+        return ladder_cost(
+            int(self.unit_price[level]),
+            int(self.cumulative_quantity[level]),
+            int(self.cumulative_cost[level]),
+            quantity,
+        )
+
+    def average_price(self, quantity: int) -> Optional[float]:
+        """Average unit price when buying the cheapest quantity units"""
+        cost = self.cost(quantity)
+        if cost is None or quantity <= 0:
+            return None
+        return cost / quantity
+
+
+def ladder_cost(
+    unit_price: int, cumulative_quantity: int, cumulative_cost: int, quantity: int
+) -> int:
+    """Cost of quantity units given the first ladder level that covers them"""
+    # The level is only partly bought: drop the units beyond quantity
+    return cumulative_cost - (cumulative_quantity - quantity) * unit_price
+
+
+def load_commodity_ladders(
+    session: Session, item_ids: Optional[Iterable[int]] = None
+) -> Dict[int, CommodityLadder]:
+    """Load the price ladders of the current commodity snapshot
+
+    Args:
+        item_ids: Items to load, all commodities when None
+
+    Returns:
+        Dict mapping item ID to its ladder
+    """
+    query = (
+        select(
+            Commodity.item_id,
+            Commodity.unit_price,
+            Commodity.cumulative_quantity,
+            Commodity.cumulative_cost,
+        )
+        .where(Commodity.cumulative_quantity.is_not(None))
+        .order_by(Commodity.item_id, Commodity.unit_price)
+    )
+    if item_ids is not None:
+        query = query.where(Commodity.item_id.in_(list(item_ids)))
+    rows = session.execute(query).all()
+    if not rows:
+        return {}
+
+    item_id, unit_price, cumulative_quantity, cumulative_cost = (
+        np.array(column, dtype=np.int64) for column in zip(*rows)
+    )
+    starts = np.flatnonzero(np.concatenate(([True], item_id[1:] != item_id[:-1])))
+    ends = np.append(starts[1:], len(item_id))
+    return {
+        int(item_id[start]): CommodityLadder(
+            unit_price[start:end],
+            cumulative_quantity[start:end],
+            cumulative_cost[start:end],
+        )
+        for start, end in zip(starts, ends)
+    }
+
+
+def get_commodity_buy_cost(
+    session: Session, item_id: int, quantity: int
+) -> Tuple[Optional[int], int]:
+    """Cost of buying the cheapest quantity units of an item
+
+    The covering level is found with one lookup on the
+    (item_id, cumulative_quantity) index.
+
+    Returns:
+        Tuple of (total cost or None if not enough are listed, quantity listed)
+    """
+    level = session.execute(
+        select(
+            Commodity.unit_price,
+            Commodity.cumulative_quantity,
+            Commodity.cumulative_cost,
+        )
+        .where(
+            Commodity.item_id == item_id,
+            Commodity.cumulative_quantity >= quantity,
+        )
+        .order_by(Commodity.cumulative_quantity)
+        .limit(1)
+    ).first()
+    available = session.execute(
+        select(func.coalesce(func.max(Commodity.cumulative_quantity), 0)).where(
+            Commodity.item_id == item_id
+        )
+    ).scalar_one()
+    if level is None:
+        return None, available
+    return ladder_cost(*level, quantity), available
@@ -2,8 +2,10 @@
 """Database initialization and migration configuration."""
 import logging
 import os
+from typing import Optional
 
 from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlalchemy_utils import create_database, database_exists
 
@@ -12,6 +14,23 @@ from src.database.models import Base
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./items.db")
 SYNC_DATABASE_URL = DATABASE_URL.replace("+aiosqlite", "")
 
+# Connection pool settings for the shared async engine
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))  # seconds
+
+# Connection pool settings for the API's synchronous engine. FastAPI runs
+# sync dependencies in a 40-thread pool per uvicorn worker, so size the pool
+# to let every thread hold a connection without waiting.
+API_DB_POOL_SIZE = int(os.getenv("API_DB_POOL_SIZE", "10"))
+API_DB_MAX_OVERFLOW = int(os.getenv("API_DB_MAX_OVERFLOW", "30"))
+
+# Process-wide async engine, created lazily by get_engine()
+_engine: Optional[AsyncEngine] = None
+
+# Application-scoped sync engine, created by init_sync_engine()
+_sync_engine: Optional[Engine] = None
+
 def _set_sqlite_pragma(dbapi_connection, _):
     """Set SQLite pragma statements for better concurrency."""
     cursor = dbapi_connection.cursor()
@@ -19,27 +38,71 @@ def _set_sqlite_pragma(dbapi_connection, _):
     cursor.execute("PRAGMA busy_timeout=30000")  # Set timeout to 30 seconds
     cursor.close()
 
-def get_sync_engine():
+def get_sync_engine(**engine_kwargs):
     """Create and return synchronous database engine."""
     engine = create_engine(
         SYNC_DATABASE_URL,
         echo=False,  # SQL query logging
         future=True,
         connect_args={"timeout": 30},  # 30 second connection timeout
+        **engine_kwargs,
     )
     
     # Set SQLite pragmas after connection
     event.listen(engine, "connect", _set_sqlite_pragma)
     return engine
 
+def init_sync_engine() -> Engine:
+    """Return the application-scoped sync engine, creating it on first use."""
+    global _sync_engine
+    if _sync_engine is None:
+        _sync_engine = get_sync_engine(
+            pool_size=API_DB_POOL_SIZE,
+            max_overflow=API_DB_MAX_OVERFLOW,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+        logging.debug(
+            f"Created sync engine (pool_size={API_DB_POOL_SIZE}, "
+            f"max_overflow={API_DB_MAX_OVERFLOW})"
+        )
+    return _sync_engine
+
+def dispose_sync_engine():
+    """Dispose the application-scoped sync engine."""
+    global _sync_engine
+    if _sync_engine is not None:
+        _sync_engine.dispose()
+        _sync_engine = None
+        logging.debug("Disposed sync engine")
+
 async def get_engine() -> AsyncEngine:
-    """Create and return async database engine."""
-    return create_async_engine(
-        DATABASE_URL,
-        echo=False,  # SQL query logging
-        future=True,
-        connect_args={"timeout": 30},  # 30 second connection timeout
-    )
+    """Return the shared async database engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        _engine = create_async_engine(
+            DATABASE_URL,
+            echo=False,  # SQL query logging
+            future=True,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_recycle=DB_POOL_RECYCLE,
+            connect_args={"timeout": 30},  # 30 second connection timeout
+        )
+        # Set SQLite pragmas once per pooled connection
+        event.listen(_engine.sync_engine, "connect", _set_sqlite_pragma)
+        logging.debug(
+            f"Created async engine (pool_size={DB_POOL_SIZE}, "
+            f"max_overflow={DB_MAX_OVERFLOW}, pool_recycle={DB_POOL_RECYCLE}s)"
+        )
+    return _engine
+
+async def dispose_engine():
+    """Dispose the shared async engine and close its pooled connections."""
+    global _engine
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+        logging.debug("Disposed async engine")
 
 async def initialize_database():
     """Initialize database with async support."""
@@ -58,7 +121,6 @@ async def initialize_database():
         await conn.execute(text("PRAGMA busy_timeout=30000"))
         logging.info("Database schema created successfully")
 
-    await engine.dispose()
     logging.info("Database initialization complete")
 
 def initialize_sync_database():
@@ -78,4 +140,10 @@ def initialize_sync_database():
 if __name__ == "__main__":
     import asyncio
 
-    asyncio.run(initialize_database())
+    async def _run():
+        try:
+            await initialize_database()
+        finally:
+            await dispose_engine()
+
+    asyncio.run(_run())
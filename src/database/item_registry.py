@@ -0,0 +1,58 @@
+# src/database/item_registry.py
+"""In-process registry of tracked item IDs."""
+import asyncio
+import logging
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Item, TableVersion
+
+logger = logging.getLogger(__name__)
+
+
+class ItemIdRegistry:
+    """Set of item IDs in the items table, loaded once per process.
+
+    Triggers on items bump its row in table_versions whenever an item ID is
+    inserted, deleted or changed, by this or any other process. ids() reads
+    that version and reloads the set when it moved since the last load.
+    Writers in this process call add() once their transaction has
+    committed, so the set is current before the next reload.
+    """
+
+    def __init__(self):
+        self._ids: Optional[set[int]] = None
+        self._version: Optional[int] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._ids is not None
+
+    async def ids(self, session: AsyncSession) -> set[int]:
+        """Return the tracked item IDs, reloading them if items changed.
+
+        The returned set is shared; callers must not modify it.
+        """
+        async with self._lock:
+            version = await session.scalar(
+                select(TableVersion.version).where(TableVersion.table_name == "items")
+            )
+            if self._ids is None or version != self._version:
+                result = await session.execute(select(Item.item_id))
+                self._ids = set(result.scalars().all())
+                self._version = version
+                logger.info(f"Loaded {len(self._ids)} tracked item IDs")
+        return self._ids
+
+    def add(self, item_ids: Iterable[int]):
+        """Record item IDs written by this process once they are committed"""
+        if self._ids is not None:
+            self._ids.update(item_ids)
+
+    def invalidate(self):
+        """Drop the cached IDs so the next ids() call reloads them"""
+        self._ids = None
+        self._version = None
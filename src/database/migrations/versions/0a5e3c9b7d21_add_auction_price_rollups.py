@@ -0,0 +1,53 @@
+"""add_auction_price_rollups
+
+Revision ID: 0a5e3c9b7d21
+Revises: f2b8d6e1a3c4
+Create Date: 2026-10-17 20:12:44.503817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a5e3c9b7d21'
+down_revision: Union[str, None] = 'f2b8d6e1a3c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'auction_price_hourly',
+        sa.Column('connected_realm_id', sa.Integer(), nullable=False),
+        sa.Column('item_id', sa.Integer(), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('min_price', sa.Float(), nullable=False),
+        sa.Column('max_price', sa.Float(), nullable=False),
+        sa.Column('mean_price', sa.Float(), nullable=False),
+        sa.Column('median_price', sa.Float(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('auction_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('connected_realm_id', 'item_id', 'bucket_start')
+    )
+    op.create_table(
+        'auction_price_daily',
+        sa.Column('connected_realm_id', sa.Integer(), nullable=False),
+        sa.Column('item_id', sa.Integer(), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('min_price', sa.Float(), nullable=False),
+        sa.Column('max_price', sa.Float(), nullable=False),
+        sa.Column('mean_price', sa.Float(), nullable=False),
+        sa.Column('median_price', sa.Float(), nullable=False),
+        sa.Column('quantity', sa.Float(), nullable=False),
+        sa.Column('auction_count', sa.Float(), nullable=False),
+        sa.Column('hours', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('connected_realm_id', 'item_id', 'bucket_start')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('auction_price_daily')
+    op.drop_table('auction_price_hourly')
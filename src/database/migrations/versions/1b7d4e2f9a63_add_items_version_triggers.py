@@ -0,0 +1,44 @@
+"""add_items_version_triggers
+
+Revision ID: 1b7d4e2f9a63
+Revises: 0a5e3c9b7d21
+Create Date: 2026-10-18 09:41:17.284519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1b7d4e2f9a63'
+down_revision: Union[str, None] = '0a5e3c9b7d21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'table_versions',
+        sa.Column('table_name', sa.Text(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('table_name')
+    )
+    op.execute("INSERT INTO table_versions (table_name, version) VALUES ('items', 0)")
+    for name, timing in (
+        ("insert", "INSERT"),
+        ("delete", "DELETE"),
+        ("update", "UPDATE OF item_id"),
+    ):
+        op.execute(
+            f"CREATE TRIGGER items_version_{name} AFTER {timing} ON items "
+            "BEGIN UPDATE table_versions SET version = version + 1 "
+            "WHERE table_name = 'items'; END"
+        )
+
+
+def downgrade() -> None:
+    for name in ("insert", "delete", "update"):
+        op.execute(f"DROP TRIGGER IF EXISTS items_version_{name}")
+    op.drop_table('table_versions')
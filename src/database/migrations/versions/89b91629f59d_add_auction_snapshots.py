@@ -0,0 +1,89 @@
+"""add_auction_snapshots
+
+Revision ID: 89b91629f59d
+Revises: 6f922e274c93
+Create Date: 2026-10-17 09:12:40.218114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '89b91629f59d'
+down_revision: Union[str, None] = '6f922e274c93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'auction_snapshots',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('connected_realm_id', sa.Integer(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('committed_at', sa.DateTime(), nullable=True),
+        sa.Column('auction_count', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        op.f('ix_auction_snapshots_connected_realm_id'),
+        'auction_snapshots',
+        ['connected_realm_id'],
+        unique=False
+    )
+
+    with op.batch_alter_table('connected_realms', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('current_snapshot_id', sa.Integer(), nullable=True))
+
+    with op.batch_alter_table('auctions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('snapshot_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('removed_snapshot_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_auctions_snapshot_id'), ['snapshot_id'], unique=False)
+        batch_op.create_index(
+            batch_op.f('ix_auctions_removed_snapshot_id'), ['removed_snapshot_id'], unique=False
+        )
+
+    # Wrap existing auctions in one committed snapshot per realm; inactive rows
+    # are marked as removed in that same snapshot so they stay hidden.
+    op.execute(
+        """
+        INSERT INTO auction_snapshots (connected_realm_id, started_at, committed_at, auction_count)
+        SELECT connected_realm_id, MAX(last_modified), MAX(last_modified), SUM(active)
+        FROM auctions
+        GROUP BY connected_realm_id
+        """
+    )
+    op.execute(
+        """
+        UPDATE auctions SET snapshot_id = (
+            SELECT s.id FROM auction_snapshots s
+            WHERE s.connected_realm_id = auctions.connected_realm_id
+        )
+        """
+    )
+    op.execute("UPDATE auctions SET removed_snapshot_id = snapshot_id WHERE active = 0")
+    op.execute(
+        """
+        UPDATE connected_realms SET current_snapshot_id = (
+            SELECT s.id FROM auction_snapshots s
+            WHERE s.connected_realm_id = connected_realms.connected_realm_id
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('auctions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_auctions_removed_snapshot_id'))
+        batch_op.drop_index(batch_op.f('ix_auctions_snapshot_id'))
+        batch_op.drop_column('removed_snapshot_id')
+        batch_op.drop_column('snapshot_id')
+
+    with op.batch_alter_table('connected_realms', schema=None) as batch_op:
+        batch_op.drop_column('current_snapshot_id')
+
+    op.drop_index(op.f('ix_auction_snapshots_connected_realm_id'), table_name='auction_snapshots')
+    op.drop_table('auction_snapshots')
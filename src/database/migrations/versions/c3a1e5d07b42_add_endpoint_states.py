@@ -0,0 +1,32 @@
+"""add_endpoint_states
+
+Revision ID: c3a1e5d07b42
+Revises: 89b91629f59d
+Create Date: 2026-10-17 11:04:18.530927
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a1e5d07b42'
+down_revision: Union[str, None] = '89b91629f59d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'endpoint_states',
+        sa.Column('endpoint', sa.String(), nullable=False),
+        sa.Column('last_modified', sa.String(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('endpoint')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('endpoint_states')
@@ -0,0 +1,30 @@
+"""add_snapshot_ingest_metrics
+
+Revision ID: d81f4b6c2a90
+Revises: c3a1e5d07b42
+Create Date: 2026-10-17 14:22:51.209114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81f4b6c2a90'
+down_revision: Union[str, None] = 'c3a1e5d07b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('auction_snapshots', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('payload_bytes', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('duration_seconds', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('auction_snapshots', schema=None) as batch_op:
+        batch_op.drop_column('duration_seconds')
+        batch_op.drop_column('payload_bytes')
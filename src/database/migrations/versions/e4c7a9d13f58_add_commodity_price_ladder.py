@@ -0,0 +1,32 @@
+"""add_commodity_price_ladder
+
+Revision ID: e4c7a9d13f58
+Revises: d81f4b6c2a90
+Create Date: 2026-10-17 16:40:12.774301
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4c7a9d13f58'
+down_revision: Union[str, None] = 'd81f4b6c2a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('commodities', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('cumulative_quantity', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('cumulative_cost', sa.Integer(), nullable=True))
+        batch_op.create_index('idx_commodity_ladder', ['item_id', 'cumulative_quantity'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('commodities', schema=None) as batch_op:
+        batch_op.drop_index('idx_commodity_ladder')
+        batch_op.drop_column('cumulative_cost')
+        batch_op.drop_column('cumulative_quantity')
@@ -0,0 +1,47 @@
+"""add_commodity_price_history
+
+Revision ID: f2b8d6e1a3c4
+Revises: e4c7a9d13f58
+Create Date: 2026-10-17 18:05:37.118462
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b8d6e1a3c4'
+down_revision: Union[str, None] = 'e4c7a9d13f58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'commodity_price_history',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('item_id', sa.Integer(), nullable=False),
+        sa.Column('snapshot_time', sa.DateTime(), nullable=False),
+        sa.Column('min_price', sa.Integer(), nullable=False),
+        sa.Column('p10_price', sa.Integer(), nullable=False),
+        sa.Column('p25_price', sa.Integer(), nullable=False),
+        sa.Column('median_price', sa.Integer(), nullable=False),
+        sa.Column('total_quantity', sa.Integer(), nullable=False),
+        sa.Column('cost_10', sa.Integer(), nullable=True),
+        sa.Column('cost_100', sa.Integer(), nullable=True),
+        sa.Column('cost_1000', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'idx_commodity_history_item_time',
+        'commodity_price_history',
+        ['item_id', 'snapshot_time'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_commodity_history_item_time', table_name='commodity_price_history')
+    op.drop_table('commodity_price_history')
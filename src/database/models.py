@@ -5,15 +5,18 @@ SQLAlchemy models for database entities.
 from datetime import datetime
 
 from sqlalchemy import (
+    DDL,
     Boolean,
     Column,
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
     UniqueConstraint,
+    event,
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -67,9 +70,26 @@ class ConnectedRealm(Base):
     realm_category = Column(String)
     status = Column(String)
     last_updated = Column(DateTime, default=datetime.utcnow)
+    current_snapshot_id = Column(Integer, nullable=True)  # Latest committed auction snapshot
 
     auctions = relationship('Auction', back_populates='connected_realm')
 
+class AuctionSnapshot(Base):
+    """Model representing one auction house fetch for a connected realm.
+
+    Auctions are visible for a realm when they were first seen in a snapshot at
+    or before the realm's ``current_snapshot_id`` and not removed by then.
+    """
+    __tablename__ = 'auction_snapshots'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    connected_realm_id = Column(Integer, nullable=False, index=True)
+    started_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    committed_at = Column(DateTime, nullable=True)  # Set when the snapshot becomes current
+    auction_count = Column(Integer, nullable=True)
+    payload_bytes = Column(Integer, nullable=True)  # Size of the downloaded payload
+    duration_seconds = Column(Float, nullable=True)  # Download and parse time
+
 class Auction(Base):
     """Model representing an auction from the WoW API."""
     __tablename__ = 'auctions'
@@ -86,6 +106,8 @@ class Auction(Base):
     time_left = Column(String)
     last_modified = Column(DateTime, nullable=False)
     active = Column(Boolean, default=True, nullable=False, index=True)
+    snapshot_id = Column(Integer, nullable=True, index=True)  # Snapshot first seen in
+    removed_snapshot_id = Column(Integer, nullable=True, index=True)  # Snapshot it vanished in
 
     connected_realm = relationship('ConnectedRealm', back_populates='auctions')
     item = relationship('Item', backref='auctions')
@@ -99,9 +121,115 @@ class Commodity(Base):
     quantity = Column(Integer, nullable=False)
     unit_price = Column(Integer, nullable=False)
     last_modified = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Price ladder: quantity and cost of buying every listing of the item
+    # up to and including this price level
+    cumulative_quantity = Column(Integer, nullable=True)
+    cumulative_cost = Column(Integer, nullable=True)
 
     __table_args__ = (
         UniqueConstraint('item_id', 'unit_price', name='idx_item_unit_price'),
+        Index('idx_commodity_ladder', 'item_id', 'cumulative_quantity'),
     )
 
     item = relationship('Item', backref='commodities')
+
+class EndpointState(Base):
+    """Model tracking the Last-Modified value of the last ingested API payload."""
+    __tablename__ = 'endpoint_states'
+
+    endpoint = Column(String, primary_key=True)  # e.g. "auctions/1305" or "commodities"
+    last_modified = Column(String, nullable=False)  # Raw Last-Modified header value
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class CommodityPriceHistory(Base):
+    """Model holding one per-item price summary for each commodity snapshot.
+
+    Rows are only appended. Prices are quantity-weighted over the listings,
+    and cost_N is the cost of buying the cheapest N units, or NULL when fewer
+    were listed.
+    """
+    __tablename__ = 'commodity_price_history'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    item_id = Column(Integer, nullable=False)
+    snapshot_time = Column(DateTime, nullable=False)
+    min_price = Column(Integer, nullable=False)
+    p10_price = Column(Integer, nullable=False)
+    p25_price = Column(Integer, nullable=False)
+    median_price = Column(Integer, nullable=False)
+    total_quantity = Column(Integer, nullable=False)
+    cost_10 = Column(Integer, nullable=True)
+    cost_100 = Column(Integer, nullable=True)
+    cost_1000 = Column(Integer, nullable=True)
+
+    __table_args__ = (
+        Index('idx_commodity_history_item_time', 'item_id', 'snapshot_time', unique=True),
+    )
+
+class AuctionPriceHourly(Base):
+    """Model holding per-(realm, item, hour) auction price aggregates.
+
+    Maintained at ingest from each realm snapshot; a later snapshot in the
+    same hour replaces the row. Prices are per unit, buyout / quantity.
+    """
+    __tablename__ = 'auction_price_hourly'
+
+    connected_realm_id = Column(Integer, primary_key=True)  # Blizzard connected realm ID
+    item_id = Column(Integer, primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    min_price = Column(Float, nullable=False)
+    max_price = Column(Float, nullable=False)
+    mean_price = Column(Float, nullable=False)
+    median_price = Column(Float, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    auction_count = Column(Integer, nullable=False)
+
+class AuctionPriceDaily(Base):
+    """Model holding per-(realm, item, day) aggregates derived from hourly rows.
+
+    mean_price is weighted by auction count, median_price is the mean of the
+    hourly medians, and quantity and auction_count are hourly averages.
+    """
+    __tablename__ = 'auction_price_daily'
+
+    connected_realm_id = Column(Integer, primary_key=True)  # Blizzard connected realm ID
+    item_id = Column(Integer, primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    min_price = Column(Float, nullable=False)
+    max_price = Column(Float, nullable=False)
+    mean_price = Column(Float, nullable=False)
+    median_price = Column(Float, nullable=False)
+    quantity = Column(Float, nullable=False)
+    auction_count = Column(Float, nullable=False)
+    hours = Column(Integer, nullable=False)  # Hourly rows the day was derived from
+
+class TableVersion(Base):
+    """Model holding a change counter per table.
+
+    The counter of ``items`` is bumped by triggers whenever an item ID is
+    inserted, deleted or changed, by any process, so long-running readers
+    can tell their cached copy is stale with a one-row lookup.
+    """
+    __tablename__ = 'table_versions'
+
+    table_name = Column(Text, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+# Statements creating the items version row and the triggers maintaining it
+ITEMS_VERSION_DDL = (
+    "INSERT OR IGNORE INTO table_versions (table_name, version) VALUES ('items', 0)",
+) + tuple(
+    f"CREATE TRIGGER IF NOT EXISTS items_version_{name} AFTER {timing} ON items "
+    "BEGIN UPDATE table_versions SET version = version + 1 "
+    "WHERE table_name = 'items'; END"
+    for name, timing in (
+        ("insert", "INSERT"),
+        ("delete", "DELETE"),
+        ("update", "UPDATE OF item_id"),
+    )
+)
+
+# create_all builds the triggers along with table_versions, after items
+TableVersion.__table__.add_is_dependent_on(Item.__table__)
+for statement in ITEMS_VERSION_DDL:
+    event.listen(TableVersion.__table__, "after_create", DDL(statement))
@@ -2,37 +2,167 @@
 Database operations for managing item data.
 """
 
-import asyncio
 import logging
-import time
 from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Any, AsyncIterator, Dict, List, Optional
-
-from sqlalchemy import delete, exists, select
+from itertools import islice
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import (
+    MetaData,
+    Table,
+    and_,
+    delete,
+    exists,
+    false,
+    func,
+    or_,
+    select,
+    update,
+)
 from sqlalchemy.dialects.sqlite import insert as sqlite_upsert
-from sqlalchemy.exc import IntegrityError, OperationalError, SQLAlchemyError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateIndex, CreateTable, DropTable
 from sqlalchemy.sql.expression import bindparam
 
-from .init_db import get_engine, get_sync_engine
-from .models import Auction, Commodity, ConnectedRealm, Group, Item, ItemGroup
+from .init_db import dispose_sync_engine, get_engine, init_sync_engine
+from .models import (
+    Auction,
+    AuctionSnapshot,
+    Commodity,
+    ConnectedRealm,
+    EndpointState,
+    Group,
+    Item,
+    ItemGroup,
+)
 
 # Batch size for auction processing
 AUCTION_BATCH_SIZE = 2000
+REMOVAL_BATCH_SIZE = 500  # Stay below SQLite's bound parameter limit
 COMMODITY_BATCH_SIZE = 1000
-MAX_RETRIES = 3
-RETRY_DELAY = 1  # seconds
+
+# SQLAlchemy's storage format for DateTime columns on SQLite
+SQLITE_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+# Parameter order of the rows passed to write_auction_rows
+AUCTION_ROW_COLUMNS = (
+    "auction_id",
+    "connected_realm_id",
+    "item_id",
+    "buyout_price",
+    "quantity",
+    "time_left",
+    "last_modified",
+    "active",
+    "snapshot_id",
+)
+# Keeps the snapshot an auction was first seen in
+AUCTION_UPSERT_SQL = (
+    f"INSERT INTO auctions ({', '.join(AUCTION_ROW_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in AUCTION_ROW_COLUMNS)}) "
+    "ON CONFLICT (auction_id, connected_realm_id) DO UPDATE SET "
+    "item_id = excluded.item_id, "
+    "buyout_price = excluded.buyout_price, "
+    "quantity = excluded.quantity, "
+    "time_left = excluded.time_left, "
+    "last_modified = excluded.last_modified, "
+    "active = excluded.active, "
+    "removed_snapshot_id = NULL"
+)
+
+# Parameter order of the rows passed to write_commodity_rows
+COMMODITY_ROW_COLUMNS = (
+    "item_id",
+    "quantity",
+    "unit_price",
+    "last_modified",
+    "cumulative_quantity",
+    "cumulative_cost",
+)
+# Formatted with the target table, the live one or COMMODITY_STAGING_TABLE
+COMMODITY_INSERT_SQL = (
+    f"INSERT INTO {{table}} ({', '.join(COMMODITY_ROW_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in COMMODITY_ROW_COLUMNS)})"
+)
+# Units whose cost is recorded in each commodity price summary
+COMMODITY_HISTORY_DEPTHS = (10, 100, 1000)
+# Parameter order of the rows passed to write_commodity_history
+COMMODITY_HISTORY_COLUMNS = (
+    "item_id",
+    "snapshot_time",
+    "min_price",
+    "p10_price",
+    "p25_price",
+    "median_price",
+    "total_quantity",
+) + tuple(f"cost_{depth}" for depth in COMMODITY_HISTORY_DEPTHS)
+# A snapshot that is ingested twice keeps its first summary
+COMMODITY_HISTORY_INSERT_SQL = (
+    f"INSERT INTO commodity_price_history ({', '.join(COMMODITY_HISTORY_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in COMMODITY_HISTORY_COLUMNS)}) "
+    "ON CONFLICT (item_id, snapshot_time) DO NOTHING"
+)
+# New commodity snapshots are loaded here and renamed over the live table
+COMMODITY_STAGING_TABLE = "commodities_staging"
+
+# Parameter order of the rows passed to write_price_rollups
+PRICE_ROLLUP_COLUMNS = (
+    "connected_realm_id",
+    "item_id",
+    "bucket_start",
+    "min_price",
+    "max_price",
+    "mean_price",
+    "median_price",
+    "quantity",
+    "auction_count",
+)
+PRICE_HOURLY_INSERT_SQL = (
+    f"INSERT INTO auction_price_hourly ({', '.join(PRICE_ROLLUP_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in PRICE_ROLLUP_COLUMNS)})"
+)
+# Derives a realm's daily rows for one day from its hourly rows; the
+# parameters are the day start, the realm and the day's bounds
+PRICE_DAILY_DERIVE_SQL = (
+    "INSERT INTO auction_price_daily "
+    f"({', '.join(PRICE_ROLLUP_COLUMNS)}, hours) "
+    "SELECT connected_realm_id, item_id, ?, MIN(min_price), MAX(max_price), "
+    "SUM(mean_price * auction_count) / SUM(auction_count), AVG(median_price), "
+    "AVG(quantity), AVG(auction_count), COUNT(*) "
+    "FROM auction_price_hourly "
+    "WHERE connected_realm_id = ? AND bucket_start >= ? AND bucket_start < ? "
+    "GROUP BY connected_realm_id, item_id"
+)
 
 logger = logging.getLogger(__name__)
 
+# Application-scoped session factory for the REST API
+_SessionLocal: Optional[sessionmaker] = None
+
+
+def init_session_factory() -> sessionmaker:
+    """Create the API session factory bound to the shared sync engine."""
+    global _SessionLocal
+    if _SessionLocal is None:
+        _SessionLocal = sessionmaker(
+            autocommit=False, autoflush=False, bind=init_sync_engine()
+        )
+    return _SessionLocal
+
+
+def close_session_factory():
+    """Drop the API session factory and dispose its engine."""
+    global _SessionLocal
+    _SessionLocal = None
+    dispose_sync_engine()
+
 
 def get_db():
     """Synchronous database session for FastAPI dependency injection"""
-    engine = get_sync_engine()
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    db = SessionLocal()
+    db = init_session_factory()()
     try:
         yield db
     finally:
@@ -141,7 +271,7 @@ async def add_item_to_group(
 
 
 async def upsert_items(session: AsyncSession, items: List[dict]):
-    """Batch upsert items"""
+    """Batch upsert items without committing"""
     stmt = (
         sqlite_upsert(Item)
         .values(items)
@@ -161,6 +291,24 @@ async def upsert_items(session: AsyncSession, items: List[dict]):
     await session.execute(stmt, items)
 
 
+async def update_item_metadata(session: AsyncSession, items: List[dict]):
+    """Refresh name and class fields of existing items, keeping the rest"""
+    if not items:
+        return
+    stmt = (
+        update(Item.__table__)
+        .where(Item.__table__.c.item_id == bindparam("b_item_id"))
+        .values(
+            item_name=bindparam("item_name"),
+            item_class_id=bindparam("item_class_id"),
+            item_class_name=bindparam("item_class_name"),
+            item_subclass_id=bindparam("item_subclass_id"),
+            item_subclass_name=bindparam("item_subclass_name"),
+        )
+    )
+    await session.execute(stmt, [dict(item, b_item_id=item["item_id"]) for item in items])
+
+
 async def item_exists(session: AsyncSession, item_id: int) -> bool:
     """Check if an item exists in the database"""
     result = await session.execute(select(exists().where(Item.item_id == item_id)))
@@ -222,6 +370,26 @@ async def upsert_connected_realm(
         raise
 
 
+async def write_connected_realms(
+    session: AsyncSession, realms: List[Dict[str, Any]]
+) -> None:
+    """Create or update connected realms in one statement without committing."""
+    if not realms:
+        return
+    stmt = sqlite_upsert(ConnectedRealm)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ConnectedRealm.connected_realm_id],
+        set_={
+            "name": stmt.excluded.name,
+            "population_type": stmt.excluded.population_type,
+            "realm_category": stmt.excluded.realm_category,
+            "status": stmt.excluded.status,
+            "last_updated": stmt.excluded.last_updated,
+        },
+    )
+    await session.execute(stmt, realms)
+
+
 async def get_connected_realms(
     session: AsyncSession, page: int = 1, page_size: int = 100
 ) -> List[ConnectedRealm]:
@@ -241,6 +409,58 @@ async def get_all_item_ids(session: AsyncSession) -> set[int]:
     return set(row[0] for row in result.all())
 
 
+async def get_all_connected_realm_ids(session: AsyncSession) -> set[int]:
+    """Get all Blizzard connected realm IDs from the database."""
+    result = await session.execute(select(ConnectedRealm.connected_realm_id))
+    return set(row[0] for row in result.all())
+
+
+async def get_connected_realm_update_times(
+    session: AsyncSession,
+) -> Dict[int, Optional[datetime]]:
+    """Get last_updated of every stored connected realm by Blizzard ID."""
+    result = await session.execute(
+        select(ConnectedRealm.connected_realm_id, ConnectedRealm.last_updated)
+    )
+    return {realm_id: last_updated for realm_id, last_updated in result.all()}
+
+
+async def get_connected_realm_populations(
+    session: AsyncSession,
+) -> Dict[int, Optional[str]]:
+    """Get population_type of every stored connected realm by Blizzard ID."""
+    result = await session.execute(
+        select(ConnectedRealm.connected_realm_id, ConnectedRealm.population_type)
+    )
+    return {realm_id: population_type for realm_id, population_type in result.all()}
+
+
+async def get_realm_ingest_history(
+    session: AsyncSession,
+) -> Dict[int, Tuple[int, Optional[float]]]:
+    """Get (payload_bytes, duration_seconds) of each realm's latest measured snapshot."""
+    latest = (
+        select(func.max(AuctionSnapshot.id).label("id"))
+        .where(
+            AuctionSnapshot.committed_at.is_not(None),
+            AuctionSnapshot.payload_bytes.is_not(None),
+        )
+        .group_by(AuctionSnapshot.connected_realm_id)
+        .subquery()
+    )
+    result = await session.execute(
+        select(
+            AuctionSnapshot.connected_realm_id,
+            AuctionSnapshot.payload_bytes,
+            AuctionSnapshot.duration_seconds,
+        ).join(latest, AuctionSnapshot.id == latest.c.id)
+    )
+    return {
+        realm_id: (payload_bytes, duration_seconds)
+        for realm_id, payload_bytes, duration_seconds in result.all()
+    }
+
+
 async def connected_realm_exists(
     session: AsyncSession, connected_realm_id: int
 ) -> bool:
@@ -266,68 +486,103 @@ async def auction_exists(
     return result.scalar()
 
 
-async def process_auction_batch(batch: List[dict]):
-    """Process a batch of auctions."""
-    if not batch:
-        return
+def current_auctions_clause():
+    """SQL condition matching auctions in their realm's current snapshot.
 
-    async with get_session() as session:
-        try:
-            stmt = (
-                sqlite_upsert(Auction)
-                .values(batch)
-                .on_conflict_do_update(
-                    index_elements=[Auction.auction_id, Auction.connected_realm_id],
-                    set_=dict(
-                        item_id=Auction.item_id,
-                        buyout_price=Auction.buyout_price,
-                        quantity=Auction.quantity,
-                        time_left=Auction.time_left,
-                        last_modified=Auction.last_modified,
-                        active=Auction.active,
-                    ),
-                )
-            )
-            await session.execute(stmt)
-            await session.commit()
-        except SQLAlchemyError as e:
-            logger.error(f"Failed to upsert auction batch: {str(e)}")
-            await session.rollback()
-            raise
+    An auction is current when it was first seen in a snapshot at or before the
+    realm's committed ``current_snapshot_id`` and had not been removed by then.
+    Rows written for a snapshot that is still being ingested stay invisible
+    until the pointer moves.
+    """
+    current_snapshot = (
+        select(ConnectedRealm.current_snapshot_id)
+        .where(ConnectedRealm.connected_realm_id == Auction.connected_realm_id)
+        .scalar_subquery()
+    )
+    return and_(
+        Auction.snapshot_id <= current_snapshot,
+        or_(
+            Auction.removed_snapshot_id.is_(None),
+            Auction.removed_snapshot_id > current_snapshot,
+        ),
+    )
 
 
-async def upsert_auctions(auctions: List[dict]):
-    """Batch upsert auctions with optimized parallel processing."""
-    if not auctions:
-        return
+async def add_auction_snapshot(session: AsyncSession, connected_realm_id: int) -> int:
+    """Add a new auction snapshot for a realm without committing."""
+    snapshot = AuctionSnapshot(connected_realm_id=connected_realm_id)
+    session.add(snapshot)
+    await session.flush()
+    return snapshot.id
 
-    # Ensure all auctions have active flag set
-    for auction in auctions:
-        if "active" not in auction:
-            auction["active"] = True
 
-    # Process auctions in batches
-    batches = [
-        auctions[i:i + AUCTION_BATCH_SIZE]
-        for i in range(0, len(auctions), AUCTION_BATCH_SIZE)
-    ]
-    logger.info(f"Processing {len(auctions)} auctions in {len(batches)} batches")
-    processing_start = time.perf_counter()
+async def get_current_auction_state(
+    session: AsyncSession, connected_realm_id: int
+) -> Dict[int, Tuple[int, int]]:
+    """Get (buyout_price, quantity) of the realm's current auctions by auction ID."""
+    result = await session.execute(
+        select(Auction.auction_id, Auction.buyout_price, Auction.quantity).where(
+            Auction.connected_realm_id == connected_realm_id,
+            current_auctions_clause(),
+        )
+    )
+    return {
+        auction_id: (buyout_price, quantity)
+        for auction_id, buyout_price, quantity in result.all()
+    }
 
-    try:
-        # Process batches in parallel with controlled concurrency
-        tasks = [process_auction_batch(batch) for batch in batches]
-        await asyncio.gather(*tasks)
-    except Exception as e:
-        logger.error(f"Failed to process auction batches: {str(e)}")
-        raise
 
-    # Calculate and log processing metrics
-    processing_time = time.perf_counter() - processing_start
-    logger.info(
-        f"Processed {len(auctions)} auctions in {processing_time:.2f} seconds "
-        f"({len(auctions) / processing_time:.2f} auctions/second)"
+async def apply_auction_snapshot(
+    session: AsyncSession,
+    connected_realm_id: int,
+    snapshot_id: int,
+    removed_auction_ids: set[int],
+    auction_count: int,
+    payload_bytes: Optional[int] = None,
+    duration_seconds: Optional[float] = None,
+):
+    """Mark vanished auctions and make the snapshot current without committing.
+
+    payload_bytes and duration_seconds are kept on the snapshot so later runs
+    can schedule the slowest realms first.
+    """
+    removed_ids = list(removed_auction_ids)
+    for i in range(0, len(removed_ids), REMOVAL_BATCH_SIZE):
+        await session.execute(
+            update(Auction)
+            .where(
+                Auction.connected_realm_id == connected_realm_id,
+                Auction.auction_id.in_(removed_ids[i:i + REMOVAL_BATCH_SIZE]),
+            )
+            .values(removed_snapshot_id=snapshot_id, active=False)
+        )
+    await session.execute(
+        update(AuctionSnapshot)
+        .where(AuctionSnapshot.id == snapshot_id)
+        .values(
+            committed_at=datetime.utcnow(),
+            auction_count=auction_count,
+            payload_bytes=payload_bytes,
+            duration_seconds=duration_seconds,
+        )
     )
+    await session.execute(
+        update(ConnectedRealm)
+        .where(ConnectedRealm.connected_realm_id == connected_realm_id)
+        .values(current_snapshot_id=snapshot_id)
+    )
+
+
+async def write_auction_rows(session: AsyncSession, rows: Iterable[Sequence]):
+    """Upsert auction parameter rows in executemany batches without committing.
+
+    Args:
+        rows: Tuples in AUCTION_ROW_COLUMNS order; may be a lazy iterator
+    """
+    connection = await session.connection()
+    rows = iter(rows)
+    while batch := list(islice(rows, AUCTION_BATCH_SIZE)):
+        await connection.exec_driver_sql(AUCTION_UPSERT_SQL, batch)
 
 
 async def get_auctions(
@@ -339,7 +594,8 @@ async def get_auctions(
 ) -> List[Auction]:
     """Get auctions with optional filtering and pagination."""
     try:
-        query = select(Auction).where(Auction.active)  # Only get active auctions
+        # Only get auctions in the realm's current snapshot
+        query = select(Auction).where(current_auctions_clause())
 
         if connected_realm_id is not None:
             query = query.where(Auction.connected_realm_id == connected_realm_id)
@@ -371,6 +627,18 @@ async def delete_old_auctions(days: int = 7) -> int:
             stmt = delete(Auction).where(Auction.last_modified < cutoff_date)
             result = await session.execute(stmt)
             deleted_count = result.rowcount
+
+            # Drop old snapshot records, keeping each realm's current one
+            await session.execute(
+                delete(AuctionSnapshot).where(
+                    AuctionSnapshot.started_at < cutoff_date,
+                    AuctionSnapshot.id.not_in(
+                        select(ConnectedRealm.current_snapshot_id).where(
+                            ConnectedRealm.current_snapshot_id.is_not(None)
+                        )
+                    ),
+                )
+            )
             await session.commit()
 
             logger.info(f"Successfully deleted {deleted_count} old auctions")
@@ -381,96 +649,137 @@ async def delete_old_auctions(days: int = 7) -> int:
         raise
 
 
-async def process_commodity_batch(batch: List[dict]):
-    """Process a batch of commodities with quantity merging for same item_id and unit_price."""
-    if not batch:
-        return
+async def write_commodity_rows(
+    session: AsyncSession,
+    rows: Iterable[Sequence],
+    table: str = Commodity.__tablename__,
+):
+    """Insert commodity parameter rows in executemany batches without committing.
 
-    # Group commodities by item_id and unit_price, summing quantities
-    merged_commodities = {}
-    for commodity in batch:
-        key = (commodity["item_id"], commodity["unit_price"])
-        if key in merged_commodities:
-            merged_commodities[key]["quantity"] += commodity["quantity"]
-        else:
-            merged_commodities[key] = commodity
-
-    retries = 0
-    while retries < MAX_RETRIES:
-        try:
-            async with get_session() as session:
-                stmt = (
-                    sqlite_upsert(Commodity)
-                    .values(list(merged_commodities.values()))
-                    .on_conflict_do_update(
-                        index_elements=[Commodity.item_id, Commodity.unit_price],
-                        set_=dict(
-                            quantity=Commodity.quantity,
-                            last_modified=Commodity.last_modified,
-                        ),
-                    )
-                )
-                await session.execute(stmt)
-                await session.commit()
-                break  # Success, exit retry loop
-        except OperationalError as e:
-            if "database is locked" in str(e) and retries < MAX_RETRIES - 1:
-                retries += 1
-                logger.warning(
-                    f"Database locked, retrying in {RETRY_DELAY} seconds (attempt {retries}/{MAX_RETRIES})"
-                )
-                await asyncio.sleep(RETRY_DELAY)
-            else:
-                logger.error(f"Failed to upsert commodity batch after {MAX_RETRIES} attempts: {str(e)}")
-                raise
-        except SQLAlchemyError as e:
-            logger.error(f"Failed to upsert commodity batch: {str(e)}")
-            raise
+    Rows must be aggregated to one per (item_id, unit_price) so their price
+    ladder totals are consistent.
+
+    Args:
+        rows: Tuples in COMMODITY_ROW_COLUMNS order; may be a lazy iterator
+        table: Table to write to
+    """
+    connection = await session.connection()
+    sql = COMMODITY_INSERT_SQL.format(table=table)
+    rows = iter(rows)
+    while batch := list(islice(rows, COMMODITY_BATCH_SIZE)):
+        await connection.exec_driver_sql(sql, batch)
 
 
-async def upsert_commodities(commodities: List[dict]):
-    """Batch upsert commodities with quantity merging."""
-    if not commodities:
-        return
+def _commodity_staging_table() -> Table:
+    """Copy of the commodities table definition named COMMODITY_STAGING_TABLE"""
+    # Kept off Base.metadata so create_all and migrations never see it;
+    # items is copied alongside so the foreign key resolves
+    metadata = MetaData()
+    Item.__table__.to_metadata(metadata)
+    return Commodity.__table__.to_metadata(metadata, name=COMMODITY_STAGING_TABLE)
 
-    # Process commodities in batches
-    batches = [
-        commodities[i:i + COMMODITY_BATCH_SIZE]
-        for i in range(0, len(commodities), COMMODITY_BATCH_SIZE)
-    ]
-    logger.info(f"Processing {len(commodities)} commodities in {len(batches)} batches")
-    processing_start = time.perf_counter()
 
-    try:
-        tasks = [process_commodity_batch(batch) for batch in batches]
-        await asyncio.gather(*tasks)
-    except Exception as e:
-        logger.error(f"Failed to process commodity batches: {str(e)}")
-        raise
+async def replace_commodities(session: AsyncSession, rows: Iterable[Sequence]):
+    """Swap in a new commodity snapshot without committing.
+
+    The snapshot is loaded into COMMODITY_STAGING_TABLE, then the live table
+    is dropped and the staging table renamed over it and indexed. SQLite DDL
+    is transactional, so readers keep seeing the complete previous snapshot
+    until the swap commits, and no full-table DELETE is needed.
+
+    Args:
+        rows: Tuples in COMMODITY_ROW_COLUMNS order
+    """
+    staging = _commodity_staging_table()
+    connection = await session.connection()
+    # pysqlite only opens a transaction before DML, so issue a no-op write
+    # first to keep the DDL below inside it
+    await connection.execute(delete(Commodity).where(false()))
+    await connection.execute(DropTable(staging, if_exists=True))
+    await connection.execute(CreateTable(staging))
+    await write_commodity_rows(session, rows, table=COMMODITY_STAGING_TABLE)
+    await connection.execute(DropTable(Commodity.__table__))
+    await connection.exec_driver_sql(
+        f"ALTER TABLE {COMMODITY_STAGING_TABLE} RENAME TO {Commodity.__tablename__}"
+    )
+    # Indexes are built once the rows are in, under their usual names
+    for index in Commodity.__table__.indexes:
+        await connection.execute(CreateIndex(index))
+
+
+async def write_commodity_history(session: AsyncSession, rows: Iterable[Sequence]):
+    """Append per-item commodity price summaries without committing.
+
+    Args:
+        rows: Tuples in COMMODITY_HISTORY_COLUMNS order
+    """
+    connection = await session.connection()
+    rows = iter(rows)
+    while batch := list(islice(rows, COMMODITY_BATCH_SIZE)):
+        await connection.exec_driver_sql(COMMODITY_HISTORY_INSERT_SQL, batch)
+
 
-    processing_time = time.perf_counter() - processing_start
-    logger.info(
-        f"Processed {len(commodities)} commodities in {processing_time:.2f} seconds "
-        f"({len(commodities) / processing_time:.2f} commodities/second)"
+async def get_endpoint_states(session: AsyncSession) -> Dict[str, str]:
+    """Get the Last-Modified value of every ingested endpoint."""
+    result = await session.execute(
+        select(EndpointState.endpoint, EndpointState.last_modified)
     )
+    return {endpoint: last_modified for endpoint, last_modified in result.all()}
 
 
-async def delete_all_commodities() -> int:
-    """Delete all commodities from the database.
+def price_rollup_hour(timestamp: datetime) -> datetime:
+    """Start of the hourly rollup bucket containing timestamp."""
+    return timestamp.replace(minute=0, second=0, microsecond=0)
 
-    Returns:
-        int: Number of commodities deleted
+
+async def write_price_rollups(
+    session: AsyncSession,
+    connected_realm_id: int,
+    bucket_start: datetime,
+    rows: Sequence[Sequence],
+):
+    """Replace a realm's hourly price rollups for one hour without committing.
+
+    The realm's daily rollups for that day are then re-derived from its
+    hourly rows, so both stay current as each snapshot is ingested.
+
+    Args:
+        bucket_start: Start of the hour, as returned by price_rollup_hour
+        rows: Tuples in PRICE_ROLLUP_COLUMNS order for that realm and hour
     """
-    try:
-        async with get_session() as session:
-            stmt = delete(Commodity)
-            result = await session.execute(stmt)
-            deleted_count = result.rowcount
-            await session.commit()
+    hour = bucket_start.strftime(SQLITE_DATETIME_FORMAT)
+    day_start = bucket_start.replace(hour=0)
+    day = day_start.strftime(SQLITE_DATETIME_FORMAT)
+    next_day = (day_start + timedelta(days=1)).strftime(SQLITE_DATETIME_FORMAT)
+
+    connection = await session.connection()
+    # A later snapshot in the same hour supersedes the earlier one
+    await connection.exec_driver_sql(
+        "DELETE FROM auction_price_hourly WHERE connected_realm_id = ? AND bucket_start = ?",
+        (connected_realm_id, hour),
+    )
+    if rows:
+        await connection.exec_driver_sql(PRICE_HOURLY_INSERT_SQL, list(rows))
+    await connection.exec_driver_sql(
+        "DELETE FROM auction_price_daily WHERE connected_realm_id = ? AND bucket_start = ?",
+        (connected_realm_id, day),
+    )
+    await connection.exec_driver_sql(
+        PRICE_DAILY_DERIVE_SQL, (day, connected_realm_id, day, next_day)
+    )
 
-            logger.info(f"Successfully deleted {deleted_count} commodities")
-            return deleted_count
 
-    except SQLAlchemyError as e:
-        logger.error(f"Failed to delete commodities: {str(e)}")
-        raise
+async def write_endpoint_state(session: AsyncSession, endpoint: str, last_modified: str):
+    """Record the Last-Modified value of an endpoint without committing."""
+    values = {
+        "endpoint": endpoint,
+        "last_modified": last_modified,
+        "updated_at": datetime.utcnow(),
+    }
+    stmt = (
+        sqlite_upsert(EndpointState)
+        .values(values)
+        .on_conflict_do_update(index_elements=[EndpointState.endpoint], set_=values)
+    )
+    await session.execute(stmt)
+
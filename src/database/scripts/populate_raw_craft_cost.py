@@ -6,8 +6,9 @@ from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Set
 from sqlalchemy.orm import Session, sessionmaker
 
+from src.database.commodity_ladder import CommodityLadder, load_commodity_ladders
 from src.database.init_db import get_sync_engine
-from src.database.models import Item, Commodity
+from src.database.models import Item
 
 # Configure logging
 logging.basicConfig(
@@ -16,6 +17,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Units of each reagent priced when computing craft costs
+CRAFT_QUANTITY = 50
+
 def fix_reagent_name(name: str) -> str:
     """
     Fix specific reagent names that need to be adjusted.
@@ -176,59 +180,29 @@ def load_modified_reagent_slots(csv_path: str) -> Dict[int, str]:
         logger.error(f"Error parsing ModifiedCraftingReagentSlot CSV file: {e}")
         raise
 
-def get_lowest_commodity_price_for_50(session: Session, item_ids: Set[int]) -> Optional[float]:
+def get_lowest_commodity_price(
+    ladders: Dict[int, CommodityLadder],
+    item_ids: Set[int],
+    quantity: int = CRAFT_QUANTITY
+) -> Optional[float]:
     """
-    Get the lowest average price for 50 units from commodities for any of the given item IDs.
+    Get the lowest average price for buying quantity units of any of the given item IDs.
     
     Args:
-        session: SQLAlchemy session
+        ladders: Commodity price ladders by item ID
         item_ids: Set of item IDs to check
+        quantity: Number of units to buy
         
     Returns:
-        Lowest average price for 50 units, or None if no prices found
+        Lowest average price for quantity units, or None if no item has enough listed
     """
-    if not item_ids:
-        return None
-    
-    # Query all commodities for the given item IDs
-    commodities = session.query(
-        Commodity.item_id,
-        Commodity.unit_price,
-        Commodity.quantity
-    ).filter(
-        Commodity.item_id.in_(item_ids)
-    ).order_by(
-        Commodity.unit_price
-    ).all()
-    
-    if not commodities:
-        return None
-    
-    # Group by item_id and calculate average price for each
-    item_prices = {}
-    for item_id in item_ids:
-        item_commodities = [c for c in commodities if c.item_id == item_id]
-        if not item_commodities:
-            continue
-            
-        total_quantity = 0
-        total_price = 0
-        remaining_units = 50
-        
-        for commodity in item_commodities:
-            units_to_use = min(remaining_units, commodity.quantity)
-            total_quantity += units_to_use
-            total_price += units_to_use * commodity.unit_price
-            remaining_units -= units_to_use
-            
-            if remaining_units <= 0:
-                break
-        
-        if total_quantity == 50:  # Only consider if we found enough units
-            avg_price = total_price / 50
-            item_prices[item_id] = avg_price
-            
-    return min(item_prices.values()) if item_prices else None
+    item_prices = [
+        ladders[item_id].average_price(quantity)
+        for item_id in item_ids
+        if item_id in ladders
+    ]
+    item_prices = [price for price in item_prices if price is not None]
+    return min(item_prices) if item_prices else None
 
 def update_raw_craft_cost(
     session: Session,
@@ -250,6 +224,8 @@ def update_raw_craft_cost(
     try:
         # Get all items with spell_ids
         items = session.query(Item).filter(Item.spell_id.isnot(None)).all()
+        # Price ladders of the current commodity snapshot, loaded once
+        ladders = load_commodity_ladders(session)
         updated_count = 0
         no_price_count = 0
         
@@ -260,7 +236,7 @@ def update_raw_craft_cost(
             # Process direct reagents
             if item.spell_id in spell_reagents:
                 for reagent_id, count in spell_reagents[item.spell_id]:
-                    price = get_lowest_commodity_price_for_50(session, {reagent_id})
+                    price = get_lowest_commodity_price(ladders, {reagent_id})
                     if price is None:
                         has_all_prices = False
                         logger.warning(f"No price found for reagent {reagent_id} of item {item.item_id}")
@@ -282,7 +258,7 @@ def update_raw_craft_cost(
                         has_all_prices = False
                         break
                         
-                    price = get_lowest_commodity_price_for_50(session, matching_ids)
+                    price = get_lowest_commodity_price(ladders, matching_ids)
                     if price is None:
                         has_all_prices = False
                         logger.warning(f"No price found for modified reagent {reagent_name}")
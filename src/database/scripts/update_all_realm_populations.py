@@ -8,6 +8,7 @@ import asyncio
 import json
 from datetime import datetime
 from sqlalchemy import select
+from src.database.init_db import dispose_engine
 from src.database.models import ConnectedRealm
 from src.database.operations import get_session
 
@@ -50,5 +51,12 @@ async def update_realm_populations():
         else:
             print("\nNo matching realms found to update")
 
+async def main():
+    try:
+        await update_realm_populations()
+    finally:
+        await dispose_engine()
+
+
 if __name__ == "__main__":
-    asyncio.run(update_realm_populations())
+    asyncio.run(main())
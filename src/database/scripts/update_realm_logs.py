@@ -8,6 +8,7 @@ import asyncio
 import json
 from datetime import datetime
 from sqlalchemy import select
+from src.database.init_db import dispose_engine
 from src.database.models import ConnectedRealm
 from src.database.operations import get_session
 
@@ -63,5 +64,12 @@ async def update_realm_logs():
             print("\nNo matching realms found to update")
 
 
+async def main():
+    try:
+        await update_realm_logs()
+    finally:
+        await dispose_engine()
+
+
 if __name__ == "__main__":
-    asyncio.run(update_realm_logs())
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,154 @@
+# src/database/writer.py
+"""Single-writer task serializing all ingestion writes to SQLite."""
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .init_db import get_engine
+
+logger = logging.getLogger(__name__)
+
+# Queued jobs are committed together until this many rows have been written
+WRITER_GROUP_ROWS = int(os.getenv("WRITER_GROUP_ROWS", "50000"))
+WRITER_QUEUE_SIZE = int(os.getenv("WRITER_QUEUE_SIZE", "16"))
+
+WriteOperation = Callable[[AsyncSession], Awaitable[Any]]
+
+
+@dataclass
+class WriteJob:
+    """A unit of writes executed by the writer inside a transaction."""
+    operation: WriteOperation
+    rows: int
+    label: str
+    future: asyncio.Future
+
+
+class DatabaseWriter:
+    """Owns the only write connection and applies queued jobs in order.
+
+    SQLite allows a single writer at a time, so instead of many sessions
+    contending for the database lock, producers submit jobs to this task.
+    Consecutive jobs are grouped into one transaction until WRITER_GROUP_ROWS
+    rows have been written or the queue runs dry. A job's future resolves
+    once its transaction has committed. If a grouped transaction fails, it is
+    rolled back and its jobs are re-run one by one so a bad job only fails
+    itself.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = WRITER_QUEUE_SIZE,
+        group_rows: int = WRITER_GROUP_ROWS,
+    ):
+        self.group_rows = group_rows
+        self.progress: Dict[str, int] = {}  # Rows committed per job label
+        self.transactions = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(
+        self, operation: WriteOperation, rows: int = 0, label: str = ""
+    ) -> asyncio.Future:
+        """Queue a write job, waiting while the queue is full
+
+        Returns:
+            Future resolving to the operation's result once committed
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        elif self._task.done():
+            raise RuntimeError("Database writer has stopped")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(WriteJob(operation, rows, label, future))
+        return future
+
+    async def run(self, operation: WriteOperation, rows: int = 0, label: str = "") -> Any:
+        """Queue a write job and wait for it to commit"""
+        return await (await self.submit(operation, rows, label))
+
+    async def close(self):
+        """Finish queued jobs and stop the writer task"""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        try:
+            await self._task
+        finally:
+            self._task = None
+
+    async def _run(self):
+        try:
+            await self._consume()
+        except Exception as e:
+            logger.error(f"Database writer stopped: {str(e)}")
+            raise
+        finally:
+            # Release producers waiting on jobs that will never run
+            while not self._queue.empty():
+                job = self._queue.get_nowait()
+                if job is not None:
+                    self._fail(job, RuntimeError("Database writer has stopped"))
+
+    async def _consume(self):
+        engine = await get_engine()
+        async with engine.connect() as connection:
+            async with AsyncSession(bind=connection, expire_on_commit=False) as session:
+                stopping = False
+                while not stopping:
+                    job = await self._queue.get()
+                    if job is None:
+                        break
+
+                    group = [job]
+                    rows = job.rows
+                    while rows < self.group_rows and not self._queue.empty():
+                        job = self._queue.get_nowait()
+                        if job is None:
+                            stopping = True
+                            break
+                        group.append(job)
+                        rows += job.rows
+
+                    await self._write_group(session, group)
+
+    async def _write_group(self, session: AsyncSession, group: List[WriteJob]):
+        """Apply a group of jobs in one transaction"""
+        start_time = time.perf_counter()
+        try:
+            results = [await job.operation(session) for job in group]
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            if len(group) == 1:
+                self._fail(group[0], e)
+                return
+            logger.warning(
+                f"Grouped write of {len(group)} jobs failed, retrying them one by one: {str(e)}"
+            )
+            for job in group:
+                await self._write_group(session, [job])
+            return
+
+        self.transactions += 1
+        rows = sum(job.rows for job in group)
+        logger.info(
+            f"Committed {len(group)} write jobs ({rows} rows) "
+            f"in {time.perf_counter() - start_time:.2f} seconds"
+        )
+        for job, result in zip(group, results):
+            self.progress[job.label] = self.progress.get(job.label, 0) + job.rows
+            logger.info(f"Wrote {job.rows} rows for {job.label}")
+            if not job.future.done():
+                job.future.set_result(result)
+
+    @staticmethod
+    def _fail(job: WriteJob, error: Exception):
+        logger.error(f"Write job for {job.label} failed: {str(error)}")
+        if not job.future.done():
+            job.future.set_exception(error)
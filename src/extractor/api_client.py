@@ -1,11 +1,38 @@
+import asyncio
 import logging
+import time
 from contextlib import asynccontextmanager
-from datetime import datetime
-from typing import AsyncIterator, Optional
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, BinaryIO, Callable, Dict, Optional, Tuple
 
 import httpx
+import ijson
 
 from .rate_limiter import RateLimiter
+from .commodity_batch import CommodityBatch, CommodityBatchBuilder
+from .item_cache import CachedItem, ItemCache
+from .transform import add_commodity
+
+COMMODITIES_ENDPOINT = "commodities"
+TOKEN_REFRESH_MARGIN = 300  # Refresh the OAuth token this many seconds before expiry
+KEEPALIVE_EXPIRY = 60.0
+
+
+def auctions_endpoint(connected_realm_id: int) -> str:
+    """Key under which a realm's auction snapshot state is tracked"""
+    return f"auctions/{connected_realm_id}"
+
+
+def parse_http_date(value: str) -> Optional[datetime]:
+    """Naive UTC datetime of an HTTP date header, or None if malformed"""
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
 
 
 class BlizzardAPIClient:
@@ -17,18 +44,53 @@ class BlizzardAPIClient:
         self.base_url = "https://eu.api.blizzard.com/data/wow"
         self.rate_limiter = RateLimiter()
         self.access_token: Optional[str] = None
+        self.token_expires_at: Optional[float] = None  # Monotonic time, None if unknown
         self._client: Optional[httpx.AsyncClient] = None
+        self.item_cache: Optional[ItemCache] = None  # Attached by the extractor
+        self._session_depth = 0
+        self._token_lock = asyncio.Lock()
+        self._clock = time.monotonic
+        # Last-Modified of the most recent fully parsed payload per endpoint
+        self.last_modified: Dict[str, str] = {}
+        self._realm_index: Optional[list[int]] = None  # Reused for the whole run
+
+    def _create_client(self) -> httpx.AsyncClient:
+        """Create the pooled HTTP/2 client shared by every extraction phase"""
+        # One connection per concurrent request the rate limiter lets through
+        max_connections = self.rate_limiter.max_concurrent
+        return httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(30.0, connect=10.0),
+        )
 
     @asynccontextmanager
     async def session(self) -> AsyncIterator[httpx.AsyncClient]:
-        """Context manager for API sessions with auth and rate limiting"""
-        async with httpx.AsyncClient() as client:
+        """Context manager for API sessions with auth and rate limiting
+
+        Nested sessions reuse the open client, so connections are kept alive
+        until the outermost session exits.
+        """
+        if self._client is not None:
+            self._session_depth += 1
+            try:
+                yield self._client
+            finally:
+                self._session_depth -= 1
+            return
+
+        async with self._create_client() as client:
+            self._client = client
+            self._session_depth = 1
             try:
-                if not self.access_token:
-                    await self.authenticate(client)
-                self._client = client
+                await self.ensure_token()
                 yield client
             finally:
+                self._session_depth = 0
                 self._client = None
 
     async def authenticate(self, client: httpx.AsyncClient):
@@ -40,21 +102,97 @@ class BlizzardAPIClient:
             data={"grant_type": "client_credentials"},
         )
         response.raise_for_status()
-        self.access_token = response.json()["access_token"]
+        token = response.json()
+        self.access_token = token["access_token"]
+        expires_in = token.get("expires_in")
+        self.token_expires_at = (
+            self._clock() + float(expires_in) if expires_in is not None else None
+        )
+
+    def token_needs_refresh(self) -> bool:
+        """Whether the token is missing or close to expiry"""
+        if not self.access_token:
+            return True
+        if self.token_expires_at is None:
+            return False
+        return self._clock() >= self.token_expires_at - TOKEN_REFRESH_MARGIN
+
+    async def ensure_token(self):
+        """Refresh the OAuth token ahead of expiry, once for all waiting callers"""
+        if not self.token_needs_refresh():
+            return
+        async with self._token_lock:
+            if self.token_needs_refresh():
+                await self.authenticate(self._client)
+                logging.info("Refreshed Blizzard API access token")
 
     async def fetch_item(self, item_id: int) -> dict:
-        """Fetch item data with retry logic"""
+        """Fetch item data with retry logic, using the item cache when attached"""
+        result, _ = await self._load_item(item_id)
+        return result
+
+    async def revalidate_item(self, item_id: int) -> Optional[dict]:
+        """Revalidate an item against the API regardless of cache freshness
+
+        Returns:
+            The item data if it changed since it was cached, otherwise None
+        """
+        result, changed = await self._load_item(item_id, revalidate=True)
+        return result if changed else None
+
+    async def _load_item(self, item_id: int, revalidate: bool = False) -> Tuple[dict, bool]:
+        """Fetch an item, returning the result and whether it came from the API"""
         url = f"{self.base_url}/item/{item_id}?namespace=static-eu&locale=en_US"
+        cache = self.item_cache
+        cached = cache.get(item_id) if cache else None
+        if cached is not None and not revalidate and cache.is_fresh(cached):
+            return self._item_result(cached), False
+
+        # Revalidate cached responses instead of downloading them again
+        headers = {}
+        if cached is not None and not cached.missing:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
         try:
-            response = await self._request("GET", url)
-            return {"results": [{"data": response}]}  # Match expected format
+            response = await self._send("GET", url, headers=headers, allow_not_modified=True)
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 404:
-                return {"results": []}  # Return empty results for non-existent items
+                if cache:
+                    cache.put_missing(item_id)
+                return {"results": []}, True  # Return empty results for non-existent items
             raise
 
-    async def fetch_connected_realms_index(self) -> list[int]:
-        """Fetch list of all connected realm IDs"""
+        if response.status_code == 304:
+            cache.touch(item_id)
+            return self._item_result(cached), False
+
+        data = response.json()
+        if cache:
+            cache.put(
+                item_id,
+                data,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+        return {"results": [{"data": data}]}, True  # Match expected format
+
+    @staticmethod
+    def _item_result(cached: CachedItem) -> dict:
+        if cached.missing:
+            return {"results": []}
+        return {"results": [{"data": cached.data}]}
+
+    async def fetch_connected_realms_index(self, refresh: bool = False) -> list[int]:
+        """Fetch list of all connected realm IDs
+
+        The first non-empty index is kept and returned by later calls unless
+        refresh is set, so a run requests it only once.
+        """
+        if self._realm_index is not None and not refresh:
+            return list(self._realm_index)
         url = f"{self.base_url}/connected-realm/index?namespace=dynamic-eu&locale=en_US"
         try:
             response = await self._request("GET", url)
@@ -73,7 +211,9 @@ class BlizzardAPIClient:
                     continue
             if not realms:
                 logging.warning(f"No realm IDs found in response: {response}")
-            return realms
+            else:
+                self._realm_index = realms
+            return list(realms)
         except httpx.HTTPStatusError as e:
             logging.error(f"Failed to fetch connected realms index: {e}")
             return []
@@ -109,138 +249,204 @@ class BlizzardAPIClient:
             logging.error(f"Failed to fetch details for realm {realm_id}: {e}")
             raise
 
-    async def fetch_auctions(
-        self, connected_realm_id: int, items_ids: set[int]
-    ) -> list[dict]:
-        """Fetch auction house data for a connected realm."""
-        url = f"{self.base_url}/connected-realm/{connected_realm_id}/auctions?namespace=dynamic-eu&locale=en_US"
-        try:
-            response = await self._request("GET", url)
-            auctions = response.get("auctions", [])
+    async def fetch_commodities(
+        self, if_modified_since: Optional[str] = None
+    ) -> Optional[CommodityBatch]:
+        """Fetch commodity auction house data.
 
-            # Transform auction data to match our schema
-            transformed_auctions = []
-            for auction in auctions:
-                try:
-                    # Log raw auction data for debugging
-                    logging.debug(f"Raw auction data: {auction}")
-
-                    # Check if required fields exist
-                    if "id" not in auction or "item" not in auction:
-                        logging.warning(f"Auction missing required fields: {auction}")
-                        continue
-
-                    # Get item ID safely
-                    item_id = auction["item"]["id"]
-
-                    if not item_id:
-                        logging.warning(
-                            f"Could not extract item ID from auction: {auction}"
-                        )
-                        continue
-
-                    if item_id not in items_ids:
-                        logging.debug(
-                            f"Skipping item ID {item_id} not in requested list"
-                        )
-                        continue
-
-                    transformed_auction = {
-                        "auction_id": auction["id"],
-                        "connected_realm_id": connected_realm_id,
-                        "item_id": item_id,
-                        "buyout_price": auction.get(
-                            "buyout", 0
-                        ),  # Use 0 if no buyout price
-                        "quantity": auction.get(
-                            "quantity", 1
-                        ),  # Default to 1 if not specified
-                        "time_left": auction.get("time_left", ""),
-                        "last_modified": datetime.utcnow(),  # Use current time as fallback
-                    }
-                    transformed_auctions.append(transformed_auction)
-                    logging.debug(f"Transformed auction data: {transformed_auction}")
-                except (KeyError, ValueError) as e:
-                    logging.warning(
-                        f"Failed to transform auction data: {e}, auction: {auction}"
-                    )
-                    continue
+        The payload is parsed incrementally as it downloads into a columnar
+        batch. The batch is stamped with the payload's Last-Modified time, so
+        the same snapshot fetched twice maps to the same history rows; the
+        fetch time is used when the header is missing. Returns None when
+        if_modified_since is given and the snapshot has not changed since.
+        """
+        url = f"{self.base_url}/auctions/commodities?namespace=dynamic-eu&locale=en_US"
+        builder = CommodityBatchBuilder(datetime.utcnow())
 
-            return transformed_auctions
+        try:
+            modified = await self._stream_items(
+                url,
+                "auctions.item",
+                lambda auction: add_commodity(builder, auction),
+                builder.clear,
+                endpoint=COMMODITIES_ENDPOINT,
+                if_modified_since=if_modified_since,
+            )
+            if not modified:
+                return None
+            last_modified = parse_http_date(
+                self.last_modified.get(COMMODITIES_ENDPOINT, "")
+            )
+            if last_modified is not None:
+                builder.last_modified = last_modified
+            return builder.build()
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 404:
-                logging.warning(f"No auctions found for realm {connected_realm_id}")
-                return []
-            logging.error(
-                f"Failed to fetch auctions for realm {connected_realm_id}: {e}"
-            )
+                logging.warning("No commodities found")
+                return CommodityBatch.empty(builder.last_modified)
+            logging.error(f"Failed to fetch commodities: {e}")
             raise
         except Exception as e:
-            logging.error(f"Unexpected error while fetching auctions: {e}")
-            return []
+            logging.error(f"Unexpected error while fetching commodities: {e}")
+            return CommodityBatch.empty(builder.last_modified)
 
-    async def fetch_commodities(self) -> list[dict]:
-        """Fetch commodity auction house data."""
-        url = f"{self.base_url}/auctions/commodities?namespace=dynamic-eu&locale=en_US"
-        try:
-            response = await self._request("GET", url)
-            auctions = response.get("auctions", [])
+    async def _stream_items(
+        self,
+        url: str,
+        prefix: str,
+        consume: Callable[[dict], Any],
+        reset: Callable[[], Any],
+        endpoint: Optional[str] = None,
+        if_modified_since: Optional[str] = None,
+    ) -> bool:
+        """Stream a JSON response and hand each array item under prefix to consume.
 
-            # Transform commodity data to match our schema
-            transformed_commodities = []
-            for auction in auctions:
-                try:
-                    # Check if required fields exist
-                    if "id" not in auction or "item" not in auction:
-                        logging.warning(f"Commodity missing required fields: {auction}")
-                        continue
-
-                    # Get item ID safely
-                    item_id = auction["item"]["id"]
-                    if not item_id:
-                        logging.warning(
-                            f"Could not extract item ID from commodity: {auction}"
-                        )
-                        continue
-
-                    transformed_commodity = {
-                        "item_id": item_id,
-                        "quantity": auction.get("quantity", 1),
-                        "unit_price": auction.get("unit_price", 0),
-                        "last_modified": datetime.utcnow(),
-                    }
-                    transformed_commodities.append(transformed_commodity)
-                    logging.debug(f"Transformed commodity data: {transformed_commodity}")
-                except (KeyError, ValueError) as e:
-                    logging.warning(
-                        f"Failed to transform commodity data: {e}, auction: {auction}"
-                    )
-                    continue
+        Items are decoded chunk by chunk as the body arrives, so the full
+        document is never held in memory. reset is called before every
+        attempt so consumers start over when a request is retried. Returns
+        False on 304 Not Modified.
+        """
+        events = ijson.sendable_list()
+        parser = None
+
+        def collect():
+            for item in events:
+                consume(item)
+            del events[:]
+
+        def start():
+            nonlocal parser
+            reset()
+            del events[:]
+            parser = ijson.items_coro(events, prefix, use_float=True)
+
+        def write(chunk: bytes):
+            parser.send(chunk)
+            collect()
+
+        modified = await self._stream_body(url, start, write, endpoint, if_modified_since)
+        if modified:
+            parser.close()
+            collect()
+        return modified
+
+    async def download_auctions(
+        self,
+        connected_realm_id: int,
+        dest: BinaryIO,
+        if_modified_since: Optional[str] = None,
+    ) -> Optional[int]:
+        """Download a realm's raw auction payload into dest.
 
-            return transformed_commodities
+        Returns:
+            Number of bytes written (0 when the realm has no auction house),
+            or None when the snapshot has not changed since if_modified_since.
+        """
+        url = f"{self.base_url}/connected-realm/{connected_realm_id}/auctions?namespace=dynamic-eu&locale=en_US"
+
+        def start():
+            dest.seek(0)
+            dest.truncate()
+
+        try:
+            modified = await self._stream_body(
+                url,
+                start,
+                dest.write,
+                auctions_endpoint(connected_realm_id),
+                if_modified_since,
+            )
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 404:
-                logging.warning("No commodities found")
-                return []
-            logging.error(f"Failed to fetch commodities: {e}")
+                logging.warning(f"No auctions found for realm {connected_realm_id}")
+                start()
+                return 0
+            logging.error(
+                f"Failed to download auctions for realm {connected_realm_id}: {e}"
+            )
             raise
-        except Exception as e:
-            logging.error(f"Unexpected error while fetching commodities: {e}")
-            return []
+        if not modified:
+            return None
+        dest.flush()
+        return dest.tell()
 
-    async def _request(self, method: str, url: str, **kwargs) -> dict:
-        """Execute API request with rate limiting and error handling"""
+    async def _stream_body(
+        self,
+        url: str,
+        start: Callable[[], None],
+        write: Callable[[bytes], Any],
+        endpoint: Optional[str] = None,
+        if_modified_since: Optional[str] = None,
+    ) -> bool:
+        """Stream a GET response body chunk by chunk into write.
+
+        start is called before every attempt so a retried request begins from
+        scratch. With if_modified_since set the request is conditional and
+        False is returned on 304 Not Modified. Once the whole body has been
+        consumed, its Last-Modified header is recorded in
+        self.last_modified[endpoint].
+        """
+        if not self._client:
+            raise RuntimeError("Client not initialized - use session context manager")
+
+        headers = {}
+        if if_modified_since:
+            headers["If-Modified-Since"] = if_modified_since
+
+        async def send() -> httpx.Response:
+            start()
+            await self.ensure_token()
+            headers["Authorization"] = f"Bearer {self.access_token}"
+            async with self._client.stream("GET", url, headers=headers) as response:
+                if response.status_code == 304:
+                    return response
+                if response.is_error:
+                    await response.aread()
+                    response.raise_for_status()
+                async for chunk in response.aiter_bytes():
+                    write(chunk)
+            return response
+
+        response = await self.rate_limiter.execute_with_retry(send)
+        if response.status_code == 304:
+            logging.info(f"{endpoint or url} not modified since {if_modified_since}")
+            return False
+        if endpoint:
+            if "Last-Modified" in response.headers:
+                self.last_modified[endpoint] = response.headers["Last-Modified"]
+            else:
+                # Never attribute a previous response's timestamp to this one
+                self.last_modified.pop(endpoint, None)
+        return True
+
+    async def _send(
+        self, method: str, url: str, allow_not_modified: bool = False, **kwargs
+    ) -> httpx.Response:
+        """Send a request with rate limiting, retrying 429 and 5xx responses
+
+        With allow_not_modified a 304 response is returned instead of raised.
+        """
         if not self._client:
             raise RuntimeError("Client not initialized - use session context manager")
 
         headers = kwargs.pop("headers", {})
-        headers["Authorization"] = f"Bearer {self.access_token}"
 
-        try:
-            response = await self.rate_limiter.execute_with_retry(
-                self._client.request(method, url, headers=headers, **kwargs)
-            )
+        async def send() -> httpx.Response:
+            await self.ensure_token()
+            headers["Authorization"] = f"Bearer {self.access_token}"
+            response = await self._client.request(method, url, headers=headers, **kwargs)
+            if allow_not_modified and response.status_code == 304:
+                return response
+            # Raise inside the retry loop so 429 and 5xx responses are retried
             response.raise_for_status()
+            return response
+
+        return await self.rate_limiter.execute_with_retry(send)
+
+    async def _request(self, method: str, url: str, **kwargs) -> dict:
+        """Execute API request with rate limiting and error handling"""
+        try:
+            response = await self._send(method, url, **kwargs)
             return response.json()
         except httpx.HTTPStatusError as e:
             logging.error(
@@ -0,0 +1,163 @@
+"""
+Columnar auction batches for the ingest path.
+"""
+
+from array import array
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import repeat
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.database.operations import SQLITE_DATETIME_FORMAT
+
+# Rows materialized at a time when producing executemany parameters
+ROW_CHUNK_SIZE = 2000
+
+
+@dataclass
+class AuctionBatch:
+    """Auctions of one realm snapshot, stored column by column.
+
+    Every field is a NumPy array with one entry per auction. The realm and
+    the snapshot timestamp are stored once instead of per row, and time_left
+    is kept as uint8 codes into time_left_labels.
+    """
+
+    connected_realm_id: int
+    last_modified: datetime
+    auction_id: np.ndarray
+    item_id: np.ndarray
+    buyout_price: np.ndarray
+    quantity: np.ndarray
+    time_left: np.ndarray
+    time_left_labels: Tuple[str, ...] = ()
+
+    def __len__(self) -> int:
+        return len(self.auction_id)
+
+    @classmethod
+    def empty(cls, connected_realm_id: int, last_modified: datetime) -> "AuctionBatch":
+        return AuctionBatchBuilder(connected_realm_id, last_modified).build()
+
+    def take(self, indices: np.ndarray) -> "AuctionBatch":
+        """Batch with the rows at the given positions"""
+        return AuctionBatch(
+            connected_realm_id=self.connected_realm_id,
+            last_modified=self.last_modified,
+            auction_id=self.auction_id[indices],
+            item_id=self.item_id[indices],
+            buyout_price=self.buyout_price[indices],
+            quantity=self.quantity[indices],
+            time_left=self.time_left[indices],
+            time_left_labels=self.time_left_labels,
+        )
+
+    def rows(self, snapshot_id: int, active: bool = True) -> Iterator[tuple]:
+        """Yield executemany parameters in AUCTION_ROW_COLUMNS order.
+
+        Rows are produced lazily from array slices, so no per-row dicts and
+        at most ROW_CHUNK_SIZE Python rows exist at any time.
+        """
+        last_modified = self.last_modified.strftime(SQLITE_DATETIME_FORMAT)
+        labels = self.time_left_labels
+        for start in range(0, len(self), ROW_CHUNK_SIZE):
+            end = start + ROW_CHUNK_SIZE
+            yield from zip(
+                self.auction_id[start:end].tolist(),
+                repeat(self.connected_realm_id),
+                self.item_id[start:end].tolist(),
+                self.buyout_price[start:end].tolist(),
+                self.quantity[start:end].tolist(),
+                map(labels.__getitem__, self.time_left[start:end].tolist()),
+                repeat(last_modified),
+                repeat(active),
+                repeat(snapshot_id),
+            )
+
+    def price_rollup_rows(self, bucket_start: datetime) -> List[tuple]:
+        """Per-item price aggregates in PRICE_ROLLUP_COLUMNS order
+
+        Unit prices are buyout / quantity; auctions without a buyout are
+        left out.
+        """
+        valid = (self.buyout_price > 0) & (self.quantity > 0)
+        if not valid.any():
+            return []
+        auctions = pd.DataFrame(
+            {
+                "item_id": self.item_id[valid],
+                "unit_price": self.buyout_price[valid] / self.quantity[valid],
+                "quantity": self.quantity[valid],
+            }
+        )
+        grouped = auctions.groupby("item_id")
+        stats = grouped["unit_price"].agg(["min", "max", "mean", "median", "count"])
+        stats["quantity"] = grouped["quantity"].sum()
+        bucket = bucket_start.strftime(SQLITE_DATETIME_FORMAT)
+        return list(
+            zip(
+                repeat(self.connected_realm_id),
+                stats.index.tolist(),
+                repeat(bucket),
+                stats["min"].tolist(),
+                stats["max"].tolist(),
+                stats["mean"].tolist(),
+                stats["median"].tolist(),
+                stats["quantity"].tolist(),
+                stats["count"].tolist(),
+            )
+        )
+
+
+class AuctionBatchBuilder:
+    """Accumulates auctions into typed arrays and freezes them into a batch"""
+
+    def __init__(self, connected_realm_id: int, last_modified: datetime):
+        self.connected_realm_id = connected_realm_id
+        self.last_modified = last_modified
+        self.clear()
+
+    def clear(self):
+        """Drop every appended auction"""
+        self._auction_id = array("q")
+        self._item_id = array("q")
+        self._buyout_price = array("q")
+        self._quantity = array("q")
+        self._time_left = array("B")
+        self._labels: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._auction_id)
+
+    def append(
+        self,
+        auction_id: int,
+        item_id: int,
+        buyout_price: int,
+        quantity: int,
+        time_left: str,
+    ):
+        code = self._labels.get(time_left)
+        if code is None:
+            code = self._labels[time_left] = len(self._labels)
+        self._auction_id.append(auction_id)
+        self._item_id.append(item_id)
+        self._buyout_price.append(buyout_price)
+        self._quantity.append(quantity)
+        self._time_left.append(code)
+
+    def build(self) -> AuctionBatch:
+        """Wrap the accumulated arrays without copying them"""
+        return AuctionBatch(
+            connected_realm_id=self.connected_realm_id,
+            last_modified=self.last_modified,
+            auction_id=np.frombuffer(self._auction_id, dtype=np.int64),
+            item_id=np.frombuffer(self._item_id, dtype=np.int64),
+            buyout_price=np.frombuffer(self._buyout_price, dtype=np.int64),
+            quantity=np.frombuffer(self._quantity, dtype=np.int64),
+            time_left=np.frombuffer(self._time_left, dtype=np.uint8),
+            time_left_labels=tuple(self._labels),
+        )
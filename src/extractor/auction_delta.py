@@ -0,0 +1,77 @@
+"""
+Snapshot diffing for delta auction ingestion.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+import numpy as np
+
+from .auction_batch import AuctionBatch
+
+
+@dataclass
+class AuctionDelta:
+    """Changes between a realm's current snapshot and an incoming one."""
+
+    incoming: AuctionBatch
+    insert_rows: np.ndarray  # Positions in incoming of new auctions
+    update_rows: np.ndarray  # Positions in incoming of changed auctions
+    removals: set[int] = field(default_factory=set)
+    unchanged: int = 0
+
+    @property
+    def inserts(self) -> AuctionBatch:
+        return self.incoming.take(self.insert_rows)
+
+    @property
+    def updates(self) -> AuctionBatch:
+        return self.incoming.take(self.update_rows)
+
+    @property
+    def writes(self) -> AuctionBatch:
+        """Auctions that need to be written to the database."""
+        return self.incoming.take(np.concatenate([self.insert_rows, self.update_rows]))
+
+
+def diff_auctions(
+    previous: Dict[int, Tuple[int, int]], incoming: AuctionBatch
+) -> AuctionDelta:
+    """Classify incoming auctions against the previous snapshot.
+
+    Args:
+        previous: Current auctions as auction_id -> (buyout_price, quantity)
+        incoming: Tracked auctions from the new snapshot
+
+    Returns:
+        AuctionDelta with new auctions, auctions whose price or quantity
+        changed, IDs of auctions that vanished and the unchanged count
+    """
+    previous_ids = np.fromiter(previous.keys(), dtype=np.int64, count=len(previous))
+    previous_state = np.array(list(previous.values()), dtype=np.int64).reshape(-1, 2)
+    order = np.argsort(previous_ids)
+    previous_ids = previous_ids[order]
+    previous_state = previous_state[order]
+
+    # Locate every incoming auction in the sorted previous snapshot
+    if len(previous_ids):
+        positions = np.minimum(
+            np.searchsorted(previous_ids, incoming.auction_id), len(previous_ids) - 1
+        )
+        found = previous_ids[positions] == incoming.auction_id
+        changed = found & (
+            (previous_state[positions, 0] != incoming.buyout_price)
+            | (previous_state[positions, 1] != incoming.quantity)
+        )
+    else:
+        found = np.zeros(len(incoming), dtype=bool)
+        changed = found
+
+    vanished = ~np.isin(previous_ids, incoming.auction_id)
+    return AuctionDelta(
+        incoming=incoming,
+        insert_rows=np.flatnonzero(~found),
+        update_rows=np.flatnonzero(changed),
+        removals=set(previous_ids[vanished].tolist()),
+        unchanged=int(found.sum() - changed.sum()),
+    )
@@ -0,0 +1,187 @@
+"""
+Columnar commodity snapshots for the ingest path.
+"""
+
+from array import array
+from dataclasses import dataclass, replace
+from datetime import datetime
+from itertools import repeat
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+from src.database.operations import COMMODITY_HISTORY_DEPTHS, SQLITE_DATETIME_FORMAT
+
+from .auction_batch import ROW_CHUNK_SIZE
+
+# Quantity-weighted percentiles in each price summary: p10, p25 and median
+COMMODITY_HISTORY_PERCENTILES = (0.1, 0.25, 0.5)
+
+
+@dataclass
+class CommodityBatch:
+    """Commodity listings of one region-wide snapshot, stored column by column.
+
+    Every field is a NumPy array with one entry per listing, and the snapshot
+    timestamp is stored once.
+    """
+
+    last_modified: datetime
+    item_id: np.ndarray
+    unit_price: np.ndarray
+    quantity: np.ndarray
+    # Per-item running totals in price order, set by aggregate()
+    cumulative_quantity: Optional[np.ndarray] = None
+    cumulative_cost: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.item_id)
+
+    @classmethod
+    def empty(cls, last_modified: datetime) -> "CommodityBatch":
+        return CommodityBatchBuilder(last_modified).build()
+
+    def aggregate(self) -> "CommodityBatch":
+        """Batch with one row per (item_id, unit_price) and summed quantities
+
+        The whole snapshot is sorted by item and price once, and the
+        quantities of each run of equal keys are summed with np.add.reduceat.
+        The result also carries each item's price ladder: the quantity and
+        total cost of buying out every level up to and including each row.
+        """
+        if self.cumulative_quantity is not None:
+            return self
+        if not len(self):
+            empty = np.zeros(0, dtype=np.int64)
+            return replace(self, cumulative_quantity=empty, cumulative_cost=empty)
+        order = np.lexsort((self.unit_price, self.item_id))
+        item_id = self.item_id[order]
+        unit_price = self.unit_price[order]
+        starts = np.flatnonzero(
+            np.concatenate(
+                ([True], (item_id[1:] != item_id[:-1]) | (unit_price[1:] != unit_price[:-1]))
+            )
+        )
+        item_id = item_id[starts]
+        unit_price = unit_price[starts]
+        quantity = np.add.reduceat(self.quantity[order], starts)
+        return CommodityBatch(
+            last_modified=self.last_modified,
+            item_id=item_id,
+            unit_price=unit_price,
+            quantity=quantity,
+            cumulative_quantity=_cumsum_by_item(item_id, quantity),
+            cumulative_cost=_cumsum_by_item(item_id, quantity * unit_price),
+        )
+
+    def rows(self) -> Iterator[tuple]:
+        """Yield executemany parameters in COMMODITY_ROW_COLUMNS order
+
+        Rows are those of the aggregated snapshot.
+        """
+        batch = self.aggregate()
+        last_modified = batch.last_modified.strftime(SQLITE_DATETIME_FORMAT)
+        for start in range(0, len(batch), ROW_CHUNK_SIZE):
+            end = start + ROW_CHUNK_SIZE
+            yield from zip(
+                batch.item_id[start:end].tolist(),
+                batch.quantity[start:end].tolist(),
+                batch.unit_price[start:end].tolist(),
+                repeat(last_modified),
+                batch.cumulative_quantity[start:end].tolist(),
+                batch.cumulative_cost[start:end].tolist(),
+            )
+
+    def summary_rows(self) -> List[tuple]:
+        """Per-item price summary in COMMODITY_HISTORY_COLUMNS order
+
+        Percentile prices are quantity-weighted: the price of the level
+        holding that share of the item's listed units. Each summary reads
+        positions in the aggregated ladder found with one searchsorted per
+        statistic over the whole snapshot.
+        """
+        batch = self.aggregate()
+        if not len(batch):
+            return []
+        starts = _item_starts(batch.item_id)
+        last = np.append(starts[1:], len(batch)) - 1
+        totals = batch.cumulative_quantity[last]
+        # Units listed across the snapshot before each level and item
+        running = np.cumsum(batch.quantity)
+        offsets = running[last] - totals
+
+        def level(units: np.ndarray) -> np.ndarray:
+            """Index of the level holding each item's units-th cheapest unit"""
+            return np.searchsorted(running, offsets + units)
+
+        percentiles = [
+            batch.unit_price[level(np.maximum(np.ceil(totals * share), 1))]
+            for share in COMMODITY_HISTORY_PERCENTILES
+        ]
+        costs = []
+        for depth in COMMODITY_HISTORY_DEPTHS:
+            index = level(np.minimum(totals, depth))
+            cost = batch.cumulative_cost[index] - (
+                batch.cumulative_quantity[index] - depth
+            ) * batch.unit_price[index]
+            costs.append(
+                [value if listed else None for value, listed in zip(cost.tolist(), totals >= depth)]
+            )
+
+        return list(
+            zip(
+                batch.item_id[starts].tolist(),
+                repeat(batch.last_modified.strftime(SQLITE_DATETIME_FORMAT)),
+                batch.unit_price[starts].tolist(),
+                *(prices.tolist() for prices in percentiles),
+                totals.tolist(),
+                *costs,
+            )
+        )
+
+
+def _item_starts(item_id: np.ndarray) -> np.ndarray:
+    """Positions where a new item begins in a sorted item_id array"""
+    return np.flatnonzero(np.concatenate(([True], item_id[1:] != item_id[:-1])))
+
+
+def _cumsum_by_item(item_id: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Running sum of values restarting at each new item; item_id is sorted"""
+    totals = np.cumsum(values)
+    item_starts = _item_starts(item_id)
+    # Subtract everything accumulated before the row's item began
+    offsets = np.repeat(
+        totals[item_starts] - values[item_starts], np.diff(np.append(item_starts, len(item_id)))
+    )
+    return totals - offsets
+
+
+class CommodityBatchBuilder:
+    """Accumulates commodity listings into typed arrays"""
+
+    def __init__(self, last_modified: datetime):
+        self.last_modified = last_modified
+        self.clear()
+
+    def clear(self):
+        """Drop every appended listing"""
+        self._item_id = array("q")
+        self._unit_price = array("q")
+        self._quantity = array("q")
+
+    def __len__(self) -> int:
+        return len(self._item_id)
+
+    def append(self, item_id: int, quantity: int, unit_price: int):
+        self._item_id.append(item_id)
+        self._quantity.append(quantity)
+        self._unit_price.append(unit_price)
+
+    def build(self) -> CommodityBatch:
+        """Wrap the accumulated arrays without copying them"""
+        return CommodityBatch(
+            last_modified=self.last_modified,
+            item_id=np.frombuffer(self._item_id, dtype=np.int64),
+            unit_price=np.frombuffer(self._unit_price, dtype=np.int64),
+            quantity=np.frombuffer(self._quantity, dtype=np.int64),
+        )
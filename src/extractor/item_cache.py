@@ -0,0 +1,140 @@
+# src/extractor/item_cache.py
+"""On-disk cache of static-namespace item responses."""
+import json
+import logging
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+ITEM_CACHE_PATH = os.getenv("ITEM_CACHE_PATH", "item_cache.db")
+ITEM_CACHE_MAX_AGE = float(os.getenv("ITEM_CACHE_MAX_AGE", str(7 * 24 * 3600)))  # seconds
+ITEM_NEGATIVE_TTL = float(os.getenv("ITEM_NEGATIVE_TTL", str(24 * 3600)))  # seconds
+
+
+@dataclass
+class CachedItem:
+    """A cached item response; status 404 marks a negative entry"""
+    item_id: int
+    status: int
+    data: Optional[dict]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+    @property
+    def missing(self) -> bool:
+        return self.status == 404
+
+
+class ItemCache:
+    """SQLite-backed store of item API responses.
+
+    Successful responses are served without a request until they are
+    max_age old, after which they are revalidated with their ETag and
+    Last-Modified validators. 404s are cached as negative entries for
+    negative_ttl so missing items are not requested on every run.
+    """
+
+    def __init__(
+        self,
+        path: str = ITEM_CACHE_PATH,
+        max_age: float = ITEM_CACHE_MAX_AGE,
+        negative_ttl: float = ITEM_NEGATIVE_TTL,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.max_age = max_age
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")  # Losing recent entries is harmless
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS item_responses (
+                item_id INTEGER PRIMARY KEY,
+                status INTEGER NOT NULL,
+                body TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+    def get(self, item_id: int) -> Optional[CachedItem]:
+        row = self._conn.execute(
+            "SELECT item_id, status, body, etag, last_modified, fetched_at "
+            "FROM item_responses WHERE item_id = ?",
+            (item_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        item_id, status, body, etag, last_modified, fetched_at = row
+        data = json.loads(body) if body is not None else None
+        return CachedItem(item_id, status, data, etag, last_modified, fetched_at)
+
+    def is_fresh(self, entry: CachedItem) -> bool:
+        """Whether the entry can be used without contacting the API"""
+        ttl = self.negative_ttl if entry.missing else self.max_age
+        return self._clock() - entry.fetched_at < ttl
+
+    def put(
+        self,
+        item_id: int,
+        data: dict,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        self._write(item_id, 200, json.dumps(data), etag, last_modified)
+
+    def put_missing(self, item_id: int):
+        """Record a 404 for the item"""
+        self._write(item_id, 404, None, None, None)
+
+    def touch(self, item_id: int):
+        """Mark an entry as just revalidated"""
+        self._conn.execute(
+            "UPDATE item_responses SET fetched_at = ? WHERE item_id = ?",
+            (self._clock(), item_id),
+        )
+        self._conn.commit()
+
+    def stale_item_ids(self, limit: int) -> List[int]:
+        """Oldest cached items due for revalidation"""
+        rows = self._conn.execute(
+            "SELECT item_id FROM item_responses WHERE status = 200 AND fetched_at < ? "
+            "ORDER BY fetched_at LIMIT ?",
+            (self._clock() - self.max_age, limit),
+        ).fetchall()
+        return [item_id for (item_id,) in rows]
+
+    def cached_item_ids(self) -> set[int]:
+        rows = self._conn.execute("SELECT item_id FROM item_responses").fetchall()
+        return {item_id for (item_id,) in rows}
+
+    def _write(
+        self,
+        item_id: int,
+        status: int,
+        body: Optional[str],
+        etag: Optional[str],
+        last_modified: Optional[str],
+    ):
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO item_responses "
+                "(item_id, status, body, etag, last_modified, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (item_id, status, body, etag, last_modified, self._clock()),
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            # The cache is an optimization; never fail a fetch over it
+            logging.warning(f"Failed to cache item {item_id}: {e}")
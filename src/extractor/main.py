@@ -3,27 +3,49 @@ import asyncio
 import logging
 import os
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
+from functools import partial
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional
 
-from sqlalchemy import and_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.operations import (
-    connected_realm_exists,
-    get_all_item_ids,
-    get_connected_realm_by_id,
+    add_auction_snapshot,
+    apply_auction_snapshot,
+    get_connected_realm_update_times,
+    get_current_auction_state,
+    get_endpoint_states,
     get_session,
-    upsert_auctions,
-    upsert_connected_realm,
+    price_rollup_hour,
+    replace_commodities,
+    update_item_metadata,
     upsert_items,
-    upsert_commodities,
-    delete_all_commodities,
+    write_auction_rows,
+    write_commodity_history,
+    write_connected_realms,
+    write_endpoint_state,
+    write_price_rollups,
 )
-from src.database.models import Auction
+from src.database.item_registry import ItemIdRegistry
+from src.database.writer import DatabaseWriter
+
+from .api_client import COMMODITIES_ENDPOINT, BlizzardAPIClient, auctions_endpoint
+from .auction_batch import AuctionBatch
+from .auction_delta import diff_auctions
+from .item_cache import ItemCache
+from .pipeline import AuctionPipeline
+
+ITEM_WRITE_BATCH_SIZE = 500  # Items per bulk upsert
+ITEM_MAX_ATTEMPTS = 2
+ITEM_REFRESH_LIMIT = 500  # Stale items revalidated per run
+# Known items missing from the item cache fetched per run, after the auction phase
+ITEM_BACKFILL_LIMIT = int(os.getenv("ITEM_BACKFILL_LIMIT", "50"))
+ITEM_REFRESH_WORKERS = 2
+REALM_DETAIL_WORKERS = 8
+# Stored realms older than this have their status and population refreshed
+REALM_REFRESH_TTL = timedelta(hours=float(os.getenv("REALM_REFRESH_TTL_HOURS", "24")))
 
-from .api_client import BlizzardAPIClient
 
 class ItemExtractor:
     def __init__(self):
@@ -31,6 +53,12 @@ class ItemExtractor:
             os.getenv("BLIZZARD_CLIENT_ID"), os.getenv("BLIZZARD_CLIENT_SECRET")
         )
         self.realmIds_to_retry = []
+        # Last-Modified of the last ingested payload per endpoint
+        self.endpoint_states: Dict[str, str] = {}
+        # Tracked item IDs shared by item and realm workers
+        self.item_ids = ItemIdRegistry()
+        # Serializes all auction and commodity writes
+        self.writer = DatabaseWriter()
         self.stats = {
             "processed": 0,
             "succeeded": 0,
@@ -39,17 +67,28 @@ class ItemExtractor:
             "realms_processed": 0,
             "realms_succeeded": 0,
             "realms_failed": 0,
-            "realms_skipped": 0,  # Realms already in DB
+            "realms_skipped": 0,  # Realms in DB and within the refresh TTL
+            "realms_refreshed": 0,  # Stored realms updated past the TTL
             "items_skipped": 0,  # Items already in DB
             "auctions_processed": 0,  # New auction stats
             "auctions_succeeded": 0,
             "auctions_failed": 0,
             "auctions_skipped": 0,  # Auctions already in DB and unchanged
+            "auctions_inserted": 0,  # New auctions in the snapshot
+            "auctions_updated": 0,  # Auctions with a price or quantity change
+            "auctions_removed": 0,  # Auctions gone since the previous snapshot
             "commodities_processed": 0,  # New commodity stats
             "commodities_succeeded": 0,
             "commodities_failed": 0,
+            "snapshots_unchanged": 0,  # Payloads skipped on 304 Not Modified
+            "items_revalidated": 0,  # Cached items checked against the API
+            "items_refreshed": 0,  # Cached items whose metadata changed
         }
 
+    async def load_endpoint_states(self, session: AsyncSession):
+        """Load the Last-Modified values used for conditional requests"""
+        self.endpoint_states = await get_endpoint_states(session)
+
     def transform_item(self, raw_data: dict) -> dict:
         """Transform API response to database schema"""
         if not raw_data.get("results") or not raw_data["results"]:
@@ -77,25 +116,44 @@ class ItemExtractor:
         start_time = time.perf_counter()
 
         try:
-            # Delete all existing commodities
-            await delete_all_commodities()
-
-            # Fetch new commodities
-            commodities = await self.client.fetch_commodities()
+            # Fetch new commodities unless the snapshot is unchanged
+            commodities = await self.client.fetch_commodities(
+                if_modified_since=self.endpoint_states.get(COMMODITIES_ENDPOINT)
+            )
+            if commodities is None:
+                logging.info("Commodity snapshot unchanged, keeping stored data")
+                self.stats["snapshots_unchanged"] += 1
+                return True
             if not commodities:
                 logging.info("No commodities found")
                 return True
 
             self.stats["commodities_processed"] = len(commodities)
 
-            # Process commodities with quantity merging
-            await upsert_commodities(commodities)
+            # One row per item and price across the whole snapshot
+            aggregated = commodities.aggregate()
+            history = aggregated.summary_rows()
+            last_modified = self.client.last_modified.get(COMMODITIES_ENDPOINT)
+
+            async def write_snapshot(session: AsyncSession):
+                # Replace the previous snapshot in the same transaction
+                await replace_commodities(session, aggregated.rows())
+                # Keep a compact per-item summary for price trends
+                await write_commodity_history(session, history)
+                if last_modified is not None:
+                    await write_endpoint_state(session, COMMODITIES_ENDPOINT, last_modified)
+
+            await self.writer.run(
+                write_snapshot, rows=len(aggregated) + len(history), label="commodities"
+            )
+            if last_modified is not None:
+                self.endpoint_states[COMMODITIES_ENDPOINT] = last_modified
             self.stats["commodities_succeeded"] = len(commodities)
 
             processing_time = time.perf_counter() - start_time
             logging.info(
                 f"Completed processing {len(commodities)} commodities "
-                f"in {processing_time:.2f} seconds"
+                f"({len(aggregated)} price points) in {processing_time:.2f} seconds"
             )
             return True
 
@@ -104,187 +162,337 @@ class ItemExtractor:
             logging.error(f"Commodity extraction failed: {str(e)}")
             return False
 
-    async def extract_connected_realms(self, session: AsyncSession):
-        """Extract and store connected realm data"""
+    async def extract_connected_realms(
+        self, session: AsyncSession, workers: int = REALM_DETAIL_WORKERS
+    ):
+        """Extract and store connected realm data
+
+        Realms missing from the database or last updated more than
+        REALM_REFRESH_TTL ago have their details fetched concurrently, then
+        are written in one upsert so status and population stay current.
+        """
         try:
             realm_ids = await self.client.fetch_connected_realms_index()
-            for realm_id in realm_ids:
-                try:
-                    self.stats["realms_processed"] += 1
+            update_times = await get_connected_realm_update_times(session)
+            cutoff = datetime.utcnow() - REALM_REFRESH_TTL
 
-                    # Check if realm already exists and skip if it does
-                    if await connected_realm_exists(session, realm_id):
-                        logging.debug(f"Skipping existing connected realm {realm_id}")
-                        self.stats["realms_skipped"] += 1
+            pending: asyncio.Queue = asyncio.Queue()
+            for realm_id in realm_ids:
+                self.stats["realms_processed"] += 1
+                last_updated = update_times.get(realm_id)
+                if last_updated is not None and last_updated >= cutoff:
+                    logging.debug(f"Skipping fresh connected realm {realm_id}")
+                    self.stats["realms_skipped"] += 1
+                else:
+                    pending.put_nowait(realm_id)
+
+            fetched: List[dict] = []
+
+            async def worker():
+                while True:
+                    try:
+                        realm_id = pending.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    try:
+                        realm_data = await self.client.fetch_connected_realm_details(
+                            realm_id
+                        )
+                    except Exception as e:
+                        self.stats["realms_failed"] += 1
+                        logging.error(f"Failed to process realm {realm_id}: {str(e)}")
                         continue
-
-                    realm_data = await self.client.fetch_connected_realm_details(
-                        realm_id
-                    )
                     if realm_data:
                         realm_data["last_updated"] = datetime.utcnow()
-                        await upsert_connected_realm(session, realm_data)
-                        self.stats["realms_succeeded"] += 1
+                        fetched.append(realm_data)
                     else:
                         self.stats["realms_failed"] += 1
-                except Exception as e:
-                    self.stats["realms_failed"] += 1
-                    logging.error(f"Failed to process realm {realm_id}: {str(e)}")
+
+            await asyncio.gather(*(worker() for _ in range(workers)))
+            if fetched:
+                await self.writer.run(
+                    partial(write_connected_realms, realms=fetched),
+                    rows=len(fetched),
+                    label="connected realms",
+                )
+                self.stats["realms_succeeded"] += len(fetched)
+                self.stats["realms_refreshed"] += sum(
+                    realm["connected_realm_id"] in update_times for realm in fetched
+                )
             return True
         except Exception as e:
             logging.error(f"Connected realms extraction failed: {str(e)}")
             return False
 
-    async def process_realm_auctions(
-        self, session: AsyncSession, connected_realm_id: int
-    ):
-        """Process auctions for a single realm with error handling"""
-        logging.info(f"Starting auction processing for realm {connected_realm_id}")
+    async def queue_realm_auctions(
+        self,
+        session: AsyncSession,
+        connected_realm_id: int,
+        auctions: AuctionBatch,
+        payload_bytes: Optional[int] = None,
+        duration_seconds: Optional[float] = None,
+    ) -> "asyncio.Future[bool]":
+        """Diff a realm's fetched auctions and queue them for the writer
+
+        The payload size and the measured download and parse time are
+        recorded on the snapshot for scheduling later runs.
+
+        Returns:
+            Future resolving to whether the new snapshot was committed
+        """
         start_time = time.perf_counter()
+        done = asyncio.get_running_loop().create_future()
 
         try:
-            # Get realm details using provided session
-            realm = await get_connected_realm_by_id(session, connected_realm_id)
-            if not realm:
-                logging.error(
-                    f"Connected realm {connected_realm_id} not found in database"
-                )
-                return False
-
-            # Get current item IDs
-            item_ids = await get_all_item_ids(session)
-
-            # Fetch auctions
-            auctions = await self.client.fetch_auctions(connected_realm_id, item_ids)
             if not auctions:
+                # Still committed, so the realm's previous auctions are retired
                 logging.info(f"No auctions found for realm {connected_realm_id}")
-                return True
 
-            # Deactivate existing auctions for this realm
-            await session.execute(
-                update(Auction)
-                .where(
-                    and_(
-                        Auction.connected_realm_id == connected_realm_id,
-                        Auction.active.is_(True),
-                    )
+            previous = await get_current_auction_state(session, connected_realm_id)
+            await session.commit()  # End the read transaction
+
+            # Only new and changed auctions are written
+            delta = diff_auctions(previous, auctions)
+            self.stats["auctions_processed"] += len(auctions)
+            self.stats["auctions_skipped"] += delta.unchanged
+            writes = delta.writes
+            inserted, updated = len(delta.insert_rows), len(delta.update_rows)
+            endpoint = auctions_endpoint(connected_realm_id)
+            last_modified = self.client.last_modified.get(endpoint)
+            # Price aggregates of the full snapshot for the history API
+            rollup_hour = price_rollup_hour(auctions.last_modified)
+            rollups = auctions.price_rollup_rows(rollup_hour)
+
+            async def write_snapshot(write_session: AsyncSession) -> int:
+                # Write into a new snapshot; readers keep seeing the current one
+                snapshot_id = await add_auction_snapshot(write_session, connected_realm_id)
+                await write_auction_rows(write_session, writes.rows(snapshot_id))
+                # Retire vanished auctions and switch the realm to the new snapshot
+                await apply_auction_snapshot(
+                    write_session,
+                    connected_realm_id,
+                    snapshot_id,
+                    delta.removals,
+                    len(auctions),
+                    payload_bytes=payload_bytes,
+                    duration_seconds=duration_seconds,
+                )
+                await write_price_rollups(
+                    write_session, connected_realm_id, rollup_hour, rollups
                 )
-                .values(active=False)
+                if last_modified is not None:
+                    await write_endpoint_state(write_session, endpoint, last_modified)
+                return snapshot_id
+
+            written = await self.writer.submit(
+                write_snapshot,
+                rows=len(writes) + len(delta.removals) + len(rollups),
+                label=f"realm {connected_realm_id}",
+            )
+        except Exception as e:
+            logging.error(
+                f"Auction extraction failed for realm {connected_realm_id}: {str(e)}"
+            )
+            done.set_result(False)
+            return done
+
+        def finish(written: asyncio.Future):
+            if written.cancelled() or written.exception() is not None:
+                self.stats["auctions_failed"] += len(writes)
+                self.realmIds_to_retry.append(connected_realm_id)
+                done.set_result(False)
+                return
+
+            snapshot_id = written.result()
+            if last_modified is not None:
+                self.endpoint_states[endpoint] = last_modified
+            self.stats["auctions_succeeded"] += len(writes)
+            self.stats["auctions_inserted"] += inserted
+            self.stats["auctions_updated"] += updated
+            self.stats["auctions_removed"] += len(delta.removals)
+            logging.info(
+                f"Realm {connected_realm_id} snapshot {snapshot_id}: "
+                f"{inserted} new, {updated} changed, "
+                f"{len(delta.removals)} removed, {delta.unchanged} unchanged"
             )
-            await session.commit()
-
-            # Process new auctions with active=True
-            batch_size = 5000
-            for i in range(0, len(auctions), batch_size):
-                batch = auctions[i:i + batch_size]
-                try:
-                    # Set active=True for all new auctions
-                    for auction in batch:
-                        auction["active"] = True
-
-                    self.stats["auctions_processed"] += len(batch)
-                    await upsert_auctions(batch)
-                    self.stats["auctions_succeeded"] += len(batch)
-                except Exception as e:
-                    self.stats["auctions_failed"] += len(batch)
-                    self.realmIds_to_retry.append(connected_realm_id)
-                    logging.error(f"Failed to process auction batch: {str(e)}")
 
             processing_time = time.perf_counter() - start_time
             logging.info(
                 f"Completed processing {len(auctions)} auctions for realm {connected_realm_id} "
                 f"in {processing_time:.2f} seconds"
             )
-            return True
+            done.set_result(True)
 
-        except Exception as e:
-            logging.error(
-                f"Auction extraction failed for realm {connected_realm_id}: {str(e)}"
-            )
-            return False
+        written.add_done_callback(finish)
+        return done
 
-    async def extract_auctions(self, session: AsyncSession, connected_realm_id: int):
-        """Extract and store auction data for a connected realm"""
-        return await self.process_realm_auctions(session, connected_realm_id)
+    async def extract_items(
+        self, item_entries: List[tuple], workers: Optional[int] = None
+    ) -> bool:
+        """Fetch metadata for items not yet in the database
 
-    async def process_batch(self, item_entries: List[tuple]):
-        """Process batch of items with dedicated session
+        A pool of workers pulls item IDs from a queue continuously, paced only
+        by the API rate limiter, and fetched items are written in bulk upserts
+        of ITEM_WRITE_BATCH_SIZE.
 
         Args:
             item_entries: List of tuples containing (item_id, extension)
+            workers: Concurrent fetchers, defaults to the limiter's concurrency
         """
-        try:
-            async with get_session() as session:
-                # Get all existing item IDs from the database
-                existing_items = await get_all_item_ids(session)
+        async with get_session() as session:
+            existing_items = await self.item_ids.ids(session)
+
+        pending: asyncio.Queue = asyncio.Queue()
+        for item_id, extension in item_entries:
+            if item_id in existing_items:
+                logging.debug(f"Skipping existing item {item_id}")
+                self.stats["items_skipped"] += 1
+            else:
+                pending.put_nowait((item_id, extension, 1))
+
+        if pending.empty():
+            logging.info("All items already exist, skipping item extraction")
+            return True
 
-                # Filter out existing items efficiently using set operations
-                items_to_process = [
-                    entry for entry in item_entries if entry[0] not in existing_items
-                ]
-                skipped_items = [
-                    entry for entry in item_entries if entry[0] in existing_items
-                ]
+        fetched: List[dict] = []
+        writes: List[tuple] = []
 
-                # Update stats for skipped items
-                for item_id, _ in skipped_items:
-                    logging.debug(f"Skipping existing item {item_id}")
-                    self.stats["items_skipped"] += 1
+        async def flush():
+            batch = fetched[:]
+            fetched.clear()
+            written = await self.writer.submit(
+                partial(upsert_items, items=batch),
+                rows=len(batch),
+                label="items",
+            )
+            writes.append((batch, written))
 
-                if not items_to_process:
-                    logging.info("All items in batch already exist, skipping batch")
-                    return True
+        async def worker():
+            while True:
+                try:
+                    item_id, extension, attempt = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
 
-                tasks = [
-                    self.process_single_item(item_id, extension, session)
-                    for item_id, extension in items_to_process
-                ]
-                results = await asyncio.gather(*tasks, return_exceptions=True)
+                if attempt == 1:
+                    self.stats["processed"] += 1
+                try:
+                    item_data = self.transform_item(await self.client.fetch_item(item_id))
+                except ValueError as e:
+                    # Missing or malformed items will not improve on retry
+                    self.stats["failed"] += 1
+                    logging.error(f"Item {item_id} error: {str(e)}")
+                    continue
+                except Exception as e:
+                    if attempt < ITEM_MAX_ATTEMPTS:
+                        self.stats["retries"] += 1
+                        pending.put_nowait((item_id, extension, attempt + 1))
+                    else:
+                        self.stats["failed"] += 1
+                        logging.error(f"Item {item_id} error: {str(e)}")
+                    continue
 
-                # Handle failed items
-                failed_items = [
-                    item_id
-                    for item_id, result in zip(items_to_process, results)
-                    if isinstance(result, Exception)
-                ]
+                item_data["extension"] = extension
+                fetched.append(item_data)
+                if len(fetched) >= ITEM_WRITE_BATCH_SIZE:
+                    await flush()
 
-                if failed_items:
-                    logging.info(f"Retrying {len(failed_items)} failed items")
-                    retry_results = await asyncio.gather(
-                        *[
-                            self.process_single_item(item_id, session)
-                            for item_id in failed_items
-                        ],
-                        return_exceptions=True,
-                    )
-                    # Update stats based on retry results
-                    self.stats["succeeded"] += sum(
-                        1 for res in retry_results if not isinstance(res, Exception)
-                    )
-                    self.stats["failed"] += sum(
-                        1 for res in retry_results if isinstance(res, Exception)
-                    )
-                return True
+        start_time = time.perf_counter()
+        workers = workers or self.client.rate_limiter.max_concurrent
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        if fetched:
+            await flush()
+
+        for batch, written in writes:
+            try:
+                await written
+                # Tracked only once the transaction has committed
+                self.item_ids.add(item["item_id"] for item in batch)
+                self.stats["succeeded"] += len(batch)
+            except Exception as e:
+                self.stats["failed"] += len(batch)
+                logging.error(f"Failed to write {len(batch)} items: {str(e)}")
+
+        logging.info(
+            f"Fetched {self.stats['processed']} items with {workers} workers "
+            f"in {time.perf_counter() - start_time:.2f} seconds"
+        )
+        return True
+
+    async def refresh_stale_items(
+        self, limit: int = ITEM_REFRESH_LIMIT, workers: int = ITEM_REFRESH_WORKERS
+    ):
+        """Revalidate stale cached item metadata and store what changed
+
+        Meant to run in the background alongside the auction phases, so it
+        uses only a few workers and a capped number of requests per run.
+        Only cached entries are revalidated, with their ETag and
+        Last-Modified validators; uncached items are left to
+        backfill_item_cache.
+        """
+        cache = self.client.item_cache
+        if cache is None:
+            return
+
+        try:
+            await self._refresh_items(cache.stale_item_ids(limit), workers)
         except Exception as e:
-            logging.error(f"Batch processing failed: {str(e)}")
-            return False
+            logging.error(f"Item metadata refresh failed: {str(e)}")
 
-    async def process_single_item(
-        self, item_id: int, extension: str, session: AsyncSession
+    async def backfill_item_cache(
+        self, limit: int = ITEM_BACKFILL_LIMIT, workers: int = ITEM_REFRESH_WORKERS
     ):
-        """Process item with proper session management"""
-        self.stats["processed"] += 1
+        """Fetch metadata for stored items that were never cached
+
+        Each of these is an unconditional request, so it runs after the
+        auction phase and fetches at most limit items per run; the cache
+        fills up over successive runs.
+        """
+        cache = self.client.item_cache
+        if cache is None or limit <= 0:
+            return
+
         try:
-            raw_data = await self.client.fetch_item(item_id)
-            item_data = self.transform_item(raw_data)
-            item_data["extension"] = extension  # Add extension to item data
-            await upsert_items(session, [item_data])
-            self.stats["succeeded"] += 1
-            return item_id
+            async with get_session() as session:
+                known_items = await self.item_ids.ids(session)
+            uncached = sorted(known_items - cache.cached_item_ids())
+            await self._refresh_items(uncached[:limit], workers)
         except Exception as e:
-            self.stats["failed"] += 1
-            logging.error(f"Item {item_id} error: {str(e)}")
-            raise
+            logging.error(f"Item cache backfill failed: {str(e)}")
+
+    async def _refresh_items(self, candidates: List[int], workers: int):
+        """Revalidate items against the API and update those that changed"""
+        if not candidates:
+            return
+
+        pending: asyncio.Queue = asyncio.Queue()
+        for item_id in candidates:
+            pending.put_nowait(item_id)
+        changed: List[dict] = []
+
+        async def worker():
+            while True:
+                try:
+                    item_id = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    raw_data = await self.client.revalidate_item(item_id)
+                    self.stats["items_revalidated"] += 1
+                    if raw_data is not None and raw_data["results"]:
+                        changed.append(self.transform_item(raw_data))
+                except Exception as e:
+                    logging.warning(f"Failed to refresh item {item_id}: {str(e)}")
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        if changed:
+            await self.writer.run(
+                partial(update_item_metadata, items=changed),
+                rows=len(changed),
+                label="item refresh",
+            )
+        self.stats["items_refreshed"] += len(changed)
+        logging.info(f"Revalidated {len(candidates)} items, {len(changed)} changed")
 
     def generate_report(self):
         """Generate extraction report in output/ directory"""
@@ -292,6 +500,8 @@ class ItemExtractor:
         report_dir.mkdir(exist_ok=True)
 
         timestamp = datetime.now().strftime("%d-%m-%Y-%H%M%S")
+        limiter_metrics = self.client.rate_limiter.metrics()
+        logging.info(f"Rate limiter metrics: {limiter_metrics}")
         report_path = report_dir / f"extraction_report_{timestamp}.md"
 
         report_content = f"""# Extraction Report - {timestamp}
@@ -302,23 +512,36 @@ class ItemExtractor:
 - Failed: {self.stats['failed']}
 - Skipped (Already Exist): {self.stats['items_skipped']}
 - Retry Attempts: {self.stats['retries']}
+- Revalidated From Cache: {self.stats['items_revalidated']}
+- Refreshed (Changed): {self.stats['items_refreshed']}
 
 ## Connected Realms Summary
 - Total Realms Processed: {self.stats['realms_processed']}
 - Successful: {self.stats['realms_succeeded']}
 - Failed: {self.stats['realms_failed']}
-- Skipped (Already Exist): {self.stats['realms_skipped']}
+- Refreshed (Past TTL): {self.stats['realms_refreshed']}
+- Skipped (Fresh): {self.stats['realms_skipped']}
 
 ## Auction Summary
 - Total Auctions Processed: {self.stats['auctions_processed']}
 - Successful: {self.stats['auctions_succeeded']}
 - Failed: {self.stats['auctions_failed']}
-- Skipped (Already Exist): {self.stats['auctions_skipped']}
+- Skipped (Unchanged): {self.stats['auctions_skipped']}
+- New: {self.stats['auctions_inserted']}
+- Changed: {self.stats['auctions_updated']}
+- Removed: {self.stats['auctions_removed']}
+- Snapshots Unchanged (304): {self.stats['snapshots_unchanged']}
 
 ## Commodity Summary
 - Total Commodities Processed: {self.stats['commodities_processed']}
 - Successful: {self.stats['commodities_succeeded']}
 - Failed: {self.stats['commodities_failed']}
+
+## Rate Limiter
+- Requests Sent: {limiter_metrics['requests_sent']}
+- Requests Delayed: {limiter_metrics['requests_delayed']}
+- Total Wait (s): {limiter_metrics['total_wait']}
+- Account Quota Remaining: {limiter_metrics['quota_remaining']}
         """
 
         with open(report_path, "w") as f:
@@ -331,6 +554,8 @@ async def main(item_entries: List[tuple]):
         item_entries: List of tuples containing (item_id, extension)
     """
     extractor = ItemExtractor()
+    extractor.client.item_cache = ItemCache()
+    refresh_task: Optional[asyncio.Task] = None
 
     try:
         # Create API client session first
@@ -338,20 +563,18 @@ async def main(item_entries: List[tuple]):
             # Process operations with dedicated sessions
             logging.info("Extracting connected realms data...")
             async with get_session() as session:
+                await extractor.load_endpoint_states(session)
                 realms_success = await extractor.extract_connected_realms(session)
 
             if not realms_success:
                 logging.error("Connected realms extraction failed")
                 return False
 
-            # Process items in batches with delay
             logging.info("Processing items...")
-            batch_size = 50
-            for i in range(0, len(item_entries), batch_size):
-                batch = item_entries[i:i + batch_size]
-                await extractor.process_batch(batch)
-                if i + batch_size < len(item_entries):  # Don't delay after last batch
-                    await asyncio.sleep(1)  # 1000ms = 1s
+            await extractor.extract_items(item_entries)
+
+            # Revalidate stale item metadata while commodities and auctions run
+            refresh_task = asyncio.create_task(extractor.refresh_stale_items())
 
             # Extract commodities first since they are global
             logging.info("Extracting commodity data...")
@@ -360,72 +583,60 @@ async def main(item_entries: List[tuple]):
                 logging.error("Commodities extraction failed")
                 # Continue with auctions even if commodities fail
 
-            # Extract auctions for all connected realms in parallel
+            # Extract auctions through the download/transform/write pipeline
             logging.info("Extracting auction data...")
+            # Reuses the index fetched during realm discovery
             realm_ids = await extractor.client.fetch_connected_realms_index()
+            pipeline = AuctionPipeline(extractor)
 
-            # Create semaphore to limit concurrent realm processing
-            realm_semaphore = asyncio.Semaphore(10)  # Process 10 realms at a time
-
-            # Collect failed realms during processing
-            failed_realms = []
-
-            async def process_realm_with_session(realm_id: int) -> bool:
-                async with realm_semaphore:  # Limit concurrent processing
-                    async with get_session() as session:  # Each realm gets its own session
-                        return await extractor.extract_auctions(session, realm_id)
-
-            # Create tasks for all realms with individual sessions
             start_time = time.perf_counter()
-            realm_tasks = [
-                process_realm_with_session(realm_id) for realm_id in realm_ids
-            ]
-            results = await asyncio.gather(*realm_tasks, return_exceptions=True)
-            processing_time = time.perf_counter() - start_time
+            results = await pipeline.run(realm_ids)
 
             # Retry failed realms
             max_retries = 3
             retry_attempt = 0
+            extractor.realmIds_to_retry = [
+                realm_id for realm_id in realm_ids if not results.get(realm_id)
+            ]
             while extractor.realmIds_to_retry and retry_attempt < max_retries:
                 retry_attempt += 1
                 logging.info(
                     f"Retry attempt {retry_attempt} for failed realms: {extractor.realmIds_to_retry}"
                 )
-                current_failed = []
-
-                for realm_id in extractor.realmIds_to_retry:
-                    try:
-                        realm_success = await process_realm_with_session(realm_id)
-                        if not realm_success:
-                            current_failed.append(realm_id)
-                    except Exception as e:
-                        logging.error(f"Error retrying realm {realm_id}: {e}")
-                        current_failed.append(realm_id)
-
-                extractor.realmIds_to_retry = current_failed
-
-            # Handle results and any exceptions
-            extractor.realmIds_to_retry = [
-                realm_id
-                for realm_id, result in zip(realm_ids, results)
-                if isinstance(result, Exception) or result is False
-            ]
+                retry_results = await pipeline.run(extractor.realmIds_to_retry)
+                extractor.realmIds_to_retry = [
+                    realm_id
+                    for realm_id in extractor.realmIds_to_retry
+                    if not retry_results.get(realm_id)
+                ]
+            processing_time = time.perf_counter() - start_time
 
-            if extractor.realmIds_to_retry:
+            failed_realms = extractor.realmIds_to_retry
+            if failed_realms:
                 logging.error(
-                    f"After {max_retries} retry attempts, the following realms still failed: {extractor.realmIds_to_retry}"
+                    f"After {max_retries} retry attempts, the following realms still failed: {failed_realms}"
                 )
 
             total_realms = len(realm_ids)
-            successful_realms = total_realms - len(extractor.realmIds_to_retry)
+            successful_realms = total_realms - len(failed_realms)
             logging.info(
                 f"Completed auction extraction for {successful_realms}/{total_realms} realms "
                 f"in {processing_time:.2f} seconds"
             )
 
+            await refresh_task
+            # Unconditional item requests wait until the auctions are in
+            await extractor.backfill_item_cache()
             extractor.generate_report()
             return len(failed_realms) == 0
     except Exception as e:
         logging.critical(f"Extraction aborted: {str(e)}")
         extractor.generate_report()
         return False
+    finally:
+        if refresh_task is not None and not refresh_task.done():
+            refresh_task.cancel()
+            await asyncio.gather(refresh_task, return_exceptions=True)
+        # Flush queued writes and release the write connection
+        await extractor.writer.close()
+        extractor.client.item_cache.close()
@@ -0,0 +1,315 @@
+# src/extractor/pipeline.py
+import asyncio
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Collection, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from src.database.operations import (
+    get_connected_realm_populations,
+    get_realm_ingest_history,
+    get_session,
+)
+
+from .api_client import auctions_endpoint
+from .auction_batch import AuctionBatch
+from .transform import parse_auction_file
+
+_DONE = None  # Queue sentinel telling a stage worker to stop
+
+# Population types whose realms are fetched before all others, e.g. "Full,High"
+PRIORITY_POPULATIONS = tuple(
+    name.strip()
+    for name in os.getenv("AUCTION_PRIORITY_POPULATIONS", "").split(",")
+    if name.strip()
+)
+
+
+def schedule_realms(
+    realm_ids: Iterable[int],
+    history: Mapping[int, Tuple[int, Optional[float]]],
+    populations: Optional[Mapping[int, Optional[str]]] = None,
+    priority_populations: Collection[str] = (),
+) -> List[int]:
+    """Order realms so the longest jobs start first
+
+    Realms are sorted by the payload size of their last measured snapshot,
+    largest first, with the previous duration breaking ties. Starting the
+    longest jobs first keeps a large realm from setting the tail of the run.
+    Realms without history have unknown cost and go first. Realms whose
+    population type is in priority_populations are scheduled before all
+    others so their snapshots are the freshest.
+    """
+    populations = populations or {}
+
+    def key(realm_id: int):
+        priority = populations.get(realm_id) in priority_populations
+        if realm_id not in history:
+            return (not priority, 0, 0.0)
+        payload_bytes, duration = history[realm_id]
+        return (not priority, 1, -payload_bytes, -(duration or 0.0))
+
+    return sorted(realm_ids, key=key)
+
+
+def _parse_timed(
+    path: str, connected_realm_id: int, items_ids: set[int], fetched_at: datetime
+) -> Tuple[AuctionBatch, float]:
+    """parse_auction_file along with its run time, measured in the worker
+
+    Timing in the worker leaves out any wait for a free pool process.
+    """
+    started_at = time.perf_counter()
+    auctions = parse_auction_file(path, connected_realm_id, items_ids, fetched_at)
+    return auctions, time.perf_counter() - started_at
+
+
+@dataclass
+class DownloadedPayload:
+    """Raw auction payload spooled to disk by a downloader"""
+    connected_realm_id: int
+    path: str
+    size: int
+    download_seconds: float
+    fetched_at: datetime  # Timestamp shared by every auction in the snapshot
+
+
+@dataclass
+class ParsedPayload:
+    """Tracked auctions of one realm, ready to be written"""
+    connected_realm_id: int
+    auctions: AuctionBatch
+    size: int
+    # Download plus parse time; time spent waiting on queues is left out
+    duration_seconds: float
+
+
+class AuctionPipeline:
+    """Run realm auction extraction as download, transform and write stages.
+
+    Downloaders stream payloads to temporary files, transform workers parse
+    them in a process pool so realms decode in parallel on every core, and a
+    write stage diffs each realm and queues it for the extractor's
+    DatabaseWriter. The stages are joined by bounded queues, so at most queue_size payloads
+    wait on disk and queue_size parsed payloads wait in memory; when the
+    writer falls behind, downloaders block instead of piling up data.
+    Realms are downloaded in schedule_realms order.
+    """
+
+    def __init__(
+        self,
+        extractor,
+        downloaders: int = 10,
+        transformers: Optional[int] = None,
+        queue_size: int = 4,
+        spool_dir: Optional[str] = None,
+        executor: Optional[Executor] = None,
+        priority_populations: Collection[str] = PRIORITY_POPULATIONS,
+    ):
+        self.extractor = extractor
+        self.downloaders = downloaders
+        self.transformers = transformers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.spool_dir = spool_dir
+        self.executor = executor  # Defaults to a process pool per run
+        self.priority_populations = priority_populations
+
+    async def run(self, realm_ids: Iterable[int]) -> Dict[int, bool]:
+        """Extract auctions for the given realms
+
+        Returns:
+            Dict mapping each realm ID to whether its snapshot is up to date
+        """
+        results: Dict[int, bool] = {}
+        async with get_session() as session:
+            populations = await get_connected_realm_populations(session)
+            history = await get_realm_ingest_history(session)
+            item_ids = await self.extractor.item_ids.ids(session)
+
+        known_realms = []
+        for realm_id in realm_ids:
+            if realm_id in populations:
+                known_realms.append(realm_id)
+            else:
+                logging.error(f"Connected realm {realm_id} not found in database")
+                results[realm_id] = False
+
+        pending: asyncio.Queue = asyncio.Queue()
+        for realm_id in schedule_realms(
+            known_realms, history, populations, self.priority_populations
+        ):
+            pending.put_nowait(realm_id)
+
+        # Keep every transform worker fed while downloads are ahead
+        downloaded: asyncio.Queue = asyncio.Queue(
+            maxsize=max(self.queue_size, self.transformers)
+        )
+        parsed: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        executor = self.executor or ProcessPoolExecutor(
+            max_workers=self.transformers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+        download_tasks = [
+            asyncio.create_task(self._download_worker(pending, downloaded, results))
+            for _ in range(self.downloaders)
+        ]
+        transform_tasks = [
+            asyncio.create_task(
+                self._transform_worker(downloaded, parsed, executor, item_ids, results)
+            )
+            for _ in range(self.transformers)
+        ]
+        writer_task = asyncio.create_task(self._write_worker(parsed, results))
+        tasks = download_tasks + transform_tasks + [writer_task]
+
+        try:
+            await asyncio.gather(*download_tasks)
+            for _ in transform_tasks:
+                await downloaded.put(_DONE)
+            await asyncio.gather(*transform_tasks)
+            await parsed.put(_DONE)
+            await writer_task
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # Remove payloads left behind by an aborted run
+            while not downloaded.empty():
+                payload = downloaded.get_nowait()
+                if payload is not _DONE:
+                    self._remove(payload.path)
+            if executor is not self.executor:
+                # Wait for the workers to exit off the event loop, so the
+                # writer and HTTP client keep running meanwhile
+                await asyncio.to_thread(executor.shutdown, cancel_futures=True)
+
+        return results
+
+    async def _download_worker(
+        self, pending: asyncio.Queue, downloaded: asyncio.Queue, results: Dict[int, bool]
+    ):
+        """Download realm payloads to temporary files until none are left"""
+        while True:
+            try:
+                realm_id = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            fd, path = tempfile.mkstemp(
+                prefix=f"auctions-{realm_id}-", suffix=".json", dir=self.spool_dir
+            )
+            started_at = time.perf_counter()
+            try:
+                with os.fdopen(fd, "wb") as dest:
+                    size = await self.extractor.client.download_auctions(
+                        realm_id,
+                        dest,
+                        if_modified_since=self.extractor.endpoint_states.get(
+                            auctions_endpoint(realm_id)
+                        ),
+                    )
+                download_seconds = time.perf_counter() - started_at
+            except Exception as e:
+                self._remove(path)
+                logging.error(f"Auction download failed for realm {realm_id}: {str(e)}")
+                results[realm_id] = False
+                continue
+
+            if size is None:
+                self._remove(path)
+                logging.info(f"Auction snapshot unchanged for realm {realm_id}, skipping")
+                self.extractor.stats["snapshots_unchanged"] += 1
+                results[realm_id] = True
+                continue
+
+            # Blocks while the transform stage is behind
+            await downloaded.put(
+                DownloadedPayload(
+                    realm_id, path, size, download_seconds, datetime.utcnow()
+                )
+            )
+
+    async def _transform_worker(
+        self,
+        downloaded: asyncio.Queue,
+        parsed: asyncio.Queue,
+        executor: Executor,
+        item_ids: set[int],
+        results: Dict[int, bool],
+    ):
+        """Parse spooled payloads in the executor"""
+        loop = asyncio.get_running_loop()
+        while True:
+            payload = await downloaded.get()
+            if payload is _DONE:
+                return
+
+            realm_id = payload.connected_realm_id
+            try:
+                if payload.size == 0:
+                    auctions = AuctionBatch.empty(realm_id, payload.fetched_at)
+                    parse_seconds = 0.0
+                else:
+                    auctions, parse_seconds = await loop.run_in_executor(
+                        executor,
+                        _parse_timed,
+                        payload.path,
+                        realm_id,
+                        item_ids,
+                        payload.fetched_at,
+                    )
+            except Exception as e:
+                logging.error(f"Auction parsing failed for realm {realm_id}: {str(e)}")
+                results[realm_id] = False
+                continue
+            finally:
+                self._remove(payload.path)
+
+            # Blocks while the writer is behind
+            await parsed.put(
+                ParsedPayload(
+                    realm_id,
+                    auctions,
+                    payload.size,
+                    payload.download_seconds + parse_seconds,
+                )
+            )
+
+    async def _write_worker(self, parsed: asyncio.Queue, results: Dict[int, bool]):
+        """Diff parsed payloads and hand them to the database writer
+
+        Realms are queued without waiting for their commit, so the writer
+        can group consecutive realms into one transaction.
+        """
+        written: Dict[int, asyncio.Future] = {}
+        async with get_session() as session:
+            while True:
+                payload = await parsed.get()
+                if payload is _DONE:
+                    break
+
+                realm_id = payload.connected_realm_id
+                # Blocks while the writer queue is full
+                written[realm_id] = await self.extractor.queue_realm_auctions(
+                    session,
+                    realm_id,
+                    payload.auctions,
+                    payload_bytes=payload.size,
+                    duration_seconds=payload.duration_seconds,
+                )
+
+        for realm_id, future in written.items():
+            results[realm_id] = await future
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError as e:
+            logging.warning(f"Could not remove spooled payload {path}: {e}")
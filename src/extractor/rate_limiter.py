@@ -3,66 +3,181 @@ import time
 import random
 import logging
 import httpx
-from typing import Optional
+from typing import Callable, Optional
 from contextlib import asynccontextmanager
 
+class TokenBucket:
+    """Token bucket refilled continuously up to its capacity"""
+    def __init__(self, capacity: float, refill_rate: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.refill_rate = refill_rate  # Tokens added per second
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_rate)
+        self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        """Tokens currently available"""
+        self._refill()
+        return self._tokens
+
+    def wait_time(self) -> float:
+        """Seconds until one token is available"""
+        tokens = self.tokens
+        if tokens >= 1:
+            return 0.0
+        return (1 - tokens) / self.refill_rate
+
+    def consume(self):
+        """Take one token; callers check wait_time() first"""
+        self._refill()
+        self._tokens -= 1
+
+    def drain(self):
+        """Drop all tokens so the bucket has to refill before the next request"""
+        self._refill()
+        self._tokens = min(self._tokens, 0)
+
 class RateLimiter:
-    """Enforces rate limits and concurrency constraints for API requests"""
-    def __init__(self, max_concurrent: int = 20, req_per_second: int = 100):
+    """Enforces rate limits and concurrency constraints for API requests
+
+    Requests draw from a per-second and a per-hour token bucket, so bursts up
+    to the budget go out immediately. The account quota reported in the
+    ``x-account-ratelimit-*`` response headers is tracked as well: once it is
+    used up, requests wait for its reset. A 429 pauses every caller for the
+    ``Retry-After`` period. State changes happen under one lock.
+    """
+    def __init__(
+        self,
+        max_concurrent: int = 20,
+        req_per_second: int = 100,
+        req_per_hour: int = 36000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
         self.semaphore = asyncio.Semaphore(max_concurrent)
-        self.last_request: Optional[float] = None
-        self.min_interval = 1.0 / req_per_second
-        self.remaining_requests = req_per_second
-        self.reset_time: Optional[float] = None
+        self.max_concurrent = max_concurrent
+        self.second_bucket = TokenBucket(req_per_second, req_per_second, clock)
+        self.hour_bucket = TokenBucket(req_per_hour, req_per_hour / 3600, clock)
+        self.remaining_requests: Optional[int] = None  # Account quota left, from headers
+        self.quota_limit: Optional[int] = None
+        self.reset_time: Optional[float] = None  # When the account quota resets
+        self.blocked_until: Optional[float] = None  # Set by 429 responses
+        self.requests_sent = 0
+        self.requests_delayed = 0
+        self.total_wait = 0.0
+        self._clock = clock
+        self._sleep = asyncio.sleep
+        self._lock = asyncio.Lock()
+
+    @property
+    def tokens(self) -> float:
+        """Requests that can be sent right now without waiting"""
+        return min(self.second_bucket.tokens, self.hour_bucket.tokens)
+
+    def wait_time(self) -> float:
+        """Seconds until the next request may be sent"""
+        now = self._clock()
+        wait = max(self.second_bucket.wait_time(), self.hour_bucket.wait_time())
+        if self.blocked_until is not None:
+            wait = max(wait, self.blocked_until - now)
+        if self.remaining_requests is not None and self.remaining_requests <= 0:
+            if self.reset_time is not None and now < self.reset_time:
+                wait = max(wait, self.reset_time - now)
+        return max(wait, 0.0)
+
+    def metrics(self) -> dict:
+        """Current limiter state for logging and reports"""
+        return {
+            "tokens_per_second": round(self.second_bucket.tokens, 2),
+            "tokens_per_hour": round(self.hour_bucket.tokens, 2),
+            "quota_remaining": self.remaining_requests,
+            "wait_time": round(self.wait_time(), 3),
+            "requests_sent": self.requests_sent,
+            "requests_delayed": self.requests_delayed,
+            "total_wait": round(self.total_wait, 3),
+        }
+
+    async def acquire(self):
+        """Wait until both budgets and the account quota allow one request"""
+        async with self._lock:
+            waited = False
+            while True:
+                self._roll_quota_window()
+                wait = self.wait_time()
+                if wait <= 0:
+                    break
+                waited = True
+                self.total_wait += wait
+                await self._sleep(wait)
+
+            self.second_bucket.consume()
+            self.hour_bucket.consume()
+            if self.remaining_requests is not None:
+                self.remaining_requests -= 1
+            self.requests_sent += 1
+            if waited:
+                self.requests_delayed += 1
+
+    def _roll_quota_window(self):
+        """Restore the account quota once its reset time has passed"""
+        if self.reset_time is not None and self._clock() >= self.reset_time:
+            self.remaining_requests = self.quota_limit
+            self.reset_time = None
 
     @asynccontextmanager
     async def throttle(self):
         """Context manager for rate-limited API calls"""
         async with self.semaphore:
-            now = time.monotonic()
-            if self.last_request is not None:
-                elapsed = now - self.last_request
-                if elapsed < self.min_interval:
-                    await asyncio.sleep(self.min_interval - elapsed)
-            
-            self.last_request = now
-            try:
-                yield
-            finally:
-                self.last_request = time.monotonic()
+            await self.acquire()
+            yield
 
     async def execute_with_retry(self, coro, max_retries: int = 3):
-        """Execute request with Blizzard-specific rate limit handling"""
+        """Execute request with Blizzard-specific rate limit handling
+
+        Args:
+            coro: Awaitable request, or a zero-argument callable returning one.
+                Only callables can be re-issued when the request is retried.
+        """
         retry_delay = 1.0
         last_error = None
-        
+
         for attempt in range(max_retries + 1):
             try:
                 async with self.throttle():
-                    # Execute the coroutine as is
-                    response = await coro
+                    # Create a fresh request per attempt when given a factory
+                    response = await (coro() if callable(coro) else coro)
                     if hasattr(response, 'headers'):
                         self._update_limits_from_headers(response.headers)
                     return response
             except httpx.HTTPStatusError as e:
                 last_error = e
+                self._update_limits_from_headers(e.response.headers)
                 if e.response.status_code == 429:
-                    retry_after = e.response.headers.get("Retry-After", "1")
-                    retry_delay = float(retry_after) + 0.5  # Add buffer
-                    logging.warning(f"Rate limited. Retrying in {retry_delay}s")
+                    retry_after = float(e.response.headers.get("Retry-After", "1")) + 0.5  # Add buffer
+                    self._block_for(retry_after)
+                    logging.warning(f"Rate limited. All requests paused for {retry_after}s")
                 elif not self.is_retryable(e):
                     raise
-                
+
                 if attempt == max_retries:
                     logging.error(f"Max retries ({max_retries}) reached. Last error: {e}")
                     raise
-                    
-                await asyncio.sleep(retry_delay)
-                retry_delay = min(retry_delay * 1.5 + random.uniform(0, 0.1), 30.0)  # Exponential backoff with jitter and max delay
+
+                if e.response.status_code != 429:
+                    # The limiter already holds everyone back after a 429
+                    await self._sleep(retry_delay)
+                    retry_delay = min(retry_delay * 1.5 + random.uniform(0, 0.1), 30.0)  # Exponential backoff with jitter and max delay
             except Exception as e:
                 logging.error(f"Unexpected error during request: {e}")
                 raise
-        
+
         if last_error:
             raise last_error
         raise RuntimeError("Request failed after all retries")
@@ -73,18 +188,30 @@ class RateLimiter:
             return error.response.status_code in {429, 500, 502, 503, 504}
         return False
 
-    def _update_limits_from_headers(self, headers: dict):
-        """Parse Blizzard rate limit headers and adjust limits"""
-        limit = int(headers.get("x-account-ratelimit-limit", 100))
-        remaining = int(headers.get("x-account-ratelimit-remaining", limit))
-        reset_seconds = int(headers.get("x-account-ratelimit-reset", 1))
-        
+    def _block_for(self, seconds: float):
+        """Pause all requests and empty the per-second budget"""
+        self.blocked_until = max(self.blocked_until or 0.0, self._clock() + seconds)
+        self.second_bucket.drain()
+
+    def _update_limits_from_headers(self, headers):
+        """Sync the account quota with Blizzard rate limit headers"""
+        if "x-account-ratelimit-remaining" not in headers:
+            return
+        try:
+            remaining = int(headers["x-account-ratelimit-remaining"])
+            limit = int(headers.get("x-account-ratelimit-limit", remaining))
+            reset_seconds = float(headers.get("x-account-ratelimit-reset", 1))
+        except ValueError:
+            logging.debug(f"Ignoring malformed rate limit headers: {dict(headers)}")
+            return
+
+        # The server's view of the quota is authoritative
+        self.quota_limit = limit
         self.remaining_requests = remaining
-        self.reset_time = time.monotonic() + reset_seconds
-        
-        # Dynamically adjust rate limiting parameters
-        self.min_interval = max(1.0 / limit, 0.01)  # At least 10ms between requests
-        
-        if remaining < 5:  # Add buffer when approaching limit
-            self.min_interval *= 1.2
-            logging.warning(f"Rate limit buffer activated. {remaining} requests remaining")
+        self.reset_time = self._clock() + reset_seconds
+
+        if remaining < 5:
+            logging.warning(
+                f"Rate limit quota nearly exhausted. {remaining} requests remaining, "
+                f"resets in {reset_seconds}s"
+            )
@@ -4,8 +4,8 @@ import os
 from pathlib import Path
 from typing import List
 
-from src.database.init_db import initialize_database
-from src.database.operations import delete_old_auctions, delete_all_commodities
+from src.database.init_db import dispose_engine, initialize_database
+from src.database.operations import delete_old_auctions
 from src.extractor.main import main as run_extraction
 
 # Configure logging
@@ -57,9 +57,17 @@ async def extraction_wrapper():
     ):
         raise RuntimeError("Missing Blizzard API credentials in environment variables")
 
-    # Initialize database
-    await initialize_database()
+    try:
+        # Initialize database
+        await initialize_database()
+        return await run_with_database()
+    finally:
+        # Close the shared connection pool on shutdown
+        await dispose_engine()
+
 
+async def run_with_database():
+    """Run cleanup and extraction against the initialized database"""
     # Delete auctions older than 3 days
     try:
         deleted_count = await delete_old_auctions(days=3)
@@ -68,13 +76,8 @@ async def extraction_wrapper():
         logger.error(f"Failed to delete old auctions: {str(e)}")
         # Continue with extraction even if cleanup fails
 
-    # Delete all commodities before new extraction
-    try:
-        deleted_count = await delete_all_commodities()
-        logger.info(f"Cleaned up {deleted_count} old commodities")
-    except Exception as e:
-        logger.error(f"Failed to delete old commodities: {str(e)}")
-        # Continue with extraction even if cleanup fails
+    # Commodities are replaced by the extractor once a changed snapshot
+    # has been downloaded, so an unchanged one keeps the stored data
 
     # Read items with extensions
     item_entries = read_item_ids()
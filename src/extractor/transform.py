@@ -0,0 +1,68 @@
+# src/extractor/transform.py
+"""Auction payload transforms.
+
+These are plain module-level functions so they can run in worker processes.
+Auctions and commodities are collected into columnar batches with one
+timestamp per snapshot, and the per-row path does no logging unless a row is malformed.
+"""
+import logging
+from datetime import datetime
+import ijson
+
+from .auction_batch import AuctionBatch, AuctionBatchBuilder
+from .commodity_batch import CommodityBatchBuilder
+
+
+def add_auction(
+    builder: AuctionBatchBuilder, auction: dict, items_ids: set[int]
+) -> bool:
+    """Append a raw auction to the batch if its item is tracked"""
+    try:
+        item_id = auction["item"]["id"]
+        if item_id not in items_ids:
+            return False
+
+        builder.append(
+            auction["id"],
+            item_id,
+            auction.get("buyout", 0),  # Use 0 if no buyout price
+            auction.get("quantity", 1),  # Default to 1 if not specified
+            auction.get("time_left", ""),
+        )
+        return True
+    except (KeyError, TypeError) as e:
+        logging.warning(f"Failed to transform auction data: {e}, auction: {auction}")
+        return False
+
+
+def add_commodity(builder: CommodityBatchBuilder, auction: dict) -> bool:
+    """Append a raw commodity listing to the batch"""
+    try:
+        item_id = auction["item"]["id"]
+        if not item_id:
+            logging.warning(f"Could not extract item ID from commodity: {auction}")
+            return False
+
+        builder.append(
+            item_id,
+            auction.get("quantity", 1),
+            auction.get("unit_price", 0),
+        )
+        return True
+    except (KeyError, TypeError) as e:
+        logging.warning(f"Failed to transform commodity data: {e}, auction: {auction}")
+        return False
+
+
+def parse_auction_file(
+    path: str,
+    connected_realm_id: int,
+    items_ids: set[int],
+    last_modified: datetime,
+) -> AuctionBatch:
+    """Parse a downloaded auction payload, keeping tracked items only"""
+    builder = AuctionBatchBuilder(connected_realm_id, last_modified)
+    with open(path, "rb") as source:
+        for auction in ijson.items(source, "auctions.item", use_float=True):
+            add_auction(builder, auction, items_ids)
+    return builder.build()
@@ -0,0 +1,53 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import create_engine
+
+from src.database import init_db, operations
+from src.database.models import Base
+
+
+@pytest.fixture
+def temp_database(tmp_path, monkeypatch):
+    """Point the shared async engine at a fresh SQLite file."""
+    monkeypatch.setattr(
+        init_db, "DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"
+    )
+    monkeypatch.setattr(init_db, "_engine", None)
+    yield
+
+
+@pytest_asyncio.fixture
+async def async_database(temp_database):
+    """Shared async engine on a fresh SQLite file with the schema created."""
+    engine = await init_db.get_engine()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await init_db.dispose_engine()
+
+
+@pytest.fixture
+def api_database(tmp_path, monkeypatch):
+    """Point the API's sync engine at a fresh SQLite file with the schema created."""
+    url = f"sqlite:///{tmp_path / 'api.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    monkeypatch.setattr(init_db, "SYNC_DATABASE_URL", url)
+    monkeypatch.setattr(init_db, "_sync_engine", None)
+    monkeypatch.setattr(operations, "_SessionLocal", None)
+    yield url
+    operations.close_session_factory()
+
+
+@pytest.fixture
+def ingest_database(async_database, monkeypatch):
+    """Point the API's sync engine at the async engine's database file."""
+    monkeypatch.setattr(
+        init_db, "SYNC_DATABASE_URL", init_db.DATABASE_URL.replace("+aiosqlite", "")
+    )
+    monkeypatch.setattr(init_db, "_sync_engine", None)
+    monkeypatch.setattr(operations, "_SessionLocal", None)
+    yield async_database
+    operations.close_session_factory()
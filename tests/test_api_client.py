@@ -0,0 +1,262 @@
+import json
+from datetime import datetime
+
+import httpx
+import pytest
+from sqlalchemy import func, select
+
+from src.database.models import CommodityPriceHistory, Item
+from src.database.operations import get_session
+from src.extractor.api_client import COMMODITIES_ENDPOINT, BlizzardAPIClient
+from src.extractor.item_cache import ItemCache
+from src.extractor.main import ItemExtractor
+from src.extractor.transform import parse_auction_file
+
+AUCTIONS_PAYLOAD = {
+    "_links": {"self": {"href": "https://eu.api.blizzard.com/..."}},
+    "connected_realm": {"href": "https://eu.api.blizzard.com/..."},
+    "auctions": [
+        {"id": 1, "item": {"id": 10}, "buyout": 5000, "quantity": 2, "time_left": "LONG"},
+        {"id": 2, "item": {"id": 99}, "buyout": 100, "quantity": 1, "time_left": "SHORT"},
+        {"id": 3, "item": {"id": 10, "modifiers": [{"type": 9, "value": 1}]}, "quantity": 1},
+        {"id": 4, "quantity": 1},
+    ],
+}
+
+
+def chunked(payload: dict, size: int = 7):
+    """Serve a JSON payload in small chunks to exercise incremental parsing."""
+    body = json.dumps(payload).encode()
+
+    async def stream():
+        for i in range(0, len(body), size):
+            yield body[i:i + size]
+
+    return stream()
+
+
+def make_client(handler) -> BlizzardAPIClient:
+    client = BlizzardAPIClient("id", "secret")
+    client.access_token = "token"
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+@pytest.mark.asyncio
+async def test_download_auctions_spools_and_parses(tmp_path):
+    def handler(request):
+        assert request.headers["Authorization"] == "Bearer token"
+        return httpx.Response(200, content=chunked(AUCTIONS_PAYLOAD))
+
+    client = make_client(handler)
+    path = tmp_path / "auctions.json"
+    with open(path, "wb") as dest:
+        size = await client.download_auctions(1305, dest)
+    assert size == len(json.dumps(AUCTIONS_PAYLOAD).encode())
+
+    auctions = parse_auction_file(str(path), 1305, {10}, datetime.utcnow())
+    assert auctions.auction_id.tolist() == [1, 3]
+    assert auctions.connected_realm_id == 1305
+    assert auctions.buyout_price.tolist() == [5000, 0]  # No buyout price on the second
+    assert auctions.quantity.tolist() == [2, 1]
+    assert [auctions.time_left_labels[code] for code in auctions.time_left] == ["LONG", ""]
+    await client._client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_download_auctions_missing_realm(tmp_path):
+    client = make_client(lambda request: httpx.Response(404, json={"code": 404}))
+    with open(tmp_path / "auctions.json", "wb") as dest:
+        assert await client.download_auctions(1305, dest) == 0
+    await client._client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_fetch_commodities_streams_and_aggregates():
+    payload = {
+        "auctions": [
+            {"id": 1, "item": {"id": 11}, "quantity": 5, "unit_price": 300, "time_left": "LONG"},
+            {"id": 2, "item": {"id": 10}, "quantity": 20, "unit_price": 150, "time_left": "LONG"},
+            {"id": 3, "item": {"id": 10}, "quantity": 2, "unit_price": 120, "time_left": "SHORT"},
+            {"id": 4, "item": {"id": 10}, "quantity": 7, "unit_price": 150, "time_left": "SHORT"},
+        ]
+    }
+    client = make_client(lambda request: httpx.Response(200, content=chunked(payload)))
+    commodities = await client.fetch_commodities()
+    assert len(commodities) == 4
+
+    rows = [row[:3] for row in commodities.aggregate().rows()]
+    assert rows == [(10, 2, 120), (10, 27, 150), (11, 5, 300)]
+    await client._client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_same_commodity_snapshot_is_recorded_once(async_database):
+    payload = {
+        "auctions": [
+            {"id": 1, "item": {"id": 10}, "quantity": 20, "unit_price": 150},
+            {"id": 2, "item": {"id": 11}, "quantity": 5, "unit_price": 300},
+        ]
+    }
+    extractor = ItemExtractor()
+    extractor.client = make_client(
+        lambda request: httpx.Response(
+            200,
+            content=chunked(payload),
+            headers={"Last-Modified": "Sat, 17 Oct 2026 10:00:00 GMT"},
+        )
+    )
+
+    # Fetched in full both times, as after a lost endpoint state
+    for _ in range(2):
+        extractor.endpoint_states.pop(COMMODITIES_ENDPOINT, None)
+        assert await extractor.extract_commodities()
+    await extractor.writer.close()
+    await extractor.client._client.aclose()
+
+    async with get_session() as session:
+        rows = (
+            await session.execute(
+                select(
+                    CommodityPriceHistory.item_id,
+                    func.count(),
+                    func.min(CommodityPriceHistory.snapshot_time),
+                ).group_by(CommodityPriceHistory.item_id)
+            )
+        ).all()
+    snapshot_time = datetime(2026, 10, 17, 10, 0)
+    assert rows == [(10, 1, snapshot_time), (11, 1, snapshot_time)]
+
+
+@pytest.mark.asyncio
+async def test_conditional_fetch_tracks_last_modified(tmp_path):
+    last_modified = "Sat, 17 Oct 2026 10:00:00 GMT"
+
+    def handler(request):
+        if request.headers.get("If-Modified-Since") == last_modified:
+            return httpx.Response(304)
+        return httpx.Response(
+            200,
+            content=chunked(AUCTIONS_PAYLOAD),
+            headers={"Last-Modified": last_modified},
+        )
+
+    client = make_client(handler)
+    with open(tmp_path / "auctions.json", "wb") as dest:
+        assert await client.download_auctions(1305, dest) > 0
+        assert client.last_modified == {"auctions/1305": last_modified}
+
+        since = client.last_modified["auctions/1305"]
+        assert await client.download_auctions(1305, dest, if_modified_since=since) is None
+    await client._client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_token_is_refreshed_before_expiry():
+    now = [0.0]
+    tokens = iter(["first", "second"])
+    seen = []
+
+    def handler(request):
+        if request.url.host == "oauth.battle.net":
+            return httpx.Response(200, json={"access_token": next(tokens), "expires_in": 3600})
+        seen.append(request.headers["Authorization"])
+        return httpx.Response(200, json={"connected_realms": []})
+
+    client = BlizzardAPIClient("id", "secret")
+    client._clock = lambda: now[0]
+    client._create_client = lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    async with client.session() as http:
+        async with client.session() as nested:
+            assert nested is http  # Nested sessions share the pooled client
+        await client.fetch_connected_realms_index()
+        now[0] = 3400.0  # Within the refresh margin
+        await client.fetch_connected_realms_index()
+
+    assert seen == ["Bearer first", "Bearer second"]
+    assert client._client is None
+
+
+@pytest.mark.asyncio
+async def test_item_cache_revalidates_and_caches_missing_items(tmp_path):
+    now = [1000.0]
+    requests = []
+
+    def handler(request):
+        item_id = int(request.url.path.split("/")[-1])
+        requests.append((item_id, request.headers.get("If-None-Match")))
+        if item_id == 404:
+            return httpx.Response(404, json={"code": 404})
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json={"id": item_id, "name": "Ore"}, headers={"ETag": '"v1"'})
+
+    client = make_client(handler)
+    client.item_cache = ItemCache(
+        str(tmp_path / "items.db"), max_age=100, negative_ttl=50, clock=lambda: now[0]
+    )
+
+    expected = {"results": [{"data": {"id": 10, "name": "Ore"}}]}
+    assert await client.fetch_item(10) == expected
+    assert await client.fetch_item(10) == expected  # Fresh, served from disk
+    assert await client.fetch_item(404) == {"results": []}
+    assert await client.fetch_item(404) == {"results": []}  # Negative entry
+    assert requests == [(10, None), (404, None)]
+
+    now[0] += 75  # Negative entry expired, item still fresh
+    assert await client.fetch_item(404) == {"results": []}
+    assert await client.fetch_item(10) == expected
+    assert requests[-1] == (404, None)
+
+    now[0] += 50  # Item stale: revalidated with its ETag
+    assert await client.revalidate_item(10) is None
+    assert requests[-1] == (10, '"v1"')
+    assert client.item_cache.stale_item_ids(10) == []
+
+    client.item_cache.close()
+    await client._client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_uncached_items_are_backfilled_under_a_cap(async_database, tmp_path):
+    requests = []
+
+    def handler(request):
+        item_id = int(request.url.path.split("/")[-1])
+        requests.append(item_id)
+        return httpx.Response(
+            200,
+            json={
+                "id": item_id,
+                "name": f"Item {item_id}",
+                "item_class": {"id": 7, "name": "Tradeskill"},
+                "item_subclass": {"id": 1, "name": "Parts"},
+            },
+        )
+
+    async with get_session() as session:
+        for item_id in (1, 2, 3):
+            session.add(Item(item_id=item_id, item_name="Old"))
+        await session.commit()
+
+    extractor = ItemExtractor()
+    extractor.client = make_client(handler)
+    extractor.client.item_cache = ItemCache(str(tmp_path / "items.db"))
+
+    # The background refresh only revalidates entries already in the cache
+    await extractor.refresh_stale_items()
+    assert requests == []
+
+    await extractor.backfill_item_cache(limit=2)
+    assert requests == [1, 2]
+    await extractor.backfill_item_cache(limit=2)
+    assert requests == [1, 2, 3]
+    assert extractor.client.item_cache.cached_item_ids() == {1, 2, 3}
+    await extractor.writer.close()
+    extractor.client.item_cache.close()
+    await extractor.client._client.aclose()
+
+    async with get_session() as session:
+        names = (await session.execute(select(Item.item_name).order_by(Item.item_id))).scalars().all()
+    assert names == ["Item 1", "Item 2", "Item 3"]
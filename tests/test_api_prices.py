@@ -0,0 +1,284 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.main import app
+from src.database import operations
+from src.database.commodity_ladder import load_commodity_ladders
+from src.database.models import Auction, Commodity, ConnectedRealm, Item
+from src.database.operations import get_session
+from src.database.scripts.populate_raw_craft_cost import get_lowest_commodity_price
+from src.extractor.auction_batch import AuctionBatchBuilder
+from src.extractor.commodity_batch import CommodityBatch
+from src.extractor.main import ItemExtractor
+
+
+def seed_prices(now):
+    with operations.init_session_factory()() as db:
+        db.add(
+            ConnectedRealm(id=1, connected_realm_id=1305, name="kazzak", current_snapshot_id=2)
+        )
+        db.add_all(
+            Item(
+                item_id=item_id,
+                item_name=f"Item {item_id}",
+                item_class_id=7,
+                item_class_name="Tradeskill",
+                item_subclass_id=1,
+                item_subclass_name="Parts",
+            )
+            for item_id in (10, 20, 30)
+        )
+        rows = [
+            # item 10: two recent auctions and one older one
+            (1, 10, 300, 3, now),
+            (2, 10, 500, 1, now - timedelta(hours=2)),
+            (3, 10, 1000, 2, now - timedelta(days=3)),
+            # item 20: only older auctions, so it has no current price
+            (4, 20, 700, 1, now - timedelta(days=2)),
+            # item 30: one recent auction, plus rows that must be ignored
+            (5, 30, 50, 1, now),
+            (6, 30, 0, 1, now),
+            (7, 30, 9999, 1, now - timedelta(days=30)),
+        ]
+        db.add_all(
+            Auction(
+                auction_id=auction_id,
+                connected_realm_id=1305,
+                item_id=item_id,
+                buyout_price=buyout,
+                quantity=quantity,
+                time_left="LONG",
+                last_modified=last_modified,
+                # Listings older than a day are gone from the current snapshot
+                active=now - last_modified < timedelta(days=1),
+                snapshot_id=1,
+                removed_snapshot_id=None if now - last_modified < timedelta(days=1) else 2,
+            )
+            for auction_id, item_id, buyout, quantity, last_modified in rows
+        )
+        seed_rollups(db, rows)
+        db.commit()
+
+
+def seed_rollups(db, rows):
+    """Build hourly and daily rollups from auction rows as ingest would."""
+    snapshots = {}
+    for auction_id, item_id, buyout, quantity, last_modified in rows:
+        builder = snapshots.setdefault(last_modified, AuctionBatchBuilder(1305, last_modified))
+        builder.append(auction_id, item_id, buyout, quantity, "LONG")
+
+    connection = db.connection()
+    days = set()
+    for last_modified, builder in snapshots.items():
+        hour = operations.price_rollup_hour(last_modified)
+        connection.exec_driver_sql(
+            operations.PRICE_HOURLY_INSERT_SQL, builder.build().price_rollup_rows(hour)
+        )
+        days.add(hour.replace(hour=0))
+    for day in days:
+        bounds = [
+            value.strftime(operations.SQLITE_DATETIME_FORMAT)
+            for value in (day, day + timedelta(days=1))
+        ]
+        connection.exec_driver_sql(
+            operations.PRICE_DAILY_DERIVE_SQL, (bounds[0], 1305, *bounds)
+        )
+
+
+def test_realm_prices_aggregates_per_item(api_database):
+    seed_prices(datetime.utcnow())
+    client = TestClient(app)
+
+    response = client.get("/api/v1/prices/1305", params={"items": "10,20,30", "time_range": "7d"})
+    assert response.status_code == 200
+    body = response.json()
+
+    details = {detail["item_id"]: detail for detail in body["item_details"]}
+    assert details[10]["current_price"] == pytest.approx(300.0)  # mean(100, 500)
+    assert details[10]["historical_low"] == pytest.approx(100.0)
+    assert details[10]["historical_high"] == pytest.approx(500.0)
+    assert details[20] == {
+        "item_id": 20,
+        "current_price": 0,
+        "historical_low": 0,
+        "historical_high": 0,
+    }
+    assert details[30]["current_price"] == pytest.approx(50.0)
+
+    # Average of current prices across items with recent data
+    assert body["average_price"] == pytest.approx((300.0 + 50.0) / 2)
+    # Historical item averages are mean(100, 500, 500) and 50
+    historical_avg = ((100.0 + 500.0 + 500.0) / 3 + 50.0) / 2
+    assert body["price_trend"] == pytest.approx(body["average_price"] / historical_avg - 1)
+
+
+def test_realm_prices_without_recent_data(api_database):
+    seed_prices(datetime.utcnow())
+    client = TestClient(app)
+
+    response = client.get("/api/v1/prices/1305", params={"items": "20", "time_range": "7d"})
+    assert response.status_code == 404
+
+
+def test_compare_realms_scores_each_realm(api_database):
+    now = datetime.utcnow()
+    seed_prices(now)
+    with operations.init_session_factory()() as db:
+        db.add(
+            ConnectedRealm(
+                id=2, connected_realm_id=1096, name="ysondre", population=100, current_snapshot_id=3
+            )
+        )
+        db.add(
+            Auction(
+                auction_id=100,
+                connected_realm_id=1096,
+                item_id=10,
+                buyout_price=400,
+                quantity=4,
+                time_left="LONG",
+                last_modified=now,
+                active=True,
+                snapshot_id=3,
+            )
+        )
+        db.commit()
+    client = TestClient(app)
+
+    response = client.post("/api/v1/comparison", json={"realms": [1, 2], "items": [10, 30]})
+    assert response.status_code == 200
+    comparisons = {realm["realm_id"]: realm for realm in response.json()}
+
+    kazzak = comparisons[1]
+    assert [item["item_id"] for item in kazzak["items"]] == [10, 30]
+    item_10 = kazzak["items"][0]
+    assert item_10["lowest_price"] == pytest.approx(100.0)
+    assert item_10["highest_price"] == pytest.approx(500.0)
+    assert item_10["quantity"] == 4
+    assert item_10["average_lowest_five"] == pytest.approx(300.0)
+    # Kazzak has no population data, so its ratings are zero
+    assert kazzak["rating"] == 0
+
+    ysondre = comparisons[2]
+    assert [item["item_id"] for item in ysondre["items"]] == [10]
+    assert ysondre["total_value"] == pytest.approx(100.0)
+    assert ysondre["value_per_item"] == pytest.approx(100.0 / 4)
+    assert ysondre["rating"] == pytest.approx(100.0 / 5 * 10 / 10000000 / 2)
+
+
+@pytest.mark.asyncio
+async def test_compare_realms_keeps_unchanged_auctions(ingest_database):
+    first_seen = datetime.utcnow() - timedelta(hours=30)
+    async with get_session() as session:
+        session.add(ConnectedRealm(id=1, connected_realm_id=1305, name="kazzak"))
+        session.add(Item(item_id=10, item_name="Item 10"))
+        await session.commit()
+
+        extractor = ItemExtractor()
+        for last_modified in (first_seen, datetime.utcnow()):
+            builder = AuctionBatchBuilder(1305, last_modified)
+            builder.append(1, 10, 300, 3, "LONG")
+            builder.append(2, 10, 500, 1, "LONG")
+            written = await extractor.queue_realm_auctions(session, 1305, builder.build())
+            assert await written
+    await extractor.writer.close()
+
+    # Both auctions were skipped on re-ingest and keep their first timestamp
+    assert extractor.stats["auctions_skipped"] == 2
+    client = TestClient(app)
+    response = client.post("/api/v1/comparison", json={"realms": [1], "items": [10]})
+    assert response.status_code == 200
+    (item,) = response.json()[0]["items"]
+    assert item["quantity"] == 4
+    assert item["lowest_price"] == pytest.approx(100.0)
+    assert item["highest_price"] == pytest.approx(500.0)
+
+
+def seed_commodities(now):
+    snapshot = CommodityBatch(
+        now,
+        item_id=np.array([10, 10, 10, 20]),
+        unit_price=np.array([150, 120, 150, 90]),
+        quantity=np.array([20, 2, 7, 4]),
+    ).aggregate()
+    with operations.init_session_factory()() as db:
+        for row in snapshot.rows():
+            values = dict(zip(operations.COMMODITY_ROW_COLUMNS, row))
+            values["last_modified"] = now  # rows() formats it for raw SQL
+            db.add(Commodity(**values))
+        db.commit()
+
+
+def test_commodity_cost_walks_the_price_ladder(api_database):
+    seed_commodities(datetime.utcnow())
+    client = TestClient(app)
+
+    response = client.get("/api/v1/commodities/10/cost", params={"quantity": 10})
+    assert response.status_code == 200
+    # 2 units at 120, then 8 of the 27 at 150
+    assert response.json() == {
+        "item_id": 10,
+        "quantity": 10,
+        "total_cost": 2 * 120 + 8 * 150,
+        "average_price": pytest.approx((2 * 120 + 8 * 150) / 10),
+        "available_quantity": 29,
+    }
+
+    assert client.get("/api/v1/commodities/10/cost", params={"quantity": 30}).status_code == 404
+    assert client.get("/api/v1/commodities/99/cost", params={"quantity": 1}).status_code == 404
+
+    with operations.init_session_factory()() as db:
+        ladders = load_commodity_ladders(db)
+    assert ladders[10].cost(2) == 240
+    assert ladders[10].cost(29) == 240 + 27 * 150
+    assert ladders[10].cost(30) is None
+    assert get_lowest_commodity_price(ladders, {10, 20}, quantity=4) == pytest.approx(90.0)
+    assert get_lowest_commodity_price(ladders, {10, 20}, quantity=5) == pytest.approx(
+        (240 + 3 * 150) / 5
+    )
+
+
+def test_commodity_history_returns_snapshot_summaries(api_database):
+    now = datetime.utcnow().replace(microsecond=0)
+    snapshots = [
+        CommodityBatch(
+            now - timedelta(days=10),
+            item_id=np.array([10]),
+            unit_price=np.array([500]),
+            quantity=np.array([1]),
+        ),
+        CommodityBatch(
+            now,
+            item_id=np.array([10, 10, 10, 10, 20]),
+            unit_price=np.array([150, 120, 150, 200, 90]),
+            quantity=np.array([20, 2, 7, 100, 4]),
+        ),
+    ]
+    with operations.init_session_factory()() as db:
+        for snapshot in snapshots + snapshots[1:]:  # The repeat is ignored
+            db.connection().exec_driver_sql(
+                operations.COMMODITY_HISTORY_INSERT_SQL, snapshot.summary_rows()
+            )
+        db.commit()
+    client = TestClient(app)
+
+    response = client.get("/api/v1/commodities/10/history", params={"time_range": "7d"})
+    assert response.status_code == 200
+    assert response.json() == [
+        {
+            "snapshot_time": now.isoformat(),
+            "min_price": 120,
+            "p10_price": 150,  # 13th of 129 units
+            "p25_price": 200,
+            "median_price": 200,
+            "total_quantity": 129,
+            "cost_10": 2 * 120 + 8 * 150,
+            "cost_100": 2 * 120 + 27 * 150 + 71 * 200,
+            "cost_1000": None,
+        }
+    ]
+    assert len(client.get("/api/v1/commodities/10/history", params={"time_range": "30d"}).json()) == 2
+    assert client.get("/api/v1/commodities/10/history", params={"time_range": "0d"}).status_code == 422
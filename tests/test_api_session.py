@@ -0,0 +1,37 @@
+from fastapi.testclient import TestClient
+
+from src.api.main import app
+from src.database import init_db, operations
+from src.database.models import Item
+
+
+def test_lifespan_creates_session_factory_once(api_database):
+    with TestClient(app) as client:
+        factory = operations._SessionLocal
+        engine = init_db._sync_engine
+        assert factory is not None
+        assert engine is not None
+
+        with factory() as db:
+            db.add(
+                Item(
+                    item_id=1,
+                    item_name="Test Item",
+                    item_class_id=7,
+                    item_class_name="Tradeskill",
+                    item_subclass_id=1,
+                    item_subclass_name="Parts",
+                )
+            )
+            db.commit()
+
+        for _ in range(3):
+            response = client.get("/api/v1/item-classes")
+            assert response.status_code == 200
+            assert response.json() == [{"item_class_id": 7, "item_class_name": "Tradeskill"}]
+
+        assert operations._SessionLocal is factory
+        assert init_db._sync_engine is engine
+
+    assert operations._SessionLocal is None
+    assert init_db._sync_engine is None
@@ -0,0 +1,260 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import httpx
+import pytest
+from sqlalchemy import select
+
+from src.database.models import (
+    Auction,
+    AuctionPriceDaily,
+    AuctionPriceHourly,
+    ConnectedRealm,
+    Item,
+)
+from src.database.operations import (
+    AUCTION_ROW_COLUMNS,
+    SQLITE_DATETIME_FORMAT,
+    get_current_auction_state,
+    get_session,
+)
+from src.extractor.api_client import BlizzardAPIClient
+from src.extractor.auction_batch import AuctionBatchBuilder
+from src.extractor.auction_delta import diff_auctions
+from src.extractor.main import ItemExtractor
+from src.extractor.pipeline import AuctionPipeline
+
+REALM_ID = 1305
+
+
+def make_batch(*auctions, last_modified=None):
+    """Build a batch from (auction_id, buyout_price, quantity) tuples."""
+    builder = AuctionBatchBuilder(REALM_ID, last_modified or datetime.utcnow())
+    for auction_id, buyout_price, quantity in auctions:
+        builder.append(auction_id, 10, buyout_price, quantity, "LONG")
+    return builder.build()
+
+
+def test_diff_classifies_auctions():
+    previous = {1: (100, 1), 2: (200, 2), 3: (300, 3)}
+    incoming = make_batch(
+        (1, 100, 1),  # unchanged
+        (2, 250, 2),  # price changed
+        (4, 400, 4),  # new
+    )
+
+    delta = diff_auctions(previous, incoming)
+
+    assert delta.inserts.auction_id.tolist() == [4]
+    assert delta.updates.auction_id.tolist() == [2]
+    assert delta.removals == {3}
+    assert delta.unchanged == 1
+    assert delta.writes.auction_id.tolist() == [4, 2]
+
+
+def test_diff_against_empty_snapshot():
+    delta = diff_auctions({}, make_batch((1, 100, 1), (2, 100, 1)))
+    assert len(delta.inserts) == 2
+    assert not len(delta.updates) and not delta.removals and delta.unchanged == 0
+
+
+def test_batch_rows_follow_column_order():
+    batch = make_batch((1, 100, 2), (2, 0, 1))
+    rows = list(batch.rows(snapshot_id=7))
+    assert [dict(zip(AUCTION_ROW_COLUMNS, row)) for row in rows][0] == {
+        "auction_id": 1,
+        "connected_realm_id": REALM_ID,
+        "item_id": 10,
+        "buyout_price": 100,
+        "quantity": 2,
+        "time_left": "LONG",
+        "last_modified": batch.last_modified.strftime(SQLITE_DATETIME_FORMAT),
+        "active": True,
+        "snapshot_id": 7,
+    }
+    assert len(rows) == 2
+
+
+def serve(*snapshots):
+    """Mock transport serving one realm payload per request, 304 for None.
+
+    Each snapshot is a list of (auction_id, buyout_price, quantity) tuples.
+    """
+    conditional_headers = []
+
+    def handler(request):
+        conditional_headers.append(request.headers.get("If-Modified-Since"))
+        snapshot = snapshots[len(conditional_headers) - 1]
+        if snapshot is None:
+            return httpx.Response(304)
+        payload = {
+            "auctions": [
+                {
+                    "id": auction_id,
+                    "item": {"id": 10},
+                    "buyout": buyout_price,
+                    "quantity": quantity,
+                    "time_left": "LONG",
+                }
+                for auction_id, buyout_price, quantity in snapshot
+            ]
+        }
+        return httpx.Response(
+            200,
+            json=payload,
+            headers={
+                "Last-Modified": f"Sat, 17 Oct 2026 10:0{len(conditional_headers)}:00 GMT"
+            },
+        )
+
+    client = BlizzardAPIClient("id", "secret")
+    client.access_token = "token"
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client, conditional_headers
+
+
+async def ingest(extractor, spool_dir):
+    """Run one realm through the auction pipeline"""
+    with ThreadPoolExecutor() as executor:
+        pipeline = AuctionPipeline(extractor, spool_dir=str(spool_dir), executor=executor)
+        assert await pipeline.run([REALM_ID]) == {REALM_ID: True}
+
+
+async def add_realm():
+    async with get_session() as session:
+        session.add(ConnectedRealm(id=1, connected_realm_id=REALM_ID, name="kazzak"))
+        session.add(Item(item_id=10, item_name="Test Item"))
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_realm_ingestion_writes_only_the_delta(async_database, tmp_path):
+    await add_realm()
+    extractor = ItemExtractor()
+    extractor.client, _ = serve(
+        [(1, 100, 1), (2, 100, 1), (3, 100, 1)],
+        [(1, 100, 1), (2, 100, 5), (4, 100, 1)],
+    )
+
+    await ingest(extractor, tmp_path)
+    async with get_session() as session:
+        first_write = (
+            await session.execute(select(Auction.last_modified).where(Auction.auction_id == 1))
+        ).scalar_one()
+
+    await ingest(extractor, tmp_path)
+    async with get_session() as session:
+        state = await get_current_auction_state(session, REALM_ID)
+        # The unchanged auction was not rewritten
+        last_modified = (
+            await session.execute(select(Auction.last_modified).where(Auction.auction_id == 1))
+        ).scalar_one()
+    await extractor.client._client.aclose()
+    await extractor.writer.close()
+
+    assert state == {1: (100, 1), 2: (100, 5), 4: (100, 1)}
+    assert last_modified == first_write
+    assert extractor.stats["auctions_processed"] == 6
+    assert extractor.stats["auctions_inserted"] == 4
+    assert extractor.stats["auctions_updated"] == 1
+    assert extractor.stats["auctions_removed"] == 1
+    assert extractor.stats["auctions_skipped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_empty_snapshot_retires_previous_auctions(async_database, tmp_path):
+    await add_realm()
+    extractor = ItemExtractor()
+    # The second payload lists no tracked auctions
+    extractor.client, _ = serve([(1, 100, 1), (2, 100, 1)], [])
+
+    await ingest(extractor, tmp_path)
+    await ingest(extractor, tmp_path)
+    await extractor.client._client.aclose()
+    await extractor.writer.close()
+
+    async with get_session() as session:
+        assert await get_current_auction_state(session, REALM_ID) == {}
+        removed = (
+            await session.execute(select(Auction.removed_snapshot_id, Auction.active))
+        ).all()
+        realm = await session.get(ConnectedRealm, 1)
+    assert removed == [(realm.current_snapshot_id, False)] * 2
+    assert extractor.stats["auctions_removed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_unchanged_snapshot_is_skipped(async_database, tmp_path):
+    await add_realm()
+    extractor = ItemExtractor()
+    extractor.client, conditional_headers = serve([(1, 100, 1)], None)
+    await ingest(extractor, tmp_path)
+    await extractor.writer.close()
+
+    # The Last-Modified of the ingested payload survives a restart
+    restarted = ItemExtractor()
+    restarted.client = extractor.client
+    async with get_session() as session:
+        await restarted.load_endpoint_states(session)
+    await ingest(restarted, tmp_path)
+    await restarted.writer.close()
+    await extractor.client._client.aclose()
+
+    async with get_session() as session:
+        assert await get_current_auction_state(session, REALM_ID) == {1: (100, 1)}
+    assert conditional_headers == [None, "Sat, 17 Oct 2026 10:01:00 GMT"]
+    assert restarted.stats["snapshots_unchanged"] == 1
+    assert restarted.stats["auctions_processed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_ingestion_maintains_price_rollups(async_database, tmp_path, monkeypatch):
+    fetch_times = iter(
+        [
+            datetime(2026, 10, 17, 10, 5),
+            datetime(2026, 10, 17, 10, 40),  # Supersedes the first snapshot of the hour
+            datetime(2026, 10, 17, 11, 10),
+        ]
+    )
+
+    class FetchClock(datetime):
+        @classmethod
+        def utcnow(cls):
+            return next(fetch_times)
+
+    monkeypatch.setattr("src.extractor.pipeline.datetime", FetchClock)
+    await add_realm()
+    extractor = ItemExtractor()
+    extractor.client, _ = serve(
+        [(1, 100, 1), (2, 300, 1)],
+        [(1, 100, 1), (2, 300, 3), (3, 500, 1)],
+        [(1, 100, 1)],
+    )
+    for _ in range(3):
+        await ingest(extractor, tmp_path)
+    await extractor.client._client.aclose()
+    await extractor.writer.close()
+
+    async with get_session() as session:
+        hourly = (
+            await session.execute(
+                select(
+                    AuctionPriceHourly.bucket_start,
+                    AuctionPriceHourly.min_price,
+                    AuctionPriceHourly.max_price,
+                    AuctionPriceHourly.median_price,
+                    AuctionPriceHourly.quantity,
+                    AuctionPriceHourly.auction_count,
+                ).order_by(AuctionPriceHourly.bucket_start)
+            )
+        ).all()
+        daily = (await session.execute(select(AuctionPriceDaily))).scalar_one()
+
+    assert hourly == [
+        (datetime(2026, 10, 17, 10), 100, 500, 100, 5, 3),
+        (datetime(2026, 10, 17, 11), 100, 100, 100, 1, 1),
+    ]
+    assert daily.bucket_start == datetime(2026, 10, 17)
+    assert (daily.min_price, daily.max_price, daily.hours) == (100, 500, 2)
+    assert daily.mean_price == pytest.approx((100 + 100 + 500 + 100) / 4)
+    assert (daily.quantity, daily.auction_count) == (3, 2)
@@ -0,0 +1,69 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from src.database.models import Auction, AuctionSnapshot, ConnectedRealm, Item
+from src.database.operations import (
+    add_auction_snapshot,
+    apply_auction_snapshot,
+    get_auctions,
+    get_current_auction_state,
+    get_session,
+    write_auction_rows,
+)
+from src.extractor.auction_batch import AuctionBatchBuilder
+
+REALM_ID = 1305
+
+
+async def ingest(session, auction_ids, apply=True):
+    snapshot_id = await add_auction_snapshot(session, REALM_ID)
+    previous_ids = set(await get_current_auction_state(session, REALM_ID))
+    builder = AuctionBatchBuilder(REALM_ID, datetime.utcnow())
+    for auction_id in auction_ids:
+        builder.append(auction_id, 10, 100, 1, "LONG")
+    await write_auction_rows(session, builder.build().rows(snapshot_id))
+    if apply:
+        await apply_auction_snapshot(
+            session, REALM_ID, snapshot_id, previous_ids - set(auction_ids), len(auction_ids)
+        )
+    await session.commit()
+    return snapshot_id
+
+
+@pytest.mark.asyncio
+async def test_snapshot_switch_is_atomic_for_readers(async_database):
+    async with get_session() as session:
+        session.add(ConnectedRealm(id=1, connected_realm_id=REALM_ID, name="kazzak"))
+        session.add(Item(item_id=10, item_name="Test Item"))
+        await session.commit()
+
+        first = await ingest(session, [1, 2, 3])
+        assert set(await get_current_auction_state(session, REALM_ID)) == {1, 2, 3}
+
+        # While the next snapshot is written, readers still see the first one
+        second = await ingest(session, [2, 3, 4], apply=False)
+        assert set(await get_current_auction_state(session, REALM_ID)) == {1, 2, 3}
+
+        await apply_auction_snapshot(session, REALM_ID, second, {1}, 3)
+        await session.commit()
+        assert set(await get_current_auction_state(session, REALM_ID)) == {2, 3, 4}
+
+        rows = {
+            row.auction_id: row
+            for row in (await session.execute(select(Auction))).scalars().all()
+        }
+        assert rows[2].snapshot_id == first  # Unchanged auctions keep their first snapshot
+        assert rows[4].snapshot_id == second
+        assert rows[1].removed_snapshot_id == second
+        assert rows[1].active is False
+
+        realm = await session.get(ConnectedRealm, 1)
+        assert realm.current_snapshot_id == second
+        snapshot = await session.get(AuctionSnapshot, second)
+        assert snapshot.committed_at is not None
+        assert snapshot.auction_count == 3
+
+        current = await get_auctions(session, connected_realm_id=REALM_ID)
+        assert {auction.auction_id for auction in current} == {2, 3, 4}
@@ -0,0 +1,71 @@
+import random
+
+import pandas as pd
+import pytest
+
+from src.api.comparison import compute_item_price_stats
+
+
+def reference_stats(auctions):
+    """Per-item statistics as computed by the original pure-Python loop."""
+    prices_per_unit = [buyout / quantity for buyout, quantity in auctions]
+    quantities = [quantity for _, quantity in auctions]
+    sorted_prices = sorted(prices_per_unit)
+    n = len(sorted_prices)
+    if n % 2 == 0:
+        median_price = (sorted_prices[n // 2 - 1] + sorted_prices[n // 2]) / 2
+    else:
+        median_price = sorted_prices[n // 2]
+    trim_size = int(n * 0.1)
+    if n > 10:
+        trimmed_prices = sorted_prices[trim_size:-trim_size]
+        trimmed_mean = sum(trimmed_prices) / len(trimmed_prices)
+    else:
+        trimmed_mean = median_price
+    robust_price = min(median_price, trimmed_mean)
+    effective_quantity = sum(
+        quantity
+        for price, quantity in zip(prices_per_unit, quantities)
+        if abs(price - robust_price) <= robust_price * 0.2
+    )
+    total_quantity = sum(quantities)
+    if effective_quantity < total_quantity * 0.2:
+        effective_quantity = total_quantity
+    return {
+        "lowest_price": sorted_prices[0],
+        "highest_price": sorted_prices[-1],
+        "quantity": total_quantity,
+        "average_lowest_five": sum(sorted_prices[:5]) / min(5, n),
+        "robust_price": robust_price,
+        "effective_quantity": effective_quantity,
+        "price_sum": sum(prices_per_unit),
+    }
+
+
+def test_matches_reference_implementation():
+    rng = random.Random(7)
+    rows = []
+    for realm_id in (1, 2, 3):
+        for item_id in (10, 20, 30, 40):
+            # Mix small groups (median only) with large ones (trimmed mean)
+            for _ in range(rng.choice([1, 2, 5, 10, 11, 25, 60])):
+                quantity = rng.randint(1, 20)
+                rows.append((realm_id, item_id, rng.randint(1, 5000) * quantity, quantity))
+    auctions = pd.DataFrame(
+        rows, columns=["connected_realm_id", "item_id", "buyout_price", "quantity"]
+    )
+
+    stats = compute_item_price_stats(auctions)
+
+    for (realm_id, item_id), group in auctions.groupby(["connected_realm_id", "item_id"]):
+        expected = reference_stats(list(zip(group.buyout_price, group.quantity)))
+        actual = stats.loc[(realm_id, item_id)]
+        for column, value in expected.items():
+            assert actual[column] == pytest.approx(value), column
+
+
+def test_empty_input():
+    auctions = pd.DataFrame(
+        columns=["connected_realm_id", "item_id", "buyout_price", "quantity"]
+    )
+    assert compute_item_price_stats(auctions).empty
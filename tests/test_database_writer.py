@@ -0,0 +1,136 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+from sqlalchemy import select, text
+
+from src.database.models import Commodity, Item
+from src.database.operations import (
+    COMMODITY_STAGING_TABLE,
+    get_session,
+    replace_commodities,
+)
+from src.database.writer import DatabaseWriter
+from src.extractor.commodity_batch import CommodityBatch
+
+
+def add_item(item_id):
+    async def operation(session):
+        session.add(Item(item_id=item_id, item_name=f"Item {item_id}"))
+        await session.flush()
+        return item_id
+
+    return operation
+
+
+@pytest.mark.asyncio
+async def test_writer_groups_jobs_and_isolates_failures(async_database):
+    writer = DatabaseWriter(group_rows=100)
+    futures = [
+        await writer.submit(add_item(1), rows=1, label="first"),
+        await writer.submit(add_item(1), rows=1, label="duplicate"),
+        await writer.submit(add_item(2), rows=1, label="second"),
+    ]
+    await writer.close()
+
+    assert futures[0].result() == 1
+    assert futures[2].result() == 2
+    with pytest.raises(Exception):
+        futures[1].result()
+    assert writer.progress == {"first": 1, "second": 1}
+
+    async with get_session() as session:
+        item_ids = (await session.execute(select(Item.item_id))).scalars().all()
+    assert sorted(item_ids) == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_commodity_quantities_merge_across_batches(async_database, monkeypatch):
+    monkeypatch.setattr("src.database.operations.COMMODITY_BATCH_SIZE", 1)
+    # Listings of one price level are apart, so unmerged they would land in
+    # separate batches and hit the (item_id, unit_price) constraint
+    snapshot = CommodityBatch(
+        datetime.utcnow(),
+        item_id=np.array([10, 10, 10]),
+        unit_price=np.array([150, 200, 150]),
+        quantity=np.array([20, 1, 5]),
+    )
+
+    writer = DatabaseWriter()
+    await writer.run(
+        lambda session: replace_commodities(session, snapshot.rows()),
+        rows=len(snapshot),
+        label="commodities",
+    )
+    await writer.close()
+
+    async with get_session() as session:
+        rows = (
+            await session.execute(
+                select(Commodity.unit_price, Commodity.quantity).order_by(Commodity.unit_price)
+            )
+        ).all()
+    assert rows == [(150, 25), (200, 1)]
+
+
+@pytest.mark.asyncio
+async def test_replace_commodities_swaps_the_snapshot(async_database):
+    now = datetime.utcnow()
+    first = CommodityBatch(now, np.array([10, 10]), np.array([150, 150]), np.array([1, 2]))
+    second = CommodityBatch(now, np.array([11]), np.array([90]), np.array([4]))
+    broken = [(12, 1, 50, None, 1, 50)]  # last_modified is NOT NULL
+
+    writer = DatabaseWriter()
+    await writer.run(lambda session: replace_commodities(session, first.rows()))
+    await writer.run(lambda session: replace_commodities(session, second.rows()))
+    with pytest.raises(Exception):
+        await writer.run(lambda session: replace_commodities(session, broken))
+    await writer.close()
+
+    async with get_session() as session:
+        rows = (
+            await session.execute(
+                select(Commodity.item_id, Commodity.unit_price, Commodity.quantity)
+            )
+        ).all()
+        tables = (
+            await session.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))
+        ).scalars().all()
+    # The failed load left the previous snapshot in place
+    assert rows == [(11, 90, 4)]
+    assert COMMODITY_STAGING_TABLE not in tables
+
+
+@pytest.mark.asyncio
+async def test_replace_commodities_stores_the_aggregated_snapshot(async_database):
+    # Listings arrive unsorted, with repeated (item, price) pairs across items
+    snapshot = CommodityBatch(
+        datetime.utcnow(),
+        item_id=np.array([20, 10, 10, 20, 10, 10]),
+        unit_price=np.array([90, 150, 120, 90, 150, 200]),
+        quantity=np.array([3, 20, 2, 1, 7, 1]),
+    )
+
+    writer = DatabaseWriter()
+    await writer.run(lambda session: replace_commodities(session, snapshot.rows()))
+    await writer.close()
+
+    async with get_session() as session:
+        rows = (
+            await session.execute(
+                select(
+                    Commodity.item_id,
+                    Commodity.unit_price,
+                    Commodity.quantity,
+                    Commodity.cumulative_quantity,
+                    Commodity.cumulative_cost,
+                ).order_by(Commodity.item_id, Commodity.unit_price)
+            )
+        ).all()
+    # One row per price level, with each item's ladder restarting at zero
+    assert rows == [
+        (10, 120, 2, 2, 240),
+        (10, 150, 27, 29, 240 + 27 * 150),
+        (10, 200, 1, 30, 240 + 27 * 150 + 200),
+        (20, 90, 4, 4, 360),
+    ]
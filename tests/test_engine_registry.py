@@ -0,0 +1,31 @@
+import pytest
+from sqlalchemy import text
+
+from src.database import init_db
+from src.database.operations import get_session
+
+
+@pytest.mark.asyncio
+async def test_engine_is_shared_across_sessions(temp_database):
+    engine = await init_db.get_engine()
+    assert await init_db.get_engine() is engine
+
+    async with get_session() as session:
+        assert session.bind is engine
+        assert (await session.execute(text("SELECT 1"))).scalar() == 1
+
+    async with get_session() as session:
+        assert session.bind is engine
+
+    await init_db.dispose_engine()
+
+
+@pytest.mark.asyncio
+async def test_dispose_engine_resets_registry(temp_database):
+    engine = await init_db.get_engine()
+    await init_db.dispose_engine()
+    assert init_db._engine is None
+
+    new_engine = await init_db.get_engine()
+    assert new_engine is not engine
+    await init_db.dispose_engine()
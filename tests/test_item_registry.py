@@ -0,0 +1,125 @@
+import pytest
+
+from src.database.item_registry import ItemIdRegistry
+from src.database.models import Item
+from src.database.operations import get_session, upsert_items
+from src.extractor.main import ItemExtractor
+
+
+def item(item_id):
+    return {
+        "item_id": item_id,
+        "item_name": f"Item {item_id}",
+        "item_class_id": None,
+        "item_class_name": None,
+        "item_subclass_id": None,
+        "item_subclass_name": None,
+        "display_subclass_name": None,
+        "extension": None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_registry_loads_once_and_tracks_writes(async_database):
+    registry = ItemIdRegistry()
+    async with get_session() as session:
+        session.add(Item(item_id=1, item_name="Existing"))
+        await session.commit()
+
+        loaded = await registry.ids(session)
+        assert loaded == {1}
+        # An unchanged table is not reloaded
+        assert await registry.ids(session) is loaded
+
+        await upsert_items(session, [item(2)])
+        await session.commit()
+        registry.add([2])
+        assert loaded == {1, 2}
+
+
+@pytest.mark.asyncio
+async def test_registry_reloads_when_items_change_elsewhere(async_database):
+    registry = ItemIdRegistry()
+    async with get_session() as session:
+        session.add_all([Item(item_id=1, item_name="First"), Item(item_id=5, item_name="Fifth")])
+        await session.commit()
+        assert await registry.ids(session) == {1, 5}
+
+    # Another process swaps an item below the highest ID, keeping the row count
+    async with get_session() as other:
+        await other.delete(await other.get(Item, 1))
+        other.add(Item(item_id=3, item_name="Third"))
+        await other.commit()
+    async with get_session() as session:
+        assert await registry.ids(session) == {3, 5}
+
+        registry.invalidate()
+        assert not registry.loaded
+        assert await registry.ids(session) == {3, 5}
+
+
+@pytest.mark.asyncio
+async def test_failed_item_write_is_not_tracked(async_database, monkeypatch):
+    async def failing_upsert(session, items):
+        # The rows are written, then the transaction is rolled back
+        await upsert_items(session, items)
+        raise RuntimeError("disk I/O error")
+
+    monkeypatch.setattr("src.extractor.main.upsert_items", failing_upsert)
+    extractor = ItemExtractor()
+    extractor.client = ItemClient()
+
+    assert await extractor.extract_items([(2, "TWW")])
+    await extractor.writer.close()
+
+    async with get_session() as session:
+        assert await extractor.item_ids.ids(session) == set()
+    assert extractor.stats["failed"] == 1
+
+
+class ItemClient:
+    def __init__(self):
+        self.rate_limiter = type("Limiter", (), {"max_concurrent": 4})()
+        self.calls = []
+
+    async def fetch_item(self, item_id):
+        self.calls.append(item_id)
+        if item_id == 404:
+            return {"results": []}
+        if item_id == 500 and self.calls.count(500) == 1:
+            raise RuntimeError("connection reset")
+        return {
+            "results": [
+                {
+                    "data": {
+                        "id": item_id,
+                        "name": f"Item {item_id}",
+                        "item_class": {"id": 1, "name": "Class"},
+                        "item_subclass": {"id": 2, "name": "Subclass"},
+                    }
+                }
+            ]
+        }
+
+
+@pytest.mark.asyncio
+async def test_item_workers_write_in_bulk(async_database, monkeypatch):
+    monkeypatch.setattr("src.extractor.main.ITEM_WRITE_BATCH_SIZE", 2)
+    extractor = ItemExtractor()
+    extractor.client = ItemClient()
+    async with get_session() as session:
+        session.add(Item(item_id=1, item_name="Existing"))
+        await session.commit()
+
+    entries = [(1, "TWW"), (2, "TWW"), (3, "TWW"), (4, None), (404, "TWW"), (500, "TWW")]
+    assert await extractor.extract_items(entries)
+    await extractor.writer.close()
+
+    async with get_session() as session:
+        assert await ItemIdRegistry().ids(session) == {1, 2, 3, 4, 500}
+    assert extractor.item_ids._ids == {1, 2, 3, 4, 500}
+    assert extractor.client.calls.count(500) == 2
+    assert extractor.stats["items_skipped"] == 1
+    assert extractor.stats["succeeded"] == 4
+    assert extractor.stats["failed"] == 1
+    assert extractor.stats["retries"] == 1
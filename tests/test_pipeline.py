@@ -0,0 +1,188 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from src.database.models import ConnectedRealm, Item
+from src.database.operations import (
+    get_current_auction_state,
+    get_realm_ingest_history,
+    get_session,
+)
+from src.extractor.api_client import BlizzardAPIClient
+from src.extractor.main import ItemExtractor
+from src.extractor.pipeline import AuctionPipeline, schedule_realms
+
+LAST_MODIFIED = "Sat, 17 Oct 2026 10:00:00 GMT"
+
+
+def auctions_payload(*auctions):
+    return json.dumps(
+        {
+            "auctions": [
+                {"id": auction_id, "item": {"id": item_id}, "buyout": 100, "quantity": 1}
+                for auction_id, item_id in auctions
+            ]
+        }
+    ).encode()
+
+
+def handler(request):
+    realm_id = int(request.url.path.split("/")[-2])
+    if realm_id == 1:
+        return httpx.Response(
+            200,
+            content=auctions_payload((1, 10), (2, 99)),
+            headers={"Last-Modified": LAST_MODIFIED},
+        )
+    if realm_id == 2:
+        assert request.headers["If-Modified-Since"] == LAST_MODIFIED
+        return httpx.Response(304)
+    if realm_id == 3:
+        return httpx.Response(404, json={"code": 404})
+    return httpx.Response(400, json={"code": 400})
+
+
+@pytest.mark.asyncio
+async def test_pipeline_ingests_realms(async_database, tmp_path):
+    extractor = ItemExtractor()
+    extractor.client = BlizzardAPIClient("id", "secret")
+    extractor.client.access_token = "token"
+    extractor.client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    extractor.endpoint_states = {"auctions/2": LAST_MODIFIED}
+
+    async with get_session() as session:
+        for realm_id in (1, 2, 3, 4):
+            session.add(ConnectedRealm(id=realm_id, connected_realm_id=realm_id, name=f"realm-{realm_id}"))
+        session.add(Item(item_id=10, item_name="Test Item"))
+        await session.commit()
+
+    pipeline = AuctionPipeline(extractor, downloaders=2, queue_size=1, spool_dir=str(tmp_path))
+    results = await pipeline.run([1, 2, 3, 4, 5])
+    await extractor.client._client.aclose()
+    await extractor.writer.close()
+
+    # Realm 4 fails to download, realm 5 is unknown
+    assert results == {1: True, 2: True, 3: True, 4: False, 5: False}
+    async with get_session() as session:
+        assert await get_current_auction_state(session, 1) == {1: (100, 1)}
+        history = await get_realm_ingest_history(session)
+    # Realm 3 has no auction house and gets an empty snapshot
+    assert sorted(history) == [1, 3]
+    assert history[3][0] == 0
+    assert history[1][0] == len(auctions_payload((1, 10), (2, 99)))
+    assert history[1][1] > 0
+    assert extractor.endpoint_states["auctions/1"] == LAST_MODIFIED
+    assert extractor.stats["snapshots_unchanged"] == 1
+    assert not [path for path in tmp_path.iterdir() if path.suffix == ".json"]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_records_download_and_parse_time(async_database, tmp_path):
+    extractor = ItemExtractor()
+    extractor.client = BlizzardAPIClient("id", "secret")
+    extractor.client.access_token = "token"
+    extractor.client._client = httpx.AsyncClient(
+        transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, content=auctions_payload((1, 10)))
+        )
+    )
+    queue_realm_auctions = extractor.queue_realm_auctions
+
+    async def slow_write_stage(*args, **kwargs):
+        await asyncio.sleep(0.5)  # Parsed payloads wait behind this one
+        return await queue_realm_auctions(*args, **kwargs)
+
+    extractor.queue_realm_auctions = slow_write_stage
+    async with get_session() as session:
+        for realm_id in (1, 2):
+            session.add(ConnectedRealm(id=realm_id, connected_realm_id=realm_id, name=f"realm-{realm_id}"))
+        session.add(Item(item_id=10, item_name="Test Item"))
+        await session.commit()
+
+    with ThreadPoolExecutor() as executor:
+        pipeline = AuctionPipeline(
+            extractor, queue_size=1, spool_dir=str(tmp_path), executor=executor
+        )
+        assert await pipeline.run([1, 2]) == {1: True, 2: True}
+    await extractor.client._client.aclose()
+    await extractor.writer.close()
+
+    async with get_session() as session:
+        history = await get_realm_ingest_history(session)
+    # Time blocked on the pipeline queues is not part of the realm's cost
+    assert all(0 < duration < 0.5 for _, duration in history.values())
+
+
+def test_schedule_realms_runs_longest_jobs_first():
+    history = {1: (100, 2.0), 2: (5000, 9.0), 3: (100, 4.0), 4: (50, 1.0)}
+    populations = {4: "Full", 5: "Low"}
+
+    # Realms without history go first, then the largest payloads
+    assert schedule_realms([1, 2, 3, 4, 5], history) == [5, 2, 3, 1, 4]
+    assert schedule_realms([1, 2, 3, 4, 5], history, populations, {"Full"}) == [4, 5, 2, 3, 1]
+
+
+@pytest.mark.asyncio
+async def test_extract_connected_realms_refreshes_stale_realms(async_database):
+    requests = []
+
+    def realm_handler(request):
+        requests.append(request.url.path)
+        if request.url.path.endswith("/index"):
+            return httpx.Response(
+                200,
+                json={
+                    "connected_realms": [
+                        {"href": f"https://eu.api.blizzard.com/data/wow/connected-realm/{i}?namespace=dynamic-eu"}
+                        for i in (1, 2, 3)
+                    ]
+                },
+            )
+        return httpx.Response(
+            200,
+            json={
+                "realms": [{"slug": "kazzak", "category": "English"}],
+                "population": {"name": "Full"},
+                "status": {"name": "Up"},
+            },
+        )
+
+    extractor = ItemExtractor()
+    extractor.client = BlizzardAPIClient("id", "secret")
+    extractor.client.access_token = "token"
+    extractor.client._client = httpx.AsyncClient(transport=httpx.MockTransport(realm_handler))
+
+    async with get_session() as session:
+        now = datetime.utcnow()
+        session.add(ConnectedRealm(id=1, connected_realm_id=1, name="old", status="Down", last_updated=now))
+        session.add(
+            ConnectedRealm(
+                id=2, connected_realm_id=2, name="old", status="Down", last_updated=now - timedelta(days=2)
+            )
+        )
+        await session.commit()
+
+        assert await extractor.extract_connected_realms(session)
+        await extractor.writer.close()
+
+        statuses = {
+            realm.connected_realm_id: realm.status
+            for realm in (await session.execute(ConnectedRealm.__table__.select())).all()
+        }
+
+    assert statuses == {1: "Down", 2: "Up", 3: "Up"}
+    assert sorted(requests) == sorted(
+        ["/data/wow/connected-realm/index", "/data/wow/connected-realm/2", "/data/wow/connected-realm/3"]
+    )
+    assert extractor.stats["realms_skipped"] == 1
+    assert extractor.stats["realms_refreshed"] == 1
+    assert extractor.stats["realms_succeeded"] == 2
+
+    # The index is reused for the auction phase
+    assert await extractor.client.fetch_connected_realms_index() == [1, 2, 3]
+    assert len(requests) == 3
+    await extractor.client._client.aclose()
@@ -0,0 +1,105 @@
+import httpx
+import pytest
+
+from src.extractor.rate_limiter import RateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_limiter(clock, **kwargs) -> RateLimiter:
+    limiter = RateLimiter(clock=clock, **kwargs)
+    limiter._sleep = clock.sleep
+    return limiter
+
+
+def test_token_bucket_refills_up_to_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(capacity=10, refill_rate=5, clock=clock)
+    for _ in range(10):
+        bucket.consume()
+    assert bucket.tokens == 0
+    assert bucket.wait_time() == pytest.approx(0.2)
+
+    clock.now += 1
+    assert bucket.tokens == pytest.approx(5)
+    clock.now += 100
+    assert bucket.tokens == 10
+
+
+@pytest.mark.asyncio
+async def test_bursts_up_to_budget_then_paces():
+    clock = FakeClock()
+    limiter = make_limiter(clock, req_per_second=10)
+
+    for _ in range(10):
+        await limiter.acquire()
+    assert clock.sleeps == []  # Full burst goes out immediately
+
+    await limiter.acquire()
+    assert clock.sleeps == [pytest.approx(0.1)]
+    metrics = limiter.metrics()
+    assert metrics["requests_sent"] == 11
+    assert metrics["requests_delayed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_hourly_budget_limits_sustained_rate():
+    clock = FakeClock()
+    limiter = make_limiter(clock, req_per_second=100, req_per_hour=3600)
+    limiter.hour_bucket._tokens = 0
+
+    await limiter.acquire()
+    assert clock.sleeps == [pytest.approx(1.0)]  # One token per second per hour budget
+
+
+@pytest.mark.asyncio
+async def test_quota_headers_block_until_reset():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    limiter._update_limits_from_headers(
+        {
+            "x-account-ratelimit-limit": "36000",
+            "x-account-ratelimit-remaining": "1",
+            "x-account-ratelimit-reset": "30",
+        }
+    )
+
+    await limiter.acquire()  # Uses the last request in the window
+    assert limiter.remaining_requests == 0
+    assert limiter.wait_time() == pytest.approx(30)
+
+    await limiter.acquire()
+    assert clock.sleeps == [pytest.approx(30)]
+    assert limiter.remaining_requests == 35999
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_response_pauses_all_requests():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    request = httpx.Request("GET", "https://eu.api.blizzard.com/data/wow/item/1")
+    responses = [
+        httpx.Response(429, headers={"Retry-After": "2"}, request=request),
+        httpx.Response(200, json={"id": 1}, request=request),
+    ]
+
+    async def send():
+        response = responses.pop(0)
+        response.raise_for_status()
+        return response
+
+    response = await limiter.execute_with_retry(send)
+    assert response.status_code == 200
+    assert clock.sleeps == [pytest.approx(2.5)]
+    assert limiter.wait_time() == 0